@@ -94,6 +94,12 @@ plt.show()
 # ---------------------------------------------------------------------
 plt.figure(figsize=(7, 6))
 sns.scatterplot(data=df, x="Energía", y="CPI", hue="Parámetro", palette="tab10", s=70)
+
+# Puntos no dominados: ordenados por energía, cada uno mejora el CPI de los anteriores
+valid = df.dropna(subset=["Energía", "CPI"]).sort_values(["Energía", "CPI"])
+frontier = valid[valid["CPI"] < valid["CPI"].cummin().shift(fill_value=float("inf"))]
+plt.step(frontier["Energía"], frontier["CPI"], where="post", color="black", linewidth=1.5, label="Frontera")
+plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
 plt.title("Frontera de Pareto: Energía vs CPI")
 plt.xlabel("Energía")
 plt.ylabel("CPI")
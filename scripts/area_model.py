@@ -0,0 +1,165 @@
+"""
+Estimación de área y leakage con McPAT, sin simular en gem5.
+
+El área y el leakage de McPAT dependen solo de la estructura del
+procesador: se toma el config.json de una corrida de referencia, se le
+aplican los parámetros estructurales de cada configuración (tamaños y
+asociatividades de caché, ROB, anchos, unidades funcionales) y se llena
+el template de McPAT con las estadísticas de esa misma corrida como
+actividad nominal. Los reportes de McPAT quedan en la caché indexada por
+XML, así que cada configuración se estima una sola vez.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import mcpat_xml
+from sim_cache import SimulationCache, mcpat_key, MCPAT_ARTIFACT, MCPAT_CACHE_DIR
+
+ESTIMATES_DIR = "area_estimates"
+
+# Parámetro de los scripts -> ruta en config.json
+CONFIG_PATHS = {
+    "l1i_size": "system.cpu.icache.size",
+    "l1i_assoc": "system.cpu.icache.assoc",
+    "l1d_size": "system.cpu.dcache.size",
+    "l1d_assoc": "system.cpu.dcache.assoc",
+    "l2_size": "system.l2.size",
+    "l2_assoc": "system.l2.assoc",
+    "rob_entries": "system.cpu.numROBEntries",
+    "issue_width": "system.cpu.issueWidth",
+    "decode_width": "system.cpu.decodeWidth",
+}
+# Unidades funcionales: parámetro -> opClass que identifica al FUDesc en fuPool.FUList
+FU_OPCLASSES = {
+    "num_fu_intalu": "IntAlu",
+    "num_fu_fpsimd": "FloatAdd",
+    "num_fu_read": "MemRead",
+    "num_fu_write": "MemWrite",
+}
+FU_LIST_PATH = "system.cpu.fuPool.FUList"
+
+
+def size_bytes(value):
+    """Tamaño de gem5 ("64kB", "2MB") en bytes, como aparece en config.json"""
+    text = str(value).strip()
+    for suffix, factor in (("kB", 1024), ("KB", 1024), ("MB", 1024 ** 2), ("GB", 1024 ** 3), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def set_conf_value(config, conf_path, value):
+    """Asigna una ruta a.b.0.c de config.json (misma resolución que mcpat_xml.get_conf_value)"""
+    parent_path, _, name = conf_path.rpartition(".")
+    parent = mcpat_xml.get_conf_value(config, parent_path)
+    if isinstance(parent, list):
+        parent = parent[0]
+    parent[name] = value
+
+
+def patch_config(config, params):
+    """Copia de config.json con los parámetros estructurales de una configuración"""
+    patched = copy.deepcopy(config)
+    for name, value in params.items():
+        if name in CONFIG_PATHS:
+            path = CONFIG_PATHS[name]
+            set_conf_value(patched, path, size_bytes(value) if path.endswith(".size") else int(value))
+        elif name in FU_OPCLASSES:
+            for fu in mcpat_xml.get_conf_value(patched, FU_LIST_PATH):
+                if any(op.get("opClass") == FU_OPCLASSES[name] for op in fu.get("opList", [])):
+                    fu["count"] = int(value)
+                    break
+            else:
+                print(f"[AREA] Sin unidad funcional con {FU_OPCLASSES[name]} para {name}")
+    return patched
+
+
+def read_mcpat_summary(mcpat_file):
+    """Área (mm^2) y leakage total (W) del procesador en un reporte de McPAT"""
+    summary = {"area": None, "total_leakage": None}
+    inside_processor = False
+    with open(mcpat_file, "r") as f:
+        for line in f:
+            if "Processor:" in line:
+                inside_processor = True
+            elif not inside_processor:
+                continue
+            elif "Area =" in line and summary["area"] is None:
+                summary["area"] = float(line.split("=")[1].split()[0])
+            elif "Total Leakage =" in line and summary["total_leakage"] is None:
+                summary["total_leakage"] = float(line.split("=")[1].split()[0])
+            if None not in summary.values():
+                break
+    return summary
+
+
+def config_id(params):
+    """Identificador estable de una configuración"""
+    return json.dumps({k: str(v) for k, v in params.items()}, sort_keys=True)
+
+
+class AreaEstimator:
+    def __init__(self, stats_file, config_file, template_xml, mcpat_exec, use_cache=True):
+        """
+        stats_file, config_file: corrida de referencia (actividad nominal y estructura base)
+        template_xml: template de McPAT (el mismo de las corridas completas)
+        """
+        self.stats = mcpat_xml.read_stats(stats_file)
+        self.config = mcpat_xml.read_config(config_file)
+        self.template_xml = template_xml
+        self.mcpat_exec = mcpat_exec
+        self.use_cache = use_cache
+        # id de configuración -> {"area", "total_leakage"} (None si McPAT falló)
+        self.estimates = {}
+
+    def estimate(self, params):
+        """Área y leakage de una configuración (None si McPAT falla)"""
+        key = config_id(params)
+        if key in self.estimates:
+            return self.estimates[key]
+
+        os.makedirs(ESTIMATES_DIR, exist_ok=True)
+        name = f"{hashlib.sha256(key.encode()).hexdigest()[:16]}_{os.getpid()}"
+        xml_file = os.path.join(ESTIMATES_DIR, f"{name}.xml")
+        mcpat_file = os.path.join(ESTIMATES_DIR, f"{name}.txt")
+
+        template = mcpat_xml.load_template(self.template_xml)
+        template.fill(self.stats, patch_config(self.config, params)).write(xml_file)
+
+        cache = SimulationCache(MCPAT_CACHE_DIR) if self.use_cache else None
+        xml_key = mcpat_key(xml_file, self.mcpat_exec) if cache else None
+        try:
+            if not (cache and cache.fetch(xml_key, {MCPAT_ARTIFACT: mcpat_file})):
+                with open(mcpat_file, "w") as fout:
+                    subprocess.run([self.mcpat_exec, "-infile", xml_file, "-print_level", "1"],
+                                   check=True, stdout=fout)
+                if cache:
+                    cache.store(xml_key, {MCPAT_ARTIFACT: mcpat_file})
+            result = read_mcpat_summary(mcpat_file)
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            print(f"[AREA] Error estimando {key}: {e}")
+            result = None
+        finally:
+            for path in (xml_file, mcpat_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self.estimates[key] = result
+        return result
+
+    def estimate_many(self, params_list, workers=1):
+        """Estimaciones de varias configuraciones (las nuevas en paralelo), en el mismo orden"""
+        pending = list({config_id(p): p for p in params_list if config_id(p) not in self.estimates}.values())
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for params, result in zip(pending, pool.map(self.estimate, pending, chunksize=4)):
+                    self.estimates[config_id(params)] = result
+        else:
+            for params in pending:
+                self.estimate(params)
+        return [self.estimates[config_id(p)] for p in params_list]
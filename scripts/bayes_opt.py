@@ -0,0 +1,116 @@
+"""
+Optimización bayesiana por lotes sobre un DesignSpace.
+
+Un proceso gaussiano (kernel Matern sobre la codificación del espacio)
+modela log(EDP). Cada ronda propone q configuraciones maximizando Expected
+Improvement con la heurística constant liar: tras elegir un candidato se
+agrega al modelo con el mejor valor observado como valor ficticio y se
+elige el siguiente, así el lote no se concentra en un mismo punto.
+"""
+
+import math
+import random
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+# Espacios más grandes se evalúan sobre una muestra de candidatos
+MAX_CANDIDATES = 20000
+
+
+class BayesianOptimizer:
+    def __init__(self, space, n_initial=8, xi=0.01, seed=0):
+        """
+        space: DesignSpace a explorar
+        n_initial: evaluaciones aleatorias antes de usar el modelo
+        xi: margen de exploración de Expected Improvement
+        """
+        self.space = space
+        self.n_initial = n_initial
+        self.xi = xi
+        self.rng = random.Random(seed)
+        self.seed = seed
+        # índice en el espacio -> objetivo (None si la evaluación falló)
+        self.observations = {}
+
+    def observe(self, config, value):
+        """Registra el resultado de una configuración evaluada"""
+        self.observations[self.space.index_of(config)] = value
+
+    def best(self):
+        """(configuración, valor) con el menor objetivo observado"""
+        valid = {i: v for i, v in self.observations.items() if v is not None}
+        if not valid:
+            return None, None
+        index = min(valid, key=valid.get)
+        return self.space.config_at(index), valid[index]
+
+    def suggest(self, q):
+        """Propone hasta q configuraciones no evaluadas"""
+        evaluated = [self.space.config_at(i) for i in self.observations]
+        valid = [v for v in self.observations.values() if v is not None]
+
+        # Diseño inicial aleatorio mientras no haya datos para el modelo
+        if len(self.observations) < self.n_initial or len(valid) < 2:
+            return self.space.sample(q, self.rng, exclude=evaluated)
+
+        candidates = self.candidates()
+        if not candidates:
+            return []
+
+        X = np.array([self.space.encode(self.space.config_at(i)) for i in self.observations])
+        # log(EDP): el objetivo varía en órdenes de magnitud entre configuraciones;
+        # las evaluaciones fallidas reciben el peor valor observado
+        worst = max(math.log(v) for v in valid)
+        y = np.array([math.log(v) if v is not None else worst for v in self.observations.values()])
+        Xc = np.array([self.space.encode(self.space.config_at(i)) for i in candidates])
+
+        gp = self.fit(X, y)
+        lie = y.min()
+        batch = []
+        for _ in range(min(q, len(candidates))):
+            ei = self.expected_improvement(gp, Xc, y.min())
+            ei[batch] = -np.inf
+            chosen = int(np.argmax(ei))
+            batch.append(chosen)
+
+            # Constant liar: el candidato elegido "devuelve" el mejor valor actual
+            X = np.vstack([X, Xc[chosen]])
+            y = np.append(y, lie)
+            gp = self.fit(X, y, kernel=gp.kernel_)
+
+        return [self.space.config_at(candidates[i]) for i in batch]
+
+    def candidates(self):
+        """Índices no evaluados sobre los que se maximiza EI"""
+        if self.space.size() <= MAX_CANDIDATES:
+            return [i for i in range(self.space.size()) if i not in self.observations]
+        sampled = set()
+        while len(sampled) < MAX_CANDIDATES:
+            index = self.rng.randrange(self.space.size())
+            if index not in self.observations:
+                sampled.add(index)
+        return sorted(sampled)
+
+    def fit(self, X, y, kernel=None):
+        """Ajusta el GP; con kernel dado se reutilizan sus hiperparámetros"""
+        if kernel is None:
+            kernel = (ConstantKernel(1.0, (1e-3, 1e3))
+                      * Matern(length_scale=np.ones(X.shape[1]), length_scale_bounds=(1e-2, 1e2), nu=2.5)
+                      + WhiteKernel(1e-3, (1e-6, 1e-1)))
+            gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True,
+                                          n_restarts_optimizer=3, random_state=self.seed)
+        else:
+            gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True, optimizer=None)
+        gp.fit(X, y)
+        return gp
+
+    def expected_improvement(self, gp, Xc, y_best):
+        """Expected Improvement (minimización) de cada candidato"""
+        mu, sigma = gp.predict(Xc, return_std=True)
+        sigma = np.maximum(sigma, 1e-9)
+        improvement = y_best - mu - self.xi
+        z = improvement / sigma
+        return improvement * norm.cdf(z) + sigma * norm.pdf(z)
@@ -0,0 +1,482 @@
+"""
+Evaluación offline de predictores de saltos y tamaños de BTB.
+
+Se captura una vez la traza de instrucciones ejecutadas de cada workload
+(traza de debug Exec de gem5) y se reduce a los saltos: PC, destino,
+resultado y tipo. Esa traza se repite por modelos de los predictores
+que barren los scripts (BiMode, LTAGE, TAGE, Tournament, con los tamaños
+por defecto de gem5) y de una BTB de mapeo directo con RAS, en paralelo.
+Un salto está mal predicho si falla la dirección (condicionales) o el
+destino (BTB, o RAS para los retornos) de un salto tomado. El reporte da
+MPKI por configuración y los mejores candidatos para simular con timing.
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from multimedia_profiling_simulation import SCRIPT, WORKLOADS
+from stack_distance import TRACE_DIR, TRACE_EXE
+
+# Códigos de --branch_predictor_type de los scripts
+PREDICTOR_TYPES = {0: "BiMode", 1: "LTAGE", 7: "TAGE", 10: "Tournament"}
+BTB_ENTRIES = [1024, 2048, 4096, 8192]
+BTB_TAG_BITS = 16
+RAS_ENTRIES = 16
+# Candidatos por workload marcados para simulación de timing
+TOP_CANDIDATES = 2
+
+# Tipos de salto (AArch64)
+COND, JUMP, CALL, INDIRECT, INDIRECT_CALL, RETURN = range(6)
+COND_MNEMONICS = {"cbz", "cbnz", "tbz", "tbnz"}
+KIND_BY_MNEMONIC = {"b": JUMP, "bl": CALL, "br": INDIRECT, "braa": INDIRECT, "brab": INDIRECT,
+                    "blr": INDIRECT_CALL, "blraa": INDIRECT_CALL, "blrab": INDIRECT_CALL,
+                    "ret": RETURN, "retaa": RETURN, "retab": RETURN}
+INST_SIZE = 4
+
+
+def branch_kind(mnemonic):
+    """Tipo de salto de un mnemónico, o None si no es un salto"""
+    if mnemonic.startswith("b.") or mnemonic in COND_MNEMONICS:
+        return COND
+    return KIND_BY_MNEMONIC.get(mnemonic)
+
+
+def trace_path(workload_key):
+    return os.path.join(TRACE_DIR, f"{workload_key}_branches.npz")
+
+
+def capture_branches(workload_key, max_insts=0):
+    """
+    Corre el workload en gem5 con la traza Exec y guarda sus saltos.
+    Retorna la ruta del .npz (None si gem5 falla).
+    """
+    wl = WORKLOADS[workload_key]
+    outdir = os.path.join(TRACE_DIR, f"m5out_{workload_key}_exec")
+    os.makedirs(outdir, exist_ok=True)
+    debug_file = "exec_trace.out.gz"
+
+    cmd = [TRACE_EXE, f"--outdir={outdir}", "--debug-flags=Exec", f"--debug-file={debug_file}",
+           SCRIPT, "-c", wl["bin"], "-o", wl["opts"]]
+    if max_insts:
+        cmd.append(f"--maxinsts={max_insts}")
+
+    print(f"[BRANCH] Capturando saltos de {workload_key}...")
+    try:
+        subprocess.run(" ".join(cmd), shell=True, check=True, stdout=subprocess.DEVNULL)
+    except subprocess.CalledProcessError as e:
+        print(f"[BRANCH] Error capturando {workload_key}: {e}")
+        return None
+
+    trace = read_exec_trace(os.path.join(outdir, debug_file))
+    output = trace_path(workload_key)
+    np.savez_compressed(output, **trace)
+    print(f"[BRANCH] {workload_key}: {len(trace['pc'])} saltos en {int(trace['insts'])} instrucciones")
+    return output
+
+
+def read_exec_trace(debug_file):
+    """
+    Saltos de una traza Exec de gem5 ("tick: system.cpu: A0 T0 : 0x400144 : b.ne 0x400200 : IntAlu :").
+    El destino real de cada salto es el PC de la instrucción siguiente.
+    Retorna {"pc", "target", "taken", "kind", "insts"}.
+    """
+    opener = gzip.open if debug_file.endswith(".gz") else open
+    pcs, targets, taken, kinds = [], [], [], []
+    insts = 0
+    pending = None  # (pc, tipo) del último salto, a la espera del PC siguiente
+    with opener(debug_file, "rt") as f:
+        for line in f:
+            fields = [field.strip() for field in line.split(" : ")]
+            position = next((i for i, field in enumerate(fields) if field.startswith("0x")), None)
+            if position is None or position + 1 >= len(fields):
+                continue
+            pc_text = fields[position].split()[0]
+            pc_text, _, micro_pc = pc_text.partition(".")
+            # Una instrucción macro aparece una vez por microop
+            if micro_pc and int(micro_pc) != 0:
+                continue
+            pc = int(pc_text, 16)
+            insts += 1
+            if pending:
+                branch_pc, kind = pending
+                pcs.append(branch_pc)
+                targets.append(pc)
+                taken.append(pc != branch_pc + INST_SIZE)
+                kinds.append(kind)
+                pending = None
+            mnemonic = fields[position + 1].split()[0].lower() if fields[position + 1] else ""
+            kind = branch_kind(mnemonic)
+            if kind is not None:
+                pending = (pc, kind)
+    return {"pc": np.array(pcs, dtype=np.uint64), "target": np.array(targets, dtype=np.uint64),
+            "taken": np.array(taken, dtype=bool), "kind": np.array(kinds, dtype=np.uint8),
+            "insts": np.array(insts)}
+
+
+def load_trace(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _update(table, index, taken, max_value):
+    """Contador saturado"""
+    if taken:
+        if table[index] < max_value:
+            table[index] += 1
+    elif table[index] > 0:
+        table[index] -= 1
+
+
+class BiMode:
+    def __init__(self, global_size=8192, choice_size=8192, ctr_bits=2):
+        self.max = (1 << ctr_bits) - 1
+        self.threshold = 1 << (ctr_bits - 1)
+        self.global_mask = global_size - 1
+        self.choice_mask = choice_size - 1
+        self.taken_pht = [self.threshold] * global_size
+        self.not_taken_pht = [self.threshold - 1] * global_size
+        self.choice = [self.threshold - 1] * choice_size
+        self.history = 0
+
+    def access(self, pc, taken):
+        """Predice la dirección del salto, actualiza con el resultado y retorna la predicción"""
+        choice_index = (pc >> 2) & self.choice_mask
+        index = ((pc >> 2) ^ self.history) & self.global_mask
+        choice_taken = self.choice[choice_index] >= self.threshold
+        pht = self.taken_pht if choice_taken else self.not_taken_pht
+        prediction = pht[index] >= self.threshold
+        _update(pht, index, taken, self.max)
+        # La elección no se castiga si el banco elegido acertó contra ella
+        if not (choice_taken != taken and prediction == taken):
+            _update(self.choice, choice_index, taken, self.max)
+        self.history = ((self.history << 1) | taken) & self.global_mask
+        return prediction
+
+
+class Tournament:
+    def __init__(self, local_size=2048, local_history_size=2048, global_size=8192,
+                 choice_size=8192, ctr_bits=2):
+        self.max = (1 << ctr_bits) - 1
+        self.threshold = 1 << (ctr_bits - 1)
+        self.local_mask = local_size - 1
+        self.local_history_mask = local_history_size - 1
+        self.global_mask = global_size - 1
+        self.choice_mask = choice_size - 1
+        self.local_history = [0] * local_history_size
+        self.local_pht = [self.threshold] * local_size
+        self.global_pht = [self.threshold] * global_size
+        self.choice = [self.threshold] * choice_size
+        self.history = 0
+
+    def access(self, pc, taken):
+        history_index = (pc >> 2) & self.local_history_mask
+        local_index = self.local_history[history_index] & self.local_mask
+        global_index = self.history & self.global_mask
+        choice_index = self.history & self.choice_mask
+        local_prediction = self.local_pht[local_index] >= self.threshold
+        global_prediction = self.global_pht[global_index] >= self.threshold
+        # choice alto: usar el global
+        prediction = global_prediction if self.choice[choice_index] >= self.threshold else local_prediction
+        if local_prediction != global_prediction:
+            _update(self.choice, choice_index, global_prediction == taken, self.max)
+        _update(self.local_pht, local_index, taken, self.max)
+        _update(self.global_pht, global_index, taken, self.max)
+        self.local_history[history_index] = ((self.local_history[history_index] << 1) | taken) & self.local_mask
+        self.history = ((self.history << 1) | taken) & self.global_mask
+        return prediction
+
+
+class TAGE:
+    def __init__(self, log_base=13, log_tables=9, tag_bits=(9, 9, 10, 10, 11, 11, 12),
+                 min_history=5, max_history=130, ctr_bits=3, useful_bits=2, reset_period=1 << 18):
+        n = len(tag_bits)
+        self.lengths = [int(min_history * (max_history / min_history) ** (i / (n - 1)) + 0.5) for i in range(n)]
+        self.tag_bits = list(tag_bits)
+        self.log_tables = log_tables
+        self.table_mask = (1 << log_tables) - 1
+        self.history_mask = (1 << max_history) - 1
+        self.base_mask = (1 << log_base) - 1
+        self.base = [2] * (1 << log_base)
+        self.ctr_max = (1 << ctr_bits) - 1
+        self.ctr_threshold = 1 << (ctr_bits - 1)
+        self.useful_max = (1 << useful_bits) - 1
+        self.ctr = [[self.ctr_threshold] * (1 << log_tables) for _ in range(n)]
+        self.tags = [[-1] * (1 << log_tables) for _ in range(n)]
+        self.useful = [[0] * (1 << log_tables) for _ in range(n)]
+        self.use_alt_on_new = 8
+        self.reset_period = reset_period
+        self.branches = 0
+        self.history = 0
+
+    def fold(self, length, width):
+        """Historia global de largo length plegada (XOR) a width bits"""
+        history = self.history & ((1 << length) - 1)
+        mask = (1 << width) - 1
+        folded = 0
+        while history:
+            folded ^= history & mask
+            history >>= width
+        return folded
+
+    def lookup(self, pc):
+        """Índices, tags, proveedor, alternativa y predicción TAGE (sin actualizar)"""
+        p = pc >> 2
+        indices, tags = [], []
+        for i, length in enumerate(self.lengths):
+            indices.append((p ^ (p >> (self.log_tables - i % self.log_tables)) ^ self.fold(length, self.log_tables))
+                           & self.table_mask)
+            width = self.tag_bits[i]
+            tags.append((p ^ self.fold(length, width) ^ (self.fold(length, width - 1) << 1)) & ((1 << width) - 1))
+        hits = [i for i in range(len(self.lengths)) if self.tags[i][indices[i]] == tags[i]]
+        provider = hits[-1] if hits else None
+        base_prediction = self.base[p & self.base_mask] >= 2
+        alt = hits[-2] if len(hits) > 1 else None
+        alt_prediction = (self.ctr[alt][indices[alt]] >= self.ctr_threshold) if alt is not None else base_prediction
+        if provider is None:
+            return indices, tags, None, alt_prediction, base_prediction
+        ctr = self.ctr[provider][indices[provider]]
+        provider_prediction = ctr >= self.ctr_threshold
+        weak = ctr in (self.ctr_threshold - 1, self.ctr_threshold)
+        if weak and self.useful[provider][indices[provider]] == 0 and self.use_alt_on_new >= 8:
+            return indices, tags, provider, alt_prediction, alt_prediction
+        return indices, tags, provider, alt_prediction, provider_prediction
+
+    def train(self, pc, taken, lookup):
+        """Actualiza contadores, utilidad y asignación con el resultado del salto"""
+        indices, tags, provider, alt_prediction, prediction = lookup
+        if provider is None:
+            _update(self.base, (pc >> 2) & self.base_mask, taken, 3)
+        else:
+            index = indices[provider]
+            provider_prediction = self.ctr[provider][index] >= self.ctr_threshold
+            weak = self.ctr[provider][index] in (self.ctr_threshold - 1, self.ctr_threshold)
+            # Entradas nuevas (débiles y sin utilidad): aprender si conviene usar la alternativa
+            if weak and self.useful[provider][index] == 0 and provider_prediction != alt_prediction:
+                self.use_alt_on_new = min(15, self.use_alt_on_new + 1) if alt_prediction == taken \
+                    else max(0, self.use_alt_on_new - 1)
+            if provider_prediction != alt_prediction:
+                _update(self.useful[provider], index, provider_prediction == taken, self.useful_max)
+            _update(self.ctr[provider], index, taken, self.ctr_max)
+
+        # Asignar una entrada con historia más larga si la predicción falló
+        start = 0 if provider is None else provider + 1
+        if prediction != taken and start < len(self.lengths):
+            free = [i for i in range(start, len(self.lengths)) if self.useful[i][indices[i]] == 0]
+            if free:
+                i = free[0]
+                self.tags[i][indices[i]] = tags[i]
+                self.ctr[i][indices[i]] = self.ctr_threshold if taken else self.ctr_threshold - 1
+            else:
+                for i in range(start, len(self.lengths)):
+                    self.useful[i][indices[i]] -= 1
+
+        self.branches += 1
+        if self.branches % self.reset_period == 0:
+            for table in self.useful:
+                table[:] = [u >> 1 for u in table]
+        self.history = ((self.history << 1) | taken) & self.history_mask
+
+    def access(self, pc, taken):
+        lookup = self.lookup(pc)
+        self.train(pc, taken, lookup)
+        return lookup[4]
+
+
+class LTAGE(TAGE):
+    """TAGE con predictor de lazos (iteraciones constantes)"""
+
+    def __init__(self, log_loop_entries=8, loop_tag_bits=14, confidence_max=3, **kwargs):
+        super().__init__(**kwargs)
+        self.loop_mask = (1 << log_loop_entries) - 1
+        self.loop_tag_mask = (1 << loop_tag_bits) - 1
+        self.confidence_max = confidence_max
+        # índice -> [tag, iteraciones del lazo, iteración actual, confianza, dirección del cuerpo]
+        self.loops = {}
+        self.with_loop = -1
+
+    def access(self, pc, taken):
+        lookup = self.lookup(pc)
+        tage_prediction = lookup[4]
+        index = (pc >> 2) & self.loop_mask
+        tag = (pc >> (2 + self.loop_mask.bit_length())) & self.loop_tag_mask
+        entry = self.loops.get(index)
+        if entry and entry[0] != tag:
+            entry = None
+
+        loop_valid = bool(entry) and entry[3] == self.confidence_max
+        loop_prediction = None
+        if loop_valid:
+            loop_prediction = (not entry[4]) if entry[2] + 1 == entry[1] else entry[4]
+        prediction = loop_prediction if loop_valid and self.with_loop >= 0 else tage_prediction
+
+        if loop_valid and loop_prediction != tage_prediction:
+            self.with_loop = min(7, self.with_loop + 1) if loop_prediction == taken else max(-8, self.with_loop - 1)
+
+        if entry:
+            if loop_valid and loop_prediction != taken:
+                del self.loops[index]
+            else:
+                entry[2] += 1
+                if taken != entry[4]:
+                    if entry[2] == entry[1]:
+                        entry[3] = min(self.confidence_max, entry[3] + 1)
+                    elif entry[1] == 0:
+                        entry[1] = entry[2]
+                    else:
+                        del self.loops[index]
+                    entry[2] = 0
+        elif tage_prediction != taken and not taken:
+            # La salida de un lazo suele ser el fallo que lo delata
+            self.loops[index] = [tag, 0, 0, 0, not taken]
+
+        self.train(pc, taken, lookup)
+        return prediction
+
+
+PREDICTOR_MODELS = {"BiMode": BiMode, "LTAGE": LTAGE, "TAGE": TAGE, "Tournament": Tournament}
+
+
+def direction_hits(path, predictor):
+    """Aciertos de dirección del predictor (código de gem5) sobre los saltos condicionales"""
+    trace = load_trace(path)
+    model = PREDICTOR_MODELS[PREDICTOR_TYPES[predictor]]()
+    cond = trace["kind"] == COND
+    return np.array([model.access(pc, taken) == taken
+                     for pc, taken in zip(trace["pc"][cond].tolist(), trace["taken"][cond].tolist())],
+                    dtype=bool)
+
+
+def target_hits(path, btb_entries, tag_bits=BTB_TAG_BITS, ras_entries=RAS_ENTRIES):
+    """
+    Aciertos de destino de cada salto tomado: BTB de mapeo directo (como
+    SimpleBTB de gem5) y RAS para los retornos. Los no tomados cuentan como acierto.
+    """
+    trace = load_trace(path)
+    mask = btb_entries - 1
+    shift = 2 + mask.bit_length()
+    tag_mask = (1 << tag_bits) - 1
+    btb_tags = [-1] * btb_entries
+    btb_targets = [0] * btb_entries
+    ras = []
+    hits = []
+    for pc, target, taken, kind in zip(trace["pc"].tolist(), trace["target"].tolist(),
+                                       trace["taken"].tolist(), trace["kind"].tolist()):
+        if kind in (CALL, INDIRECT_CALL):
+            ras.append(pc + INST_SIZE)
+            if len(ras) > ras_entries:
+                ras.pop(0)
+        if not taken:
+            hits.append(True)
+            continue
+        if kind == RETURN:
+            hits.append(bool(ras) and ras.pop() == target)
+            continue
+        index = (pc >> 2) & mask
+        tag = (pc >> shift) & tag_mask
+        hits.append(btb_tags[index] == tag and btb_targets[index] == target)
+        btb_tags[index] = tag
+        btb_targets[index] = target
+    return np.array(hits, dtype=bool)
+
+
+def _job(args):
+    kind, path, value = args
+    return direction_hits(path, value) if kind == "predictor" else target_hits(path, value)
+
+
+def evaluate(path, predictors=tuple(PREDICTOR_TYPES), btb_sizes=BTB_ENTRIES, jobs=1):
+    """
+    MPKI de cada predictor × tamaño de BTB. Cada predictor y cada BTB se
+    simulan una sola vez (en paralelo) y se combinan salto a salto.
+    Retorna [{"predictor", "btb_entries", "branches", "direction_misses", "target_misses",
+              "mispredictions", "mpki"}]
+    """
+    tasks = [("predictor", path, p) for p in predictors] + [("btb", path, b) for b in btb_sizes]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_job, tasks))
+    else:
+        results = [_job(task) for task in tasks]
+    direction = dict(zip(predictors, results[:len(predictors)]))
+    target = dict(zip(btb_sizes, results[len(predictors):]))
+
+    trace = load_trace(path)
+    insts = int(trace["insts"])
+    cond = trace["kind"] == COND
+    rows = []
+    for predictor in predictors:
+        direction_ok = np.ones(len(cond), dtype=bool)
+        direction_ok[cond] = direction[predictor]
+        for btb_entries in btb_sizes:
+            target_ok = target[btb_entries]
+            # Con la dirección errada el destino no importa
+            target_misses = int((direction_ok & ~target_ok).sum())
+            direction_misses = int((~direction_ok).sum())
+            mispredictions = direction_misses + target_misses
+            rows.append({"predictor": predictor, "btb_entries": btb_entries, "branches": len(cond),
+                         "direction_misses": direction_misses, "target_misses": target_misses,
+                         "mispredictions": mispredictions,
+                         "mpki": mispredictions * 1000 / insts if insts else None})
+    return rows
+
+
+def best_candidates(rows, k=TOP_CANDIDATES):
+    """Las k configuraciones con menor MPKI"""
+    return sorted((r for r in rows if r["mpki"] is not None), key=lambda r: r["mpki"])[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluación offline de predictores de saltos y BTB")
+    parser.add_argument("--workloads", nargs="+", default=["jpeg2k_enc", "jpeg2k_dec"],
+                        choices=list(WORKLOADS))
+    parser.add_argument("--predictors", type=int, nargs="+", default=list(PREDICTOR_TYPES),
+                        choices=list(PREDICTOR_TYPES), help="Códigos de --branch_predictor_type")
+    parser.add_argument("--btb-entries", type=int, nargs="+", default=BTB_ENTRIES)
+    parser.add_argument("--max-insts", type=int, default=0,
+                        help="Instrucciones a capturar por workload (0 = programa completo)")
+    parser.add_argument("--recapture", action="store_true", help="Capturar aunque la traza ya exista")
+    parser.add_argument("--jobs", type=int, default=1, help="Capturas y modelos concurrentes")
+    parser.add_argument("--top", type=int, default=TOP_CANDIDATES,
+                        help="Candidatos por workload para simular con timing")
+    parser.add_argument("--output", default="branch_predictors.csv")
+    args = parser.parse_args()
+
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    missing = [w for w in args.workloads if args.recapture or not os.path.exists(trace_path(w))]
+    if missing:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(missing)))) as pool:
+            list(pool.map(capture_branches, missing, [args.max_insts] * len(missing)))
+
+    with open(args.output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["workload", "branch_predictor_type", "predictor", "btb_entries", "branches",
+                         "direction_misses", "target_misses", "mispredictions", "mpki", "simular"])
+        for workload_key in args.workloads:
+            if not os.path.exists(trace_path(workload_key)):
+                continue
+            rows = evaluate(trace_path(workload_key), args.predictors, args.btb_entries, args.jobs)
+            best = best_candidates(rows, args.top)
+            for r in rows:
+                writer.writerow([workload_key, r["predictor"], PREDICTOR_TYPES[r["predictor"]],
+                                 r["btb_entries"], r["branches"], r["direction_misses"],
+                                 r["target_misses"], r["mispredictions"], r["mpki"],
+                                 "YES" if r in best else "NO"])
+            print(f"\n{workload_key}: MPKI por predictor y BTB")
+            print("  predictor   " + "".join(f"{b:>10}" for b in args.btb_entries))
+            for predictor in args.predictors:
+                mpki = {r["btb_entries"]: r["mpki"] for r in rows if r["predictor"] == predictor}
+                print(f"  {PREDICTOR_TYPES[predictor]:<11} " + "".join(f"{mpki[b]:>10.3f}" for b in args.btb_entries))
+            print("  Candidatos a simular: " + ", ".join(
+                f"{PREDICTOR_TYPES[r['predictor']]} (type={r['predictor']}) BTB={r['btb_entries']}" for r in best))
+
+    print(f"\nResultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
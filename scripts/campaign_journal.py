@@ -0,0 +1,103 @@
+"""
+Journal append-only de jobs completados de una campaña de simulación.
+
+Cada job terminado se escribe como una línea JSON y se hace fsync, de modo
+que una campaña interrumpida (reboot, OOM, Ctrl-C) puede retomarse con
+--resume sin repetir las simulaciones ya hechas.
+"""
+
+import csv
+import json
+import os
+import time
+
+
+class CampaignJournal:
+    def __init__(self, path, resume=False):
+        """
+        path: archivo .jsonl del journal
+        resume: conservar el journal existente; si es False se empieza de cero
+        """
+        self.path = path
+        self.records = {}
+        # job -> último error registrado (los jobs fallidos se reintentan al retomar)
+        self.failures = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            self.records, self.failures = self.load()
+            print(f"[JOURNAL] {len(self.records)} jobs completados en {path}")
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def load(self):
+        """
+        Lee el journal; ignora una última línea truncada por una caída.
+        Retorna (resultados, errores) por job.
+        """
+        records = {}
+        failures = {}
+        if not os.path.exists(self.path):
+            return records, failures
+
+        # Descartar una escritura a medias para que los nuevos registros empiecen en línea nueva
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" in entry:
+                    failures[entry["job"]] = entry["error"]
+                else:
+                    records[entry["job"]] = entry["result"]
+                    failures.pop(entry["job"], None)
+        return records, failures
+
+    def is_done(self, job_id):
+        return job_id in self.records
+
+    def results(self):
+        """Resultados registrados, en orden de finalización"""
+        return list(self.records.values())
+
+    def append(self, job_id, result):
+        """Registra un job completado de forma durable"""
+        self._write({"job": job_id, "time": time.time(), "result": result})
+        self.records[job_id] = result
+        self.failures.pop(job_id, None)
+
+    def append_failure(self, job_id, error):
+        """Registra un job fallido; no cuenta como completado al retomar"""
+        self._write({"job": job_id, "time": time.time(), "error": str(error)})
+        self.failures[job_id] = str(error)
+
+    def _write(self, entry):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write_csv(self, filename, fieldnames=None):
+        """Reconstruye el CSV agregado de la campaña a partir del journal"""
+        results = self.results()
+        if not results:
+            return
+
+        if fieldnames is None:
+            fieldnames = list(results[0].keys())
+            for result in results[1:]:
+                fieldnames += [k for k in result if k not in fieldnames]
+
+        with open(filename, "w", newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(results)
@@ -0,0 +1,166 @@
+"""
+Fast-forward con checkpoints de gem5 compartidos entre configuraciones.
+
+Se toma un checkpoint por workload después de N instrucciones (E/S e
+inicialización, idénticas para toda configuración) y cada job del DSE
+restaura desde ahí con su core O3 y sus caches, con una ventana opcional de
+warm-up antes de medir.
+
+El checkpoint se toma con el mismo script de configuración que lo restaura,
+así la jerarquía de objetos guardada coincide con la del restore. Antes de
+tomarlo se verifica (con --help) que el script exponga las opciones
+estándar de configs/common/Options.py que se usan; si falta alguna no se
+toma checkpoint y los jobs simulan desde el inicio.
+
+Con warm-up, --standard-switch restaura en una CPU timing y pasa al core
+detallado (system.switch_cpus_1) tras --warmup-insts: system.cpu queda con
+las estadísticas del warm-up. normalize_switched_stats() reescribe el
+stats.txt para que el core medido aparezca como system.cpu, que es lo que
+leen las métricas y los conversores a McPAT.
+"""
+
+import glob
+import os
+import re
+import subprocess
+
+# ==== CONFIGURACIÓN ====
+CHECKPOINT_DIR = "checkpoints"
+FAST_CPU = "AtomicSimpleCPU"
+# Script genérico que acepta --cpu-type (perfil funcional de SimPoint)
+FAST_SCRIPT = "configs/deprecated/example/se.py"
+
+# Opciones de Options.py que deben existir en el script de configuración
+TAKE_OPTIONS = ["--take-checkpoints", "--at-instruction", "--max-checkpoints", "--checkpoint-dir"]
+RESTORE_OPTIONS = ["--checkpoint-dir", "--at-instruction", "--checkpoint-restore"]
+WARMUP_OPTIONS = ["--standard-switch", "--warmup-insts"]
+
+# Core detallado con y sin --standard-switch (un solo core)
+DETAILED_CPU = "system.cpu"
+SWITCHED_CPU = "system.switch_cpus_1"
+
+_script_options = {}
+
+
+def checkpoint_dir(workload_key, ff_insts):
+    """Directorio del checkpoint de un workload para N instrucciones"""
+    return os.path.join(CHECKPOINT_DIR, f"{workload_key}_ff{ff_insts}")
+
+
+def find_checkpoint(ckpt_dir):
+    """Ruta del checkpoint cpt.<bench>.<instrucción> dentro del directorio, o None"""
+    cpts = sorted(glob.glob(os.path.join(ckpt_dir, "cpt.*")))
+    return cpts[0] if cpts else None
+
+
+def script_options(exe, script):
+    """Opciones que lista el --help del script de configuración (memoizado)"""
+    if (exe, script) not in _script_options:
+        try:
+            result = subprocess.run([exe, script, "--help"], capture_output=True, text=True)
+            text = result.stdout + result.stderr
+        except OSError:
+            text = ""
+        _script_options[(exe, script)] = set(re.findall(r"--[\w-]+", text))
+    return _script_options[(exe, script)]
+
+
+def missing_options(exe, script, warmup_insts=0):
+    """Opciones de checkpoint/restore que el script no expone"""
+    required = TAKE_OPTIONS + RESTORE_OPTIONS + (WARMUP_OPTIONS if warmup_insts else [])
+    options = script_options(exe, script)
+    return sorted({opt for opt in required if opt not in options})
+
+
+def take_checkpoint(exe, script, binary, opts, workload_key, ff_insts, warmup_insts=0):
+    """
+    Toma (una sola vez) el checkpoint del workload tras ff_insts instrucciones
+    con el mismo script que después lo restaura. Retorna el directorio del
+    checkpoint o None si falla o el script no soporta checkpoint/restore.
+    """
+    ckpt_dir = checkpoint_dir(workload_key, ff_insts)
+    if find_checkpoint(ckpt_dir):
+        print(f"[CHECKPOINT] Reutilizando {ckpt_dir}")
+        return ckpt_dir
+
+    missing = missing_options(exe, script, warmup_insts)
+    if missing:
+        print(f"[ERROR] {script} no soporta {', '.join(missing)}: sin checkpoint para {workload_key}")
+        return None
+
+    os.makedirs(ckpt_dir, exist_ok=True)
+    print(f"[CHECKPOINT] {workload_key}: fast-forward de {ff_insts} instrucciones con {script}")
+
+    cmd = [
+        exe, f"--outdir={ckpt_dir}", script,
+        "-c", binary,
+        "-o", opts,
+        f"--take-checkpoints={ff_insts}",
+        "--at-instruction",
+        "--max-checkpoints=1",
+        f"--checkpoint-dir={ckpt_dir}"
+    ]
+
+    try:
+        subprocess.run(" ".join(cmd), shell=True, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] Checkpoint de {workload_key}: {e}")
+        return None
+
+    if not find_checkpoint(ckpt_dir):
+        print(f"[ERROR] gem5 no generó checkpoint en {ckpt_dir}")
+        return None
+    return ckpt_dir
+
+
+def restore_args(ckpt_dir, ff_insts, warmup_insts=0):
+    """
+    Argumentos de gem5 para restaurar el checkpoint en la CPU detallada.
+    Con --at-instruction el checkpoint se llama cpt.<bench>.<ff_insts>, así
+    que el restore también se indica en instrucciones. En se.py estándar
+    --warmup-insts solo tiene efecto con --standard-switch: se restaura en
+    la CPU timing y se pasa al core detallado tras el warm-up (ver
+    normalize_switched_stats).
+    """
+    args = [f"--checkpoint-dir={os.path.abspath(ckpt_dir)}",
+            "--at-instruction", f"--checkpoint-restore={ff_insts}"]
+    if warmup_insts:
+        args.extend(["--standard-switch=1", f"--warmup-insts={warmup_insts}"])
+    return args
+
+
+def restore_key_params(ff_insts, warmup_insts):
+    """Parámetros extra para la clave de caché de un job restaurado"""
+    return {"_fast_forward": ff_insts, "_warmup": warmup_insts}
+
+
+def normalize_switched_stats(stats_file, cpu=SWITCHED_CPU):
+    """
+    Reescribe el stats.txt de una corrida con --standard-switch para que las
+    estadísticas del core detallado queden bajo system.cpu. Las de la CPU del
+    warm-up con el mismo nombre se descartan; las caches (system.cpu.dcache,
+    system.l2, ...) no cambian. Retorna False si no hay core conmutado.
+    """
+    prefix = cpu + "."
+    with open(stats_file) as f:
+        lines = f.readlines()
+
+    switched = {line.split(None, 1)[0][len(prefix):]
+                for line in lines if line.startswith(prefix)}
+    if not switched:
+        return False
+
+    detailed = DETAILED_CPU + "."
+    normalized = []
+    for line in lines:
+        if line.startswith(prefix):
+            normalized.append(DETAILED_CPU + line[len(cpu):])
+        elif not (line.startswith(detailed)
+                  and line.split(None, 1)[0][len(detailed):] in switched):
+            normalized.append(line)
+
+    tmp = stats_file + ".tmp"
+    with open(tmp, "w") as f:
+        f.writelines(normalized)
+    os.replace(tmp, stats_file)
+    return True
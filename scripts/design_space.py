@@ -0,0 +1,145 @@
+"""
+Espacio de diseño discreto para las búsquedas de DSE.
+
+Cada parámetro tiene una lista ordenada de valores. Los ordinales (tamaños
+de caché, anchos) se codifican por su posición normalizada en [0, 1] y los
+categóricos (tipo de predictor) en one-hot, de modo que los modelos de
+las búsquedas trabajen sobre vectores numéricos.
+
+El espacio se indexa en base mixta, así que muestrear N configuraciones
+nunca construye el producto cartesiano completo.
+"""
+
+import random
+import warnings
+
+SAMPLERS = ["lhs", "sobol", "random", "grid"]
+
+
+class DesignSpace:
+    def __init__(self, parameters, categorical=()):
+        """
+        parameters: {nombre: [valores en orden]}
+        categorical: nombres de parámetros sin orden entre sus valores
+        """
+        self.parameters = {name: list(values) for name, values in parameters.items()}
+        self.names = list(self.parameters)
+        self.categorical = set(categorical)
+
+    def size(self):
+        """Número total de configuraciones"""
+        total = 1
+        for values in self.parameters.values():
+            total *= len(values)
+        return total
+
+    def config_at(self, index):
+        """Configuración número index (mismo orden que itertools.product)"""
+        config = {}
+        for name in reversed(self.names):
+            values = self.parameters[name]
+            index, position = divmod(index, len(values))
+            config[name] = values[position]
+        return {name: config[name] for name in self.names}
+
+    def index_of(self, config):
+        """Posición de una configuración dentro del espacio"""
+        index = 0
+        for name in self.names:
+            values = self.parameters[name]
+            index = index * len(values) + values.index(config[name])
+        return index
+
+    def configs(self):
+        """Itera todas las configuraciones"""
+        for index in range(self.size()):
+            yield self.config_at(index)
+
+    def sample(self, n, rng=None, exclude=()):
+        """n configuraciones distintas al azar, sin repetir las de exclude"""
+        rng = rng or random.Random()
+        excluded = {self.index_of(c) for c in exclude}
+        available = self.size() - len(excluded)
+        chosen = set()
+        while len(chosen) < min(n, available):
+            index = rng.randrange(self.size())
+            if index not in excluded:
+                chosen.add(index)
+        return [self.config_at(i) for i in sorted(chosen)]
+
+    def config_from_unit(self, point):
+        """Configuración correspondiente a un punto de [0, 1)^d (un valor por parámetro)"""
+        config = {}
+        for name, u in zip(self.names, point):
+            values = self.parameters[name]
+            config[name] = values[min(int(u * len(values)), len(values) - 1)]
+        return config
+
+    def latin_hypercube(self, n, rng=None):
+        """n puntos de hipercubo latino: cada parámetro recorre sus niveles de forma balanceada"""
+        rng = rng or random.Random()
+        columns = []
+        for _ in self.names:
+            strata = list(range(n))
+            rng.shuffle(strata)
+            columns.append([(s + rng.random()) / n for s in strata])
+        return [list(point) for point in zip(*columns)]
+
+    def sobol(self, n, seed=0):
+        """n puntos de una secuencia de Sobol aleatorizada (scipy.stats.qmc)"""
+        from scipy.stats import qmc
+        engine = qmc.Sobol(d=len(self.names), scramble=True, seed=seed)
+        with warnings.catch_warnings():
+            # Las propiedades de balance son exactas solo con n potencia de 2
+            warnings.simplefilter("ignore")
+            return engine.random(n).tolist()
+
+    def design(self, n, method="lhs", seed=0):
+        """
+        n configuraciones distintas que cubren el espacio.
+        method: lhs (hipercubo latino), sobol, random (sin reemplazo) o
+        grid (las primeras n del producto cartesiano, como el barrido original)
+        """
+        n = min(n, self.size())
+        if method == "grid":
+            return [self.config_at(i) for i in range(n)]
+
+        rng = random.Random(seed)
+        if method == "random":
+            return self.sample(n, rng)
+        if method == "lhs":
+            points = self.latin_hypercube(n, rng)
+        elif method == "sobol":
+            points = self.sobol(n, seed)
+        else:
+            raise ValueError(f"Método de muestreo desconocido: {method}")
+
+        # Puntos que caen en la misma configuración se reemplazan por otras al azar
+        configs = []
+        seen = set()
+        for point in points:
+            config = self.config_from_unit(point)
+            index = self.index_of(config)
+            if index not in seen:
+                seen.add(index)
+                configs.append(config)
+        if len(configs) < n:
+            configs += self.sample(n - len(configs), rng, exclude=configs)
+        return configs
+
+    def encode(self, config):
+        """Vector numérico de una configuración"""
+        vector = []
+        for name in self.names:
+            values = self.parameters[name]
+            position = values.index(config[name])
+            if name in self.categorical:
+                vector.extend(1.0 if i == position else 0.0 for i in range(len(values)))
+            else:
+                vector.append(position / (len(values) - 1) if len(values) > 1 else 0.0)
+        return vector
+
+    def dimensions(self):
+        """Longitud de los vectores de encode"""
+        return sum(len(self.parameters[name]) if name in self.categorical else 1
+                   for name in self.names)
@@ -0,0 +1,34 @@
+"""
+Espacio de diseño por fases del DSE de JPEG2000 (scriptv2.py).
+
+Separado del driver para que los scripts de análisis (stack_distance.py,
+l2_replay.py, interval_model.py) usen las mismas grillas sin importar
+scriptv2.py.
+"""
+
+# DSE optimizado para JPEG2000 - Implementación por fases
+# Fase 1: Cache Hierarchy (más crítico para JPEG2000)
+L1D_SIZES_PHASE1 = ["32kB", "64kB", "128kB", "256kB"]
+L1D_ASSOCS_PHASE1 = [4, 8, 16]
+L2_SIZES_PHASE1 = ["256kB", "512kB", "1MB", "2MB"]  
+L2_ASSOCS_PHASE1 = [8, 16, 24]
+
+# Parámetros fijos para Fase 1
+L1I_SIZE_FIXED = "64kB"
+L1I_ASSOC_FIXED = 4
+ROB_ENTRIES_FIXED = 128
+ISSUE_WIDTH_FIXED = 4
+DECODE_WIDTH_FIXED = 4
+NUM_FU_INTALU_FIXED = 3
+NUM_FU_FPSIMD_FIXED = 2
+
+# Fase 2: Functional Units (después de cache optimization)
+NUM_FU_INTALU_PHASE2 = [2, 3, 4, 6]
+NUM_FU_FPSIMD_PHASE2 = [1, 2, 3, 4]
+NUM_FU_READ_PHASE2 = [2, 3, 4]
+NUM_FU_WRITE_PHASE2 = [1, 2, 3]
+
+# Fase 3: Pipeline Parameters
+ROB_ENTRIES_PHASE3 = [64, 128, 192]
+ISSUE_WIDTH_PHASE3 = [2, 4, 6]
+DECODE_WIDTH_PHASE3 = [2, 4, 6]
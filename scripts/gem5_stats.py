@@ -0,0 +1,83 @@
+"""
+Parser de stats.txt de gem5 en una sola pasada.
+
+Lee el archivo línea a línea (sin cargarlo completo) y entrega un mapa
+nombre -> valor del bloque Begin/End Simulation Statistics pedido. Los
+extractores piden solo las claves o prefijos que necesitan y la lectura
+termina en cuanto están todas.
+"""
+
+BEGIN_MARKER = "Begin Simulation Statistics"
+END_MARKER = "End Simulation Statistics"
+
+
+def _to_number(token):
+    """Convierte el valor de una estadística a int o float"""
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def parse_stats(stats_file, keys=None, prefixes=None, dump=0):
+    """
+    Parsea stats.txt en una sola pasada.
+
+    keys: nombres exactos a extraer (None = todos)
+    prefixes: además, todas las estadísticas que empiecen por alguno de estos prefijos
+    dump: bloque de estadísticas a leer (0 = primero, -1 = último, None = todos,
+          donde el valor del último bloque que trae cada estadística gana)
+
+    Retorna {nombre: valor}; las claves que no aparecen simplemente no están.
+    """
+    wanted = set(keys) if keys is not None else None
+    prefixes = tuple(prefixes) if prefixes else ()
+    select_all = wanted is None and not prefixes
+    # Sin prefijos, se puede cortar la lectura al encontrar todas las claves
+    # (salvo que un bloque posterior pueda reemplazarlas)
+    early_exit = wanted is not None and not prefixes and dump is not None and dump >= 0
+
+    stats = {}
+    block = -1
+    in_block = False
+
+    with open(stats_file, "r") as f:
+        for line in f:
+            if BEGIN_MARKER in line:
+                block += 1
+                in_block = True
+                if dump == -1:
+                    stats = {}
+                continue
+            if END_MARKER in line:
+                in_block = False
+                if block == dump:
+                    break
+                continue
+            if not in_block or (dump not in (None, -1) and block != dump):
+                continue
+
+            parts = line.split(None, 2)
+            if len(parts) < 2 or parts[0].startswith("#"):
+                continue
+
+            name = parts[0]
+            if not (select_all
+                    or (wanted is not None and name in wanted)
+                    or (prefixes and name.startswith(prefixes))):
+                continue
+
+            try:
+                stats[name] = _to_number(parts[1])
+            except ValueError:
+                continue
+
+            if early_exit and len(stats) == len(wanted):
+                break
+
+    return stats
+
+
+def get_stat(stats_file, key, default=None):
+    """Lee una sola estadística"""
+    return parse_stats(stats_file, keys=[key]).get(key, default)
@@ -3,6 +3,15 @@ import subprocess
 import json
 import time
 import csv
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from gem5_stats import get_stat
+from checkpoints import take_checkpoint, restore_args, restore_key_params, normalize_switched_stats
+from multimedia_profiling_simulation import prepare_sandbox
+from sim_cache import (SimulationCache, simulation_key, mcpat_artifact, mcpat_key,
+                       STATS_ARTIFACT, CONFIG_ARTIFACT, MCPAT_ARTIFACT, MCPAT_CACHE_DIR)
 
 # --- Rutas principales ---
 GEM5 = "./build/ARM/gem5.fast"
@@ -11,18 +20,58 @@ GEM5_TO_MCPAT = "McPAT/gem5toMcPAT_cortexA76.py"
 MCPAT_EXEC = "./mcpat/mcpat"
 MCPAT_TEMPLATE = "McPAT/ARM_A76_2.1GHz.xml"
 OUTPUT_DIR = "greedy_results"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# --- Workload ---
+BINARY = "workloads/jpeg2k_dec/jpg2k_dec"
+OPTS = "\"-i workloads/jpeg2k_dec/jpg2kdec_testfile.j2k -o image.pgm\""
+
+# --- Caché compartida de simulaciones y caché de McPAT indexada por XML ---
+# las abre open_caches() desde main() o init_worker() (importar no crea directorios)
+cache = None
+mcpat_cache = None
+
+# --- Opciones de línea de comandos ---
+parser = argparse.ArgumentParser(description="Búsqueda greedy sobre el Cortex-A76")
+parser.add_argument("--mode", default="greedy", choices=["greedy", "bo", "nsga2"],
+                    help="greedy: descenso por coordenadas; bo: optimización bayesiana por lotes; "
+                         "nsga2: frente de Pareto sobre CPI, energía y área")
+parser.add_argument("--jobs", type=int, default=1,
+                    help="Evaluaciones gem5 + McPAT concurrentes")
+parser.add_argument("--speculate", type=int, default=0,
+                    help="Parámetros siguientes a evaluar especulativamente en modo greedy (con --jobs > 1)")
+parser.add_argument("--batch", type=int, default=None,
+                    help="Configuraciones propuestas por ronda en modo bo (por defecto max(jobs, 4))")
+parser.add_argument("--budget", type=int, default=30,
+                    help="Número máximo de simulaciones en modo bo")
+parser.add_argument("--initial", type=int, default=8,
+                    help="Simulaciones aleatorias iniciales en modo bo (incluye la configuración base)")
+parser.add_argument("--target-edp", type=float, default=None,
+                    help="Detener el modo bo al alcanzar este EDP (p.ej. el resultado greedy)")
+parser.add_argument("--population", type=int, default=12,
+                    help="Tamaño de población en modo nsga2")
+parser.add_argument("--generations", type=int, default=6,
+                    help="Generaciones en modo nsga2")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--fast-forward", type=int, default=0,
+                    help="Instrucciones a saltar con un checkpoint compartido (0 = desactivado)")
+parser.add_argument("--warmup", type=int, default=0,
+                    help="Instrucciones de warm-up tras restaurar el checkpoint")
+
+# Opciones y checkpoint de fast-forward compartido por todas las configuraciones;
+# los asigna main() en el proceso principal e init_worker() en cada worker
+args = None
+ckpt_dir = None
 
 # --- Archivo CSV para el historial ---
 history_path = os.path.join(OUTPUT_DIR, "history.csv")
-if not os.path.exists(history_path):
-    with open(history_path, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Iteración", "Parámetro", "Valor probado",
-            "EDP", "Energía", "CPI", "Leakage", "RuntimeDynamic",
-            "¿Mejor configuración?", "Configuración completa"
-        ])
+
+# --- Frente de Pareto (modo nsga2) ---
+pareto_path = os.path.join(OUTPUT_DIR, "pareto_front.csv")
+PARETO_OBJECTIVES = ["cpi", "energy", "area"]
+PARETO_COLUMNS = {
+    "CPI": "cpi", "Energía": "energy", "Área": "area",
+    "EDP": "edp", "Leakage": "leakage", "RuntimeDynamic": "runtime"
+}
 
 # --- Configuración inicial ---
 base_config = {
@@ -43,110 +92,405 @@ parameter_space = {
     "commit_width": [2, 4, 6],
     "branch_predictor_type": [7, 10]
 }
+# Parámetros sin orden entre sus valores
+categorical_parameters = ["branch_predictor_type"]
 
 # --- Función para correr simulación + análisis ---
 def run_simulation(config, param_changed):
     name = "_".join([f"{k}{v}" for k, v in config.items()])
-    outdir = os.path.join(OUTPUT_DIR, f"{param_changed}_{name}")
+    tag = f"{param_changed}_{name}"
+    outdir = os.path.abspath(os.path.join(OUTPUT_DIR, tag))
     os.makedirs(outdir, exist_ok=True)
 
-    # Ejecutar gem5
-    cmd = [
-        GEM5,
-        f"--outdir={outdir}",
-        CONFIG_SCRIPT,
-        "-c", "workloads/jpeg2k_dec/jpg2k_dec",
-        "-o", "\"-i workloads/jpeg2k_dec/jpg2kdec_testfile.j2k -o image.pgm\"",
-        f"--l1i_size={config['l1i_size']}",
-        f"--l1d_size={config['l1d_size']}",
-        f"--l2_size={config['l2_size']}",
-        f"--fetch_width={config['fetch_width']}",
-        f"--commit_width={config['commit_width']}",
-        f"--branch_predictor_type={config['branch_predictor_type']}"
-    ]
-    subprocess.run(" ".join(cmd), shell=True, check=True)
-
     stats = os.path.join(outdir, "stats.txt")
     cfg = os.path.join(outdir, "config.json")
     xml = os.path.join(outdir, "config.xml")
+    power_report = os.path.join(outdir, "power_report.txt")
+
+    key_params = {**config, **restore_key_params(args.fast_forward, args.warmup)} if ckpt_dir else config
+    key = simulation_key(GEM5, CONFIG_SCRIPT, BINARY, OPTS, key_params)
+
+    # Ejecutar gem5 (salvo que la simulación ya esté en caché)
+    if not cache.fetch(key, {STATS_ARTIFACT: stats, CONFIG_ARTIFACT: cfg}):
+        # Cada corrida en su sandbox: el workload escribe image.pgm en su cwd
+        sandbox = prepare_sandbox(tag)
+        cmd = [
+            os.path.abspath(GEM5),
+            f"--outdir={outdir}",
+            os.path.abspath(CONFIG_SCRIPT),
+            "-c", os.path.abspath(BINARY),
+            "-o", OPTS,
+            f"--l1i_size={config['l1i_size']}",
+            f"--l1d_size={config['l1d_size']}",
+            f"--l2_size={config['l2_size']}",
+            f"--fetch_width={config['fetch_width']}",
+            f"--commit_width={config['commit_width']}",
+            f"--branch_predictor_type={config['branch_predictor_type']}"
+        ]
+        if ckpt_dir:
+            cmd.extend(restore_args(ckpt_dir, args.fast_forward, args.warmup))
+        subprocess.run(" ".join(cmd), shell=True, check=True, cwd=sandbox)
+        # Con warm-up el core medido es system.switch_cpus_1
+        if ckpt_dir and args.warmup:
+            normalize_switched_stats(stats)
+        cache.store(key, {STATS_ARTIFACT: stats, CONFIG_ARTIFACT: cfg})
 
-    # Convertir a XML para McPAT
-    subprocess.run(["python3", GEM5_TO_MCPAT, stats, cfg, MCPAT_TEMPLATE], check=True)
-    if not os.path.exists(xml) and os.path.exists("config.xml"):
-        os.rename("config.xml", xml)
+    artifact = mcpat_artifact(MCPAT_TEMPLATE, GEM5_TO_MCPAT, MCPAT_EXEC)
+    if cache.fetch(key, {artifact: power_report}):
+        with open(power_report) as f:
+            output = f.read()
+    else:
+        # Convertir a XML para McPAT (el conversor escribe config.xml en su cwd:
+        # se corre dentro de outdir para que evaluaciones paralelas no choquen)
+        subprocess.run(["python3", os.path.abspath(GEM5_TO_MCPAT), os.path.abspath(stats),
+                        os.path.abspath(cfg), os.path.abspath(MCPAT_TEMPLATE)],
+                       check=True, cwd=outdir)
 
-    # Ejecutar McPAT
-    mcpat_out = subprocess.run([MCPAT_EXEC, "-infile", xml, "-print_level", "1"], capture_output=True, text=True)
-    output = mcpat_out.stdout
-    with open(os.path.join(outdir, "power_report.txt"), "w") as f:
-        f.write(output)
+        # Ejecutar McPAT (salvo que un XML equivalente ya se haya procesado)
+        xml_key = mcpat_key(xml, MCPAT_EXEC)
+        if mcpat_cache.fetch(xml_key, {MCPAT_ARTIFACT: power_report}):
+            with open(power_report) as f:
+                output = f.read()
+        else:
+            mcpat_out = subprocess.run([MCPAT_EXEC, "-infile", xml, "-print_level", "1"], capture_output=True, text=True)
+            output = mcpat_out.stdout
+            with open(power_report, "w") as f:
+                f.write(output)
+            if mcpat_out.returncode == 0:
+                mcpat_cache.store(xml_key, {MCPAT_ARTIFACT: power_report})
+        if "Processor:" in output:
+            cache.store(key, {artifact: power_report})
 
     # Extraer datos
-    leakage = runtime = cpi = None
+    leakage = runtime = cpi = area = None
     for line in output.splitlines():
+        # La primera área del reporte es la del procesador completo
+        if "Area =" in line and area is None:
+            area = float(line.split("=")[1].split()[0])
         if "Total Leakage" in line:
             leakage = float(line.split("=")[1].split()[0])
         if "Runtime Dynamic" in line:
             runtime = float(line.split("=")[1].split()[0])
-    with open(stats) as f:
-        for l in f:
-            if "system.cpu.cpi" in l:
-                cpi = float(l.split()[1])
-                break
+    cpi = get_stat(stats, "system.cpu.cpi")
 
     if leakage and runtime and cpi:
         energy = (leakage + runtime) * cpi
         edp = energy * cpi
-        return {"edp": edp, "energy": energy, "leakage": leakage, "runtime": runtime, "cpi": cpi}
+        return {"edp": edp, "energy": energy, "leakage": leakage, "runtime": runtime, "cpi": cpi,
+                "area": area}
     return None
 
 
+def log_history(iteration, param, value, result, is_best, config):
+    """Agrega un intento a history.csv"""
+    with open(history_path, "a", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            iteration,
+            param, value,
+            result["edp"] if result else "NaN",
+            result["energy"] if result else "NaN",
+            result["cpi"] if result else "NaN",
+            result["leakage"] if result else "NaN",
+            result["runtime"] if result else "NaN",
+            "YES" if is_best else "NO",
+            json.dumps(config)
+        ])
+
+
+def open_caches():
+    """Abre la caché de simulaciones y la de McPAT del proceso"""
+    global cache, mcpat_cache
+    cache = SimulationCache()
+    mcpat_cache = SimulationCache(MCPAT_CACHE_DIR)
+
+
+def init_worker(options, checkpoint):
+    """Inicializa un worker del pool (con spawn/forkserver no hereda el estado de main)"""
+    global args, ckpt_dir
+    args, ckpt_dir = options, checkpoint
+    open_caches()
+
+
+def make_pool():
+    """Pool de evaluaciones concurrentes (None con --jobs 1)"""
+    if args.jobs <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker,
+                               initargs=(args, ckpt_dir))
+
+
+def evaluate(config, param_changed):
+    """run_simulation en un worker: retorna también los contadores de las cachés"""
+    before = (cache.hits, cache.misses, mcpat_cache.hits, mcpat_cache.misses)
+    try:
+        result = run_simulation(config, param_changed)
+    except subprocess.CalledProcessError as e:
+        print(f"  Error evaluando {config}: {e}")
+        result = None
+    after = (cache.hits, cache.misses, mcpat_cache.hits, mcpat_cache.misses)
+    return result, [a - b for a, b in zip(after, before)]
+
+
+def evaluate_batch(configs, param_changed, pool=None):
+    """Evalúa un lote de configuraciones (en el pool si hay uno)"""
+    if not pool:
+        return [evaluate(config, param_changed)[0] for config in configs]
+
+    results = []
+    for result, counters in pool.map(evaluate, configs, [param_changed] * len(configs)):
+        merge_counters(counters)
+        results.append(result)
+    return results
+
+
+def merge_counters(counters):
+    """Suma los contadores de caché devueltos por un worker"""
+    cache.hits += counters[0]
+    cache.misses += counters[1]
+    mcpat_cache.hits += counters[2]
+    mcpat_cache.misses += counters[3]
+
+
+# --- Memo de configuraciones evaluadas por el greedy ---
+# clave de configuración -> resultado (None si falló)
+evaluated = {}
+# clave de configuración -> futuro en el pool de workers
+in_progress = {}
+
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+def submit(config, param_changed, pool):
+    """Lanza en el pool una configuración no evaluada ni en curso"""
+    key = config_key(config)
+    if pool and key not in evaluated and key not in in_progress:
+        in_progress[key] = pool.submit(evaluate, config, param_changed)
+
+
+def lookup(config, param_changed):
+    """Resultado de una configuración: memo, futuro en curso o evaluación directa"""
+    key = config_key(config)
+    if key in evaluated:
+        print("  (configuración ya evaluada)")
+    else:
+        if key in in_progress:
+            result, counters = in_progress.pop(key).result()
+            merge_counters(counters)
+        else:
+            result = evaluate(config, param_changed)[0]
+        evaluated[key] = result
+    return evaluated[key]
+
+
 # --- Algoritmo Greedy con registro histórico ---
-current_config = base_config.copy()
-best_result = run_simulation(current_config, "base")
-iteration = 1
-
-print(f"Configuración inicial EDP={best_result['edp']:.6f}\n")
-
-improvement = True
-while improvement:
-    improvement = False
-    for param, values in parameter_space.items():
-        best_local = best_result
-        for val in values:
-            if val == current_config[param]:
-                continue
-
-            test_config = current_config.copy()
-            test_config[param] = val
-            print(f"[Iter {iteration}] Probando {param}={val}...")
-            result = run_simulation(test_config, param)
-
-            # Guardar en CSV cada intento
-            with open(history_path, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    iteration,
-                    param, val,
-                    result["edp"] if result else "NaN",
-                    result["energy"] if result else "NaN",
-                    result["cpi"] if result else "NaN",
-                    result["leakage"] if result else "NaN",
-                    result["runtime"] if result else "NaN",
-                    "YES" if result and result["edp"] < best_local["edp"] else "NO",
-                    json.dumps(test_config)
-                ])
-
-            if result and result["edp"] < best_local["edp"]:
-                print(f"  → Mejora: {best_local['edp']:.6f} → {result['edp']:.6f}")
-                best_local = result
-                current_config[param] = val
-                improvement = True
-            iteration += 1
-
-        best_result = best_local
-
-print("\nFinalizado Greedy Optimization.")
-print(f"Mejor configuración encontrada:\n{json.dumps(current_config, indent=2)}")
-print(f"EDP final: {best_result['edp']:.6f}")
-print(f"Historial completo guardado en: {history_path}")
+def greedy_search():
+    current_config = base_config.copy()
+    best_result = lookup(current_config, "base")
+    iteration = 1
+    if best_result is None:
+        print("La configuración base no produjo resultados: no hay referencia para el greedy.")
+        return current_config, None
+
+    print(f"Configuración inicial EDP={best_result['edp']:.6f}\n")
+
+    # Con varios workers se lanzan juntos todos los valores de un parámetro
+    # (y, con --speculate, los de los siguientes); la aceptación sigue
+    # siendo secuencial en el orden original, así history.csv no cambia
+    pool = make_pool()
+    parameters = list(parameter_space.items())
+
+    try:
+        improvement = True
+        while improvement:
+            improvement = False
+            for index, (param, values) in enumerate(parameters):
+                for ahead, ahead_values in parameters[index:index + 1 + args.speculate]:
+                    for val in ahead_values:
+                        if val != current_config[ahead]:
+                            submit({**current_config, ahead: val}, ahead, pool)
+
+                best_local = best_result
+                for val in values:
+                    if val == current_config[param]:
+                        continue
+
+                    test_config = current_config.copy()
+                    test_config[param] = val
+                    print(f"[Iter {iteration}] Probando {param}={val}...")
+                    result = lookup(test_config, param)
+
+                    # Guardar en CSV cada intento
+                    log_history(iteration, param, val, result,
+                                result and result["edp"] < best_local["edp"], test_config)
+
+                    if result and result["edp"] < best_local["edp"]:
+                        print(f"  → Mejora: {best_local['edp']:.6f} → {result['edp']:.6f}")
+                        best_local = result
+                        current_config[param] = val
+                        improvement = True
+                    iteration += 1
+
+                best_result = best_local
+    finally:
+        if pool:
+            # Evaluaciones especulativas que ya no se necesitan
+            for future in in_progress.values():
+                future.cancel()
+            in_progress.clear()
+            pool.shutdown(cancel_futures=True)
+
+    print("\nFinalizado Greedy Optimization.")
+    print(f"Configuraciones distintas evaluadas: {len(evaluated)}")
+    return current_config, best_result
+
+
+# --- Optimización bayesiana por lotes ---
+def bayes_search():
+    from design_space import DesignSpace
+    from bayes_opt import BayesianOptimizer
+
+    space = DesignSpace(parameter_space, categorical=categorical_parameters)
+    optimizer = BayesianOptimizer(space, n_initial=args.initial, seed=args.seed)
+    batch_size = args.batch or max(args.jobs, 4)
+    print(f"Optimización bayesiana: {space.size()} configuraciones, "
+          f"presupuesto {args.budget}, lotes de {batch_size}\n")
+
+    best_config, best_result = None, None
+    iteration = 1
+    round_num = 0
+    pool = make_pool()
+
+    try:
+        while iteration <= args.budget:
+            q = min(batch_size, args.budget - iteration + 1)
+            if round_num == 0:
+                # La configuración base forma parte del diseño inicial
+                batch = [base_config.copy()] + [c for c in optimizer.suggest(q) if c != base_config][:q - 1]
+            else:
+                batch = optimizer.suggest(q)
+            if not batch:
+                print("Espacio de diseño agotado.")
+                break
+
+            label = "bo_init" if round_num == 0 else f"bo_round{round_num}"
+            print(f"[Ronda {round_num}] Evaluando {len(batch)} configuraciones...")
+            results = evaluate_batch(batch, label, pool)
+
+            for config, result in zip(batch, results):
+                optimizer.observe(config, result["edp"] if result else None)
+                is_best = bool(result) and (best_result is None or result["edp"] < best_result["edp"])
+                changed = {k: v for k, v in config.items() if v != base_config[k]}
+                log_history(iteration, label, json.dumps(changed), result, is_best, config)
+
+                if is_best:
+                    previous = f"{best_result['edp']:.6f}" if best_result else "-"
+                    print(f"  → Mejora: {previous} → {result['edp']:.6f} con {changed}")
+                    best_config, best_result = config, result
+                iteration += 1
+
+            round_num += 1
+            if args.target_edp and best_result and best_result["edp"] <= args.target_edp:
+                print(f"EDP objetivo alcanzado tras {iteration - 1} simulaciones.")
+                break
+    finally:
+        if pool:
+            pool.shutdown()
+
+    print(f"\nFinalizada optimización bayesiana ({iteration - 1} simulaciones).")
+    return best_config, best_result
+
+
+# --- Búsqueda multiobjetivo (NSGA-II) ---
+def nsga2_search():
+    from design_space import DesignSpace
+    from nsga2 import NSGA2
+
+    space = DesignSpace(parameter_space, categorical=categorical_parameters)
+    search = NSGA2(space, PARETO_OBJECTIVES, population=args.population, seed=args.seed)
+    print(f"NSGA-II: {space.size()} configuraciones, población {args.population}, "
+          f"{args.generations} generaciones, objetivos {PARETO_OBJECTIVES}\n")
+
+    iteration = 1
+    pool = make_pool()
+    try:
+        for generation in range(args.generations):
+            if generation == 0:
+                configs = search.initial_population(seeds=[base_config])
+            else:
+                configs = search.offspring()
+            if not configs:
+                print("Espacio de diseño agotado.")
+                break
+
+            label = f"nsga2_gen{generation}"
+            print(f"[Generación {generation}] Evaluando {len(configs)} configuraciones...")
+            results = evaluate_batch(configs, label, pool)
+            # Sin alguno de los objetivos (p.ej. área) la corrida no entra al frente,
+            # pero el historial guarda sus métricas
+            ranked = [r if r and all(r.get(k) is not None for k in PARETO_OBJECTIVES) else None
+                      for r in results]
+
+            front_before = len(search.archive.entries)
+            search.tell(configs, ranked)
+            for config, result in zip(configs, results):
+                in_front = bool(result) and any(c is config for c, _ in search.archive.entries)
+                changed = {k: v for k, v in config.items() if v != base_config[k]}
+                log_history(iteration, label, json.dumps(changed), result, in_front, config)
+                iteration += 1
+            print(f"  Frente: {front_before} → {len(search.archive.entries)} soluciones no dominadas")
+    finally:
+        if pool:
+            pool.shutdown()
+
+    search.archive.write_csv(pareto_path, columns=PARETO_COLUMNS)
+    print(f"\nFinalizado NSGA-II ({iteration - 1} simulaciones).")
+    print(f"Frente de Pareto ({len(search.archive.entries)} configuraciones) guardado en: {pareto_path}")
+
+    # Resumen compatible con los otros modos: la configuración de menor EDP del frente
+    if not search.archive.entries:
+        return None, None
+    return min(search.archive.entries, key=lambda e: e[1]["edp"])
+
+
+def main():
+    global args, ckpt_dir
+    args = parser.parse_args()
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    open_caches()
+
+    if args.fast_forward:
+        ckpt_dir = take_checkpoint(GEM5, CONFIG_SCRIPT, BINARY, OPTS, "jpeg2k_dec",
+                                   args.fast_forward, args.warmup)
+
+    if not os.path.exists(history_path):
+        with open(history_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                "Iteración", "Parámetro", "Valor probado",
+                "EDP", "Energía", "CPI", "Leakage", "RuntimeDynamic",
+                "¿Mejor configuración?", "Configuración completa"
+            ])
+
+    if args.mode == "bo":
+        current_config, best_result = bayes_search()
+    elif args.mode == "nsga2":
+        current_config, best_result = nsga2_search()
+    else:
+        current_config, best_result = greedy_search()
+
+    cache.report()
+    mcpat_cache.report("MCPAT CACHE")
+    if best_result is None:
+        print(f"Ninguna evaluación produjo un EDP válido (ver {history_path}).")
+        sys.exit(1)
+
+    print(f"Mejor configuración encontrada:\n{json.dumps(current_config, indent=2)}")
+    print(f"EDP final: {best_result['edp']:.6f}")
+    print(f"Historial completo guardado en: {history_path}")
+
+
+if __name__ == "__main__":
+    main()
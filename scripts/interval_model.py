@@ -0,0 +1,407 @@
+"""
+Modelo analítico de CPI por análisis de intervalos (nivel de fidelidad sin costo).
+
+El CPI se descompone en un término base (ancho de despacho y unidades
+funcionales según la mezcla de instrucciones) más intervalos de
+penalización: fallos de predicción de saltos (rellenar el front-end y
+resolver el salto en la ventana del ROB), fallos de L1I, fallos de L1D
+que aciertan en L2 y fallos de L2 a memoria (con paralelismo limitado
+por el ROB). Cada término se calibra con un coeficiente no negativo
+contra resultados reales de gem5; evaluar una configuración toma
+microsegundos, así que se pueden ordenar miles antes de lanzar gem5.
+
+Las tasas de fallo y el MPKI salen, en orden de preferencia, de las
+curvas de stack_distance.py / l2_replay.py / branch_trace.py para la
+configuración pedida, o del perfil del workload (profiling_results.csv).
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import time
+
+import numpy as np
+
+from multimedia_profiling_simulation import PROFILING_CONFIGS
+from rank_stats import spearman
+
+MODEL_FILE = "interval_model.json"
+PROFILE_FILES = ["report/profiling_results.csv", "profiling_multimedia_accurate.csv"]
+RESULT_FILES = ["report/dse_jpeg2k_phase1_results.csv", "dse_jpeg2k_phase1_results.csv",
+                "dse_jpeg2k_phase2_results.csv", "dse_jpeg2k_phase3_results.csv"]
+L1D_CURVES_FILE = "stack_distance_l1d.csv"
+L2_CURVES_FILE = "l2_replay.csv"
+BRANCH_FILE = "branch_predictors.csv"
+
+# Nombres de workload de scriptv2.py -> claves de WORKLOADS
+WORKLOAD_ALIASES = {"encoder": "jpeg2k_enc", "decoder": "jpeg2k_dec"}
+
+# Parámetros fijos de la Fase 1 de scriptv2.py (los que no trae la configuración)
+DEFAULT_PARAMS = {
+    "issue_width": 4,
+    "decode_width": 4,
+    "rob_entries": 128,
+    "num_fu_intalu": 3,
+    "num_fu_fpsimd": 2,
+    "num_fu_read": 2,
+    "num_fu_write": 1,
+}
+# Valores del perfil cuando no hay datos del workload
+DEFAULT_PROFILE = {
+    "int_frac": 0.6, "fp_frac": 0.0, "load_frac": 0.25, "store_frac": 0.1,
+    "l1d_miss_rate": 0.05, "l1i_miss_rate": 0.01, "l2_miss_rate": 0.3, "branch_mpki": 5.0,
+}
+
+# Latencias (ciclos) y geometría del Cortex-A76
+FRONTEND_DEPTH = 11
+L2_LATENCY = 12
+MEMORY_LATENCY = 200
+# Accesos a la L1I por instrucción (bloques de fetch de 16B)
+ICACHE_ACCESSES_PER_INST = 0.25
+# Fallos a memoria que se pueden solapar como máximo (MSHRs de la L1D)
+MAX_MLP = 8
+
+TERMS = ["dispatch", "branch", "icache", "l2_hit", "memory", "overhead"]
+# Peso de la regularización hacia el modelo analítico (cada workload pesa 1)
+PRIOR_WEIGHT = 0.1
+
+
+def number(value):
+    """float de una celda de CSV, o None si está vacía o no es numérica"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def workload_key(workload):
+    return WORKLOAD_ALIASES.get(workload, workload)
+
+
+def mix_fractions(row):
+    """
+    Fracciones de la mezcla de operaciones de una fila de profiling
+    (columnas de profiling_results.csv o committed_* de multimedia_profiling_simulation.py)
+    """
+    total = number(row.get("total_operations")) or number(row.get("total_committed_ops"))
+    if not total:
+        return {}
+
+    def count(name):
+        return number(row.get(name)) or number(row.get(f"committed_{name}")) or 0.0
+
+    fp = number(row.get("committed_FloatTotal")) or 0.0
+    fp += number(row.get("committed_SimdTotal")) or 0.0
+    for name, value in row.items():
+        if name and name.startswith(("Float", "Simd")) and not name.endswith("_pct") and "Mem" not in name:
+            fp += number(value) or 0.0
+    return {
+        "int_frac": (count("IntAlu") + count("IntMult") + count("IntDiv")) / total,
+        "fp_frac": fp / total,
+        "load_frac": count("MemRead") / total,
+        "store_frac": count("MemWrite") / total,
+    }
+
+
+def row_rates(row):
+    """Tasas de fallo presentes en una fila de resultados"""
+    rates = {}
+    for name in ("l1d_miss_rate", "l1i_miss_rate", "l2_miss_rate"):
+        value = number(row.get(name))
+        if value is not None:
+            rates[name] = value
+    return rates
+
+
+def read_rows(filename):
+    with open(filename, newline="") as f:
+        return [row for row in csv.DictReader(f) if any(row.values())]
+
+
+def load_profiles(files=PROFILE_FILES):
+    """Perfil promedio por workload (mezcla y tasas de fallo) desde los CSVs de profiling"""
+    sums = {}
+    for filename in files:
+        if not os.path.exists(filename):
+            continue
+        for row in read_rows(filename):
+            if not row.get("workload"):
+                continue
+            values = {**mix_fractions(row), **row_rates(row)}
+            acc = sums.setdefault(workload_key(row["workload"]), {})
+            for name, value in values.items():
+                total, n = acc.get(name, (0.0, 0))
+                acc[name] = (total + value, n + 1)
+    return {workload: {name: total / n for name, (total, n) in acc.items()} for workload, acc in sums.items()}
+
+
+def load_table(filename, key_columns, value_column):
+    """{(workload, columnas clave...): valor} de un CSV de curvas ({} si no existe)"""
+    if not os.path.exists(filename):
+        return {}
+    table = {}
+    for row in read_rows(filename):
+        value = number(row.get(value_column))
+        if value is not None:
+            table[(workload_key(row["workload"]),) + tuple(str(row[c]) for c in key_columns)] = value
+    return table
+
+
+class IntervalModel:
+    def __init__(self, coefficients=None, frontend_depth=FRONTEND_DEPTH, l2_latency=L2_LATENCY,
+                 memory_latency=MEMORY_LATENCY):
+        """coefficients: {término: peso}; sin calibrar, el modelo analítico puro (peso 1, sin overhead)"""
+        self.coefficients = coefficients or {term: 1.0 for term in TERMS if term != "overhead"}
+        self.frontend_depth = frontend_depth
+        self.l2_latency = l2_latency
+        self.memory_latency = memory_latency
+
+    def components(self, profile, params):
+        """Ciclos por instrucción de cada término (sin pesos)"""
+        p = {**DEFAULT_PARAMS, **params}
+        width = min(int(p["issue_width"]), int(p["decode_width"]))
+        rob = int(p["rob_entries"])
+
+        # Base: el ancho de despacho o la unidad funcional más cargada
+        dispatch = max(1.0 / width,
+                       profile["int_frac"] / int(p["num_fu_intalu"]),
+                       profile["fp_frac"] / int(p["num_fu_fpsimd"]),
+                       profile["load_frac"] / int(p["num_fu_read"]),
+                       profile["store_frac"] / int(p["num_fu_write"]))
+
+        # Salto mal predicho: rellenar el front-end más resolver el salto (media ventana)
+        branch = profile["branch_mpki"] / 1000 * (self.frontend_depth + rob / (2 * width))
+        icache = profile["l1i_miss_rate"] * ICACHE_ACCESSES_PER_INST * self.l2_latency
+
+        l1d_mpi = (profile["load_frac"] + profile["store_frac"]) * profile["l1d_miss_rate"]
+        l2_hit = l1d_mpi * (1 - profile["l2_miss_rate"]) * self.l2_latency
+        memory_mpi = l1d_mpi * profile["l2_miss_rate"]
+        # Fallos a memoria que caben en el ROB se solapan
+        mlp = min(MAX_MLP, max(1.0, rob * memory_mpi))
+        memory = memory_mpi * self.memory_latency / mlp
+
+        return {"dispatch": dispatch, "branch": branch, "icache": icache,
+                "l2_hit": l2_hit, "memory": memory, "overhead": 1.0}
+
+    def predict(self, profile, params):
+        """CPI estimado"""
+        terms = self.components(profile, params)
+        return sum(self.coefficients.get(term, 0.0) * value for term, value in terms.items())
+
+    def fit(self, samples, prior_weight=PRIOR_WEIGHT):
+        """
+        Calibra los pesos por mínimos cuadrados no negativos, con el mismo
+        peso total para cada workload (un barrido grande de un solo
+        workload no debe decidir los coeficientes). prior_weight acerca los
+        pesos a los del modelo sin calibrar: los términos que los datos no
+        alcanzan a identificar conservan su valor analítico.
+        samples: [(workload, perfil, parámetros, CPI medido)]
+        """
+        counts = {}
+        for workload, *_ in samples:
+            counts[workload] = counts.get(workload, 0) + 1
+        w = np.sqrt([1.0 / counts[workload] for workload, *_ in samples])
+        X = np.array([[self.components(profile, params)[t] for t in TERMS]
+                      for _, profile, params, _ in samples]) * w[:, None]
+        y = np.array([cpi for *_, cpi in samples]) * w
+        prior = np.array([1.0 if term != "overhead" else 0.0 for term in TERMS])
+        X = np.vstack([X, np.sqrt(prior_weight) * np.eye(len(TERMS))])
+        y = np.concatenate([y, np.sqrt(prior_weight) * prior])
+        active = list(range(len(TERMS)))
+        coef = np.zeros(len(TERMS))
+        # Se descartan los términos con peso negativo y se reajusta
+        while active:
+            solution, *_ = np.linalg.lstsq(X[:, active], y, rcond=None)
+            if (solution >= 0).all():
+                coef[active] = solution
+                break
+            active.pop(int(np.argmin(solution)))
+        self.coefficients = {term: float(c) for term, c in zip(TERMS, coef)}
+        return self.coefficients
+
+    def save(self, filename=MODEL_FILE):
+        with open(filename, "w") as f:
+            json.dump({"coefficients": self.coefficients, "frontend_depth": self.frontend_depth,
+                       "l2_latency": self.l2_latency, "memory_latency": self.memory_latency}, f, indent=2)
+
+    @classmethod
+    def load(cls, filename=MODEL_FILE):
+        """Modelo calibrado guardado, o el analítico puro si no existe"""
+        if not os.path.exists(filename):
+            return cls()
+        with open(filename) as f:
+            return cls(**json.load(f))
+
+
+class IntervalEvaluator:
+    def __init__(self, model=None, profiles=None, l1d_rates=None, l2_rates=None, branch_mpki=None):
+        """
+        profiles: {workload: perfil} (load_profiles)
+        l1d_rates: {(workload, l1d_size, l1d_assoc): tasa} de stack_distance.py
+        l2_rates: {(workload, l1d_size, l1d_assoc, l2_size, l2_assoc): tasa} de l2_replay.py
+        branch_mpki: {(workload, branch_predictor_type, btb_entries): MPKI} de branch_trace.py
+        """
+        self.model = model or IntervalModel()
+        self.profiles = profiles or {}
+        self.l1d_rates = l1d_rates or {}
+        self.l2_rates = l2_rates or {}
+        self.branch_mpki = branch_mpki or {}
+
+    @classmethod
+    def from_files(cls, model_file=MODEL_FILE):
+        """Evaluador con el modelo guardado y todas las tablas disponibles en el directorio actual"""
+        return cls(IntervalModel.load(model_file), load_profiles(),
+                   load_table(L1D_CURVES_FILE, ["l1d_size", "l1d_assoc"], "miss_rate"),
+                   load_table(L2_CURVES_FILE, ["l1d_size", "l1d_assoc", "l2_size", "l2_assoc"], "l2_miss_rate"),
+                   load_table(BRANCH_FILE, ["branch_predictor_type", "btb_entries"], "mpki"))
+
+    def profile(self, workload, params):
+        """Perfil del workload con las tasas de la configuración pedida cuando hay curvas"""
+        workload = workload_key(workload)
+        profile = {**DEFAULT_PROFILE, **self.profiles.get(workload, {})}
+        l1d = (str(params.get("l1d_size")), str(params.get("l1d_assoc")))
+        l2 = (str(params.get("l2_size")), str(params.get("l2_assoc")))
+        if (workload,) + l1d in self.l1d_rates:
+            profile["l1d_miss_rate"] = self.l1d_rates[(workload,) + l1d]
+        if (workload,) + l1d + l2 in self.l2_rates:
+            profile["l2_miss_rate"] = self.l2_rates[(workload,) + l1d + l2]
+        else:
+            # El flujo de otra L1D es mejor aproximación que el promedio del perfil
+            rates = [rate for key, rate in self.l2_rates.items() if key[0] == workload and key[3:] == l2]
+            if rates:
+                profile["l2_miss_rate"] = sum(rates) / len(rates)
+        branch = (workload, str(params.get("branch_predictor_type")), str(params.get("btb_entries")))
+        if branch in self.branch_mpki:
+            profile["branch_mpki"] = self.branch_mpki[branch]
+        else:
+            mpkis = [mpki for key, mpki in self.branch_mpki.items() if key[0] == workload]
+            if mpkis:
+                profile["branch_mpki"] = min(mpkis)
+        return profile
+
+    def evaluate(self, workload, params):
+        """{"cpi", términos...} de una configuración"""
+        profile = self.profile(workload, params)
+        terms = self.model.components(profile, params)
+        return {"cpi": self.model.predict(profile, params), **terms}
+
+    def rank(self, workload, configs, top=None):
+        """
+        [(CPI estimado, configuración)] de menor a mayor CPI. Con top solo se
+        retienen las top mejores y configs puede ser un generador del espacio
+        completo (no se materializa).
+        """
+        scored = ((self.evaluate(workload, config)["cpi"], config) for config in configs)
+        if top is not None:
+            return heapq.nsmallest(top, scored, key=lambda item: item[0])
+        return sorted(scored, key=lambda item: item[0])
+
+    def calibration_samples(self, profile_files=PROFILE_FILES, result_files=RESULT_FILES):
+        """
+        [(workload, perfil, parámetros, CPI)] de las corridas gem5 disponibles: las
+        de profiling (con sus propias tasas) y los CSVs de resultados de scriptv2.py
+        """
+        samples = []
+        for filename in profile_files:
+            if not os.path.exists(filename):
+                continue
+            for row in read_rows(filename):
+                cpi = number(row.get("cpi"))
+                params = PROFILING_CONFIGS.get(row.get("config"))
+                if cpi is None or params is None or not row.get("workload"):
+                    continue
+                profile = {**self.profile(row["workload"], params), **mix_fractions(row), **row_rates(row)}
+                samples.append((workload_key(row["workload"]), profile, params, cpi))
+        for filename in result_files:
+            if not os.path.exists(filename):
+                continue
+            for row in read_rows(filename):
+                cpi = number(row.get("cpi"))
+                if cpi is None or not row.get("workload"):
+                    continue
+                params = {k: v for k, v in row.items() if k in DEFAULT_PARAMS or k.startswith(("l1", "l2"))}
+                params = {k: v for k, v in params.items() if v not in (None, "") and not k.endswith("_rate")}
+                profile = {**self.profile(row["workload"], params), **row_rates(row)}
+                samples.append((workload_key(row["workload"]), profile, params, cpi))
+        return samples
+
+
+def rank_correlation(a, b):
+    """Correlación de Spearman con rangos promedio en empates (la del DSE)"""
+    return spearman([float(x) for x in a], [float(y) for y in b])
+
+
+def calibration_report(model, samples):
+    """Error porcentual medio y correlación de rangos del modelo sobre las muestras"""
+    measured = np.array([cpi for *_, cpi in samples])
+    predicted = np.array([model.predict(profile, params) for _, profile, params, _ in samples])
+    mape = float(np.mean(np.abs(predicted - measured) / measured)) * 100
+    return {"samples": len(samples), "mape": mape, "spearman": rank_correlation(predicted, measured)}
+
+
+def main():
+    import dse_phases
+    from design_space import DesignSpace, SAMPLERS
+
+    parser = argparse.ArgumentParser(description="Modelo analítico de CPI por intervalos")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Calibrar contra los resultados de gem5 disponibles y guardar el modelo")
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--rank", metavar="WORKLOAD",
+                        help="Ordenar el espacio de las fases 1-3 de scriptv2.py para un workload")
+    parser.add_argument("--samples", type=int, default=0,
+                        help="Configuraciones a ordenar (0 = todo el espacio)")
+    parser.add_argument("--sampler", default="lhs", choices=SAMPLERS)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", default="interval_ranking.csv")
+    args = parser.parse_args()
+
+    evaluator = IntervalEvaluator.from_files(args.model)
+
+    if args.calibrate:
+        samples = evaluator.calibration_samples()
+        if not samples:
+            print("[INTERVAL] No hay resultados de gem5 para calibrar")
+            return
+        before = calibration_report(evaluator.model, samples)
+        coefficients = evaluator.model.fit(samples)
+        after = calibration_report(evaluator.model, samples)
+        evaluator.model.save(args.model)
+        print(f"[INTERVAL] {after['samples']} muestras de calibración")
+        print(f"  Modelo previo: MAPE {before['mape']:.1f}%, Spearman {before['spearman']}")
+        print(f"  Calibrado:     MAPE {after['mape']:.1f}%, Spearman {after['spearman']}")
+        print("  Coeficientes: " + ", ".join(f"{t}={c:.3f}" for t, c in coefficients.items()))
+        print(f"[INTERVAL] Modelo guardado en {args.model}")
+
+    if args.rank:
+        space = DesignSpace({
+            "l1d_size": dse_phases.L1D_SIZES_PHASE1, "l1d_assoc": dse_phases.L1D_ASSOCS_PHASE1,
+            "l2_size": dse_phases.L2_SIZES_PHASE1, "l2_assoc": dse_phases.L2_ASSOCS_PHASE1,
+            "num_fu_intalu": dse_phases.NUM_FU_INTALU_PHASE2, "num_fu_fpsimd": dse_phases.NUM_FU_FPSIMD_PHASE2,
+            "num_fu_read": dse_phases.NUM_FU_READ_PHASE2, "num_fu_write": dse_phases.NUM_FU_WRITE_PHASE2,
+            "rob_entries": dse_phases.ROB_ENTRIES_PHASE3, "issue_width": dse_phases.ISSUE_WIDTH_PHASE3,
+            "decode_width": dse_phases.DECODE_WIDTH_PHASE3,
+        })
+        # El espacio completo (~560k configuraciones) se recorre sin armar la lista
+        configs = space.design(args.samples, args.sampler) if args.samples else space.configs()
+        total = len(configs) if args.samples else space.size()
+        start = time.time()
+        ranked = evaluator.rank(args.rank, configs, top=args.top)
+        elapsed = time.time() - start
+        print(f"\n[INTERVAL] {total} configuraciones en {elapsed:.2f} s "
+              f"({elapsed / max(total, 1) * 1e6:.1f} µs por configuración)")
+
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["rank"] + space.names + ["cpi_estimado"])
+            for rank, (cpi, config) in enumerate(ranked, 1):
+                writer.writerow([rank] + [config[name] for name in space.names] + [cpi])
+        for rank, (cpi, config) in enumerate(ranked[:min(args.top, 10)], 1):
+            print(f"  {rank:>2}. CPI {cpi:.3f}  {config}")
+        print(f"[INTERVAL] Mejores {args.top} guardadas en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
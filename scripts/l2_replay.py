@@ -0,0 +1,197 @@
+"""
+Exploración de la L2 repitiendo el flujo de fallos de unas L1 fijas.
+
+La traza de debug Cache que captura stack_distance.py tiene los accesos a
+la L1I y a la L1D intercalados en orden de tick. Se simulan una vez las
+L1 elegidas (L1D LRU write-back/write-allocate, L1I LRU de solo lectura)
+y se guarda, en ese mismo orden, lo que le llega a la L2 unificada: los
+fallos de ambas (demanda) y los writebacks de líneas sucias de la L1D.
+Ese flujo se repite por distancia de pila para todos los tamaños y
+asociatividades de L2 a la vez; los writebacks ocupan líneas pero no
+cuentan como accesos, igual que en overall_miss_rate de gem5. Las
+latencias dan una estimación de los ciclos de stall por la jerarquía,
+sin solapamiento entre fallos.
+"""
+
+import argparse
+import csv
+import gzip
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from gem5_stats import get_stat
+from multimedia_profiling_simulation import WORKLOADS
+from stack_distance import (ACCESS_MATCH, IGNORED_COMMANDS, LINE_SIZE, TRACE_DIR, WRITE_COMMANDS,
+                            cache_geometry, capture_outdir, capture_trace, debug_trace_path,
+                            miss_curves, report_truncated, trace_path)
+
+L1D_SIZE = "64kB"
+L1D_ASSOC = 4
+L1I_SIZE = "64kB"
+L1I_ASSOC = 4
+# Latencias en ciclos: acierto en L2 y acceso adicional a memoria en un fallo de L2
+L2_HIT_CYCLES = 12
+MEMORY_CYCLES = 200
+
+
+def stream_path(workload_key, l1d_size, l1d_assoc, l1i_size, l1i_assoc):
+    return os.path.join(TRACE_DIR, f"{workload_key}_l2stream_d{l1d_size}_{l1d_assoc}"
+                                   f"_i{l1i_size}_{l1i_assoc}.npz")
+
+
+def read_l1_trace(debug_file, line_size=LINE_SIZE):
+    """
+    Accesos a la L1I y a la L1D en orden desde la traza de debug de gem5.
+    Retorna (bloques, escrituras, instrucción).
+    """
+    opener = gzip.open if debug_file.endswith(".gz") else open
+    blocks = []
+    writes = []
+    inst = []
+    with opener(debug_file, "rt") as f:
+        for line in f:
+            match = ACCESS_MATCH.search(line)
+            if not match or match.group(2) in IGNORED_COMMANDS:
+                continue
+            source = match.group(1)
+            if not source.endswith(("icache", "dcache")):
+                continue
+            blocks.append(int(match.group(3), 16) // line_size)
+            writes.append(match.group(2) in WRITE_COMMANDS)
+            inst.append(source.endswith("icache"))
+    return (np.array(blocks, dtype=np.uint64), np.array(writes, dtype=bool),
+            np.array(inst, dtype=bool))
+
+
+def load_l1_trace(workload_key):
+    """Traza L1I + L1D del workload (se extrae una vez de la traza de debug)"""
+    path = trace_path(workload_key, "l1")
+    if not os.path.exists(path):
+        blocks, writes, inst = read_l1_trace(debug_trace_path(workload_key))
+        np.savez_compressed(path, blocks=blocks, writes=writes, inst=inst)
+    with np.load(path) as data:
+        return data["blocks"], data["writes"], data["inst"]
+
+
+def filter_l1(blocks, writes, inst, l1d, l1i, line_size=LINE_SIZE):
+    """
+    Flujo que sale de la L1D (LRU write-back/write-allocate) y la L1I (LRU,
+    sin escrituras) en el orden de la traza; l1d y l1i son (tamaño, asoc).
+    Retorna (bloques, demanda): demanda=False marca los writebacks.
+    """
+    caches = []
+    for size, assoc in (l1d, l1i):
+        assoc = int(assoc)
+        num_sets = cache_geometry(size, assoc, line_size)
+        caches.append((assoc, [OrderedDict() for _ in range(num_sets)]))  # bloque -> sucio
+    out_blocks = []
+    demand = []
+    for block, write, is_inst in zip(blocks.tolist(), writes.tolist(), inst.tolist()):
+        assoc, sets = caches[is_inst]
+        lines = sets[block % len(sets)]
+        if block in lines:
+            lines.move_to_end(block)
+            lines[block] = lines[block] or write
+            continue
+        out_blocks.append(block)
+        demand.append(True)
+        if len(lines) == assoc:
+            victim, dirty = lines.popitem(last=False)
+            if dirty:
+                out_blocks.append(victim)
+                demand.append(False)
+        lines[block] = write
+    return np.array(out_blocks, dtype=np.uint64), np.array(demand, dtype=bool)
+
+
+def build_stream(workload_key, l1d_size=L1D_SIZE, l1d_assoc=L1D_ASSOC,
+                 l1i_size=L1I_SIZE, l1i_assoc=L1I_ASSOC):
+    """Genera y guarda el flujo hacia la L2 de un workload; retorna su ruta"""
+    blocks, writes, inst = load_l1_trace(workload_key)
+    stream, demand = filter_l1(blocks, writes, inst, (l1d_size, l1d_assoc), (l1i_size, l1i_assoc))
+    output = stream_path(workload_key, l1d_size, l1d_assoc, l1i_size, l1i_assoc)
+    np.savez_compressed(output, blocks=stream, demand=demand)
+    print(f"[L2] {workload_key}: {int((~inst).sum())} accesos L1D + {int(inst.sum())} L1I -> "
+          f"{int(demand.sum())} fallos y {int((~demand).sum())} writebacks")
+    return output
+
+
+def stall_estimate(curve, insts=None, l2_hit_cycles=L2_HIT_CYCLES, memory_cycles=MEMORY_CYCLES):
+    """Ciclos de stall por fallos de L1 (y CPI equivalente si se conocen las instrucciones)"""
+    cycles = curve["accesses"] * l2_hit_cycles + curve["misses"] * memory_cycles
+    return cycles, (cycles / insts if insts else None)
+
+
+def captured_insts(workload_key):
+    """Instrucciones de la corrida trazada (para normalizar los stalls)"""
+    stats_file = os.path.join(capture_outdir(workload_key), "stats.txt")
+    return get_stat(stats_file, "simInsts") if os.path.exists(stats_file) else None
+
+
+def main():
+    """Flujo de fallos de las L1 fijas repetido por toda la grilla de L2 de la Fase 1"""
+    from dse_phases import L2_SIZES_PHASE1, L2_ASSOCS_PHASE1
+
+    parser = argparse.ArgumentParser(description="Barrido de L2 por repetición del flujo de fallos de L1I + L1D")
+    parser.add_argument("--workloads", nargs="+", default=["jpeg2k_enc", "jpeg2k_dec"],
+                        choices=list(WORKLOADS))
+    parser.add_argument("--l1d-size", default=L1D_SIZE)
+    parser.add_argument("--l1d-assoc", type=int, default=L1D_ASSOC)
+    parser.add_argument("--l1i-size", default=L1I_SIZE)
+    parser.add_argument("--l1i-assoc", type=int, default=L1I_ASSOC)
+    # Los tamaños de la Fase 1 cubren también l2_size de greedy_usme.py
+    parser.add_argument("--sizes", nargs="+", default=L2_SIZES_PHASE1)
+    parser.add_argument("--assocs", type=int, nargs="+", default=L2_ASSOCS_PHASE1)
+    parser.add_argument("--l2-latency", type=int, default=L2_HIT_CYCLES)
+    parser.add_argument("--memory-latency", type=int, default=MEMORY_CYCLES)
+    parser.add_argument("--max-insts", type=int, default=0,
+                        help="Instrucciones a capturar por workload si falta la traza (0 = programa completo)")
+    parser.add_argument("--jobs", type=int, default=1, help="Capturas y pasadas concurrentes")
+    parser.add_argument("--output", default="l2_replay.csv")
+    args = parser.parse_args()
+
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    workers = max(1, min(args.jobs, len(args.workloads)))
+    l1 = (args.l1d_size, args.l1d_assoc, args.l1i_size, args.l1i_assoc)
+    missing = [w for w in args.workloads if not os.path.exists(debug_trace_path(w))
+               and not os.path.exists(trace_path(w, "l1"))]
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(capture_trace, missing, [args.max_insts] * len(missing)))
+
+    captured = [w for w in args.workloads
+                if os.path.exists(debug_trace_path(w)) or os.path.exists(trace_path(w, "l1"))]
+    pending = [w for w in captured if not os.path.exists(stream_path(w, *l1))]
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(build_stream, pending, *([value] * len(pending) for value in l1)))
+
+    with open(args.output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["workload", "l1d_size", "l1d_assoc", "l1i_size", "l1i_assoc", "l2_size",
+                         "l2_assoc", "num_sets", "modeled_bytes", "l2_accesses", "l2_misses", "l2_miss_rate", "stall_cycles", "stall_cpi"])
+        for workload_key in captured:
+            curves = miss_curves(stream_path(workload_key, *l1),
+                                 args.sizes, args.assocs, jobs=args.jobs)
+            insts = captured_insts(workload_key)
+            print(f"\n{workload_key}: L1D {args.l1d_size}/{args.l1d_assoc}-way, "
+                  f"L1I {args.l1i_size}/{args.l1i_assoc}-way")
+            for c in curves:
+                cycles, cpi = stall_estimate(c, insts, args.l2_latency, args.memory_latency)
+                writer.writerow([workload_key, *l1, c["size"], c["assoc"],
+                                 c["num_sets"], c["modeled_bytes"], c["accesses"], c["misses"],
+                                 c["miss_rate"], cycles, cpi])
+                rate = f"{c['miss_rate']:.4%}" if c["miss_rate"] is not None else "-"
+                stall = f", stall CPI {cpi:.4f}" if cpi is not None else ""
+                print(f"  L2 {c['size']:>6} {c['assoc']:>2}-way: miss rate {rate}, "
+                      f"{cycles} ciclos de stall{stall}")
+            report_truncated(curves)
+
+    print(f"\nResultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
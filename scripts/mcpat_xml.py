@@ -0,0 +1,168 @@
+"""
+Conversor gem5 -> McPAT en modo librería.
+
+Implementa la sustitución de gem5toMcPAT: en el template de McPAT cada
+<param>/<stat> cuyo value contiene referencias config.<ruta> o
+stats.<nombre> se reemplaza por el valor evaluado. El template se parsea
+una sola vez por proceso y cada corrida llena una copia del árbol, sin
+lanzar un intérprete nuevo por configuración.
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from gem5_stats import parse_stats
+
+STATS_MATCH = re.compile(r'stats\.([a-zA-Z0-9_:\.]+)')
+CONFIG_MATCH = re.compile(r'config\.([a-zA-Z0-9_:\.]+)')
+
+# Templates ya parseados en este proceso: ruta -> McPATTemplate
+_templates = {}
+
+
+def read_stats(stats_file):
+    """
+    Lee las estadísticas de gem5 como {nombre: valor en texto}, con las
+    reglas de gem5toMcPAT: si hay varios dumps gana el último valor de cada
+    estadística, y los valores nan/inf se reemplazan por 0.
+    """
+    return {name: str(value) if math.isfinite(value) else "0"
+            for name, value in parse_stats(stats_file, dump=None).items()}
+
+
+def read_config(config_file):
+    with open(config_file, "r") as f:
+        return json.load(f)
+
+
+def get_conf_value(config, conf_path):
+    """Resuelve una ruta config.a.b.0.c dentro de config.json"""
+    current = config
+    for part in conf_path.split("."):
+        if isinstance(current, list):
+            # system.cpu puede ser un arreglo: índice explícito o primer elemento
+            current = current[int(part)] if part.isdigit() else current[0][part]
+        else:
+            current = current[part]
+    return current
+
+
+def _evaluate(expr):
+    """Evalúa la expresión aritmética resultante de la sustitución"""
+    return eval(expr, {"__builtins__": {}}, {})
+
+
+class McPATTemplate:
+    def __init__(self, template_xml):
+        """Parsea el template y ubica (una vez) los nodos a sustituir"""
+        self.template_xml = template_xml
+        self.tree = ET.parse(template_xml)
+
+        # (posición en root.iter(), tipo, expresión original)
+        self.substitutions = []
+        for index, node in enumerate(self.tree.getroot().iter()):
+            value = node.attrib.get("value", "")
+            if node.tag == "param" and "config" in value:
+                self.substitutions.append((index, "param", value))
+            elif node.tag == "stat" and "stats" in value:
+                self.substitutions.append((index, "stat", value))
+
+    def fill(self, stats, config):
+        """Retorna una copia del template llena con stats y config ya parseados"""
+        root = copy.deepcopy(self.tree.getroot())
+        nodes = list(root.iter())
+
+        for index, kind, value in self.substitutions:
+            node = nodes[index]
+            try:
+                if kind == "param":
+                    node.attrib["value"] = self._fill_param(value, config)
+                else:
+                    filled = self._fill_stat(value, stats)
+                    if filled is not None:
+                        node.attrib["value"] = filled
+            except (KeyError, IndexError, NameError, ValueError, SyntaxError, ZeroDivisionError,
+                    TypeError) as e:
+                print(f"[mcpat_xml] No se pudo evaluar {node.attrib.get('name')}={value}: {e}")
+
+        return ET.ElementTree(root)
+
+    def _fill_param(self, value, config):
+        for conf in CONFIG_MATCH.findall(value):
+            value = value.replace(f"config.{conf}", str(get_conf_value(config, conf)))
+        if "," in value:
+            return ",".join(str(_evaluate(expr)) for expr in value.split(","))
+        return str(_evaluate(value))
+
+    def _fill_stat(self, value, stats):
+        # Las rutas más largas primero para no reemplazar prefijos de otras
+        for stat in sorted(set(STATS_MATCH.findall(value)), key=len, reverse=True):
+            value = value.replace(f"stats.{stat}", stats.get(stat, "0"))
+        if "config" in value or "stats" in value:
+            return None
+        return str(_evaluate(value))
+
+    def convert(self, stats_file, config_file, xml_output):
+        """Convierte una corrida (archivos de gem5) al XML de McPAT"""
+        tree = self.fill(read_stats(stats_file), read_config(config_file))
+        tree.write(xml_output)
+        return xml_output
+
+
+def load_template(template_xml):
+    """Template parseado y reutilizado dentro del proceso"""
+    if template_xml not in _templates:
+        _templates[template_xml] = McPATTemplate(template_xml)
+    return _templates[template_xml]
+
+
+def convert(stats_file, config_file, template_xml, xml_output):
+    """Conversión de una corrida con el template cacheado del proceso"""
+    return load_template(template_xml).convert(stats_file, config_file, xml_output)
+
+
+def _convert_job(args):
+    stats_file, config_file, template_xml, xml_output = args
+    try:
+        return convert(stats_file, config_file, template_xml, xml_output)
+    except (OSError, ValueError, ET.ParseError) as e:
+        print(f"[mcpat_xml] Error convirtiendo {stats_file}: {e}")
+        return None
+
+
+def convert_batch(runs, template_xml, workers=None):
+    """
+    Convierte muchas corridas reutilizando el template parseado en cada worker.
+    runs: [(stats_file, config_file, xml_output)]
+    Retorna la lista de XML generados (None donde falló).
+    """
+    jobs = [(stats, config, template_xml, out) for stats, config, out in runs]
+    if workers == 1 or len(jobs) <= 1:
+        return [_convert_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_convert_job, jobs, chunksize=8))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gem5 -> McPAT en modo librería")
+    parser.add_argument("template", help="Template XML de McPAT")
+    parser.add_argument("runs", nargs="+",
+                        help="Directorios de salida de gem5 (con stats.txt y config.json)")
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    runs = [(os.path.join(d, "stats.txt"), os.path.join(d, "config.json"), os.path.join(d, "config.xml"))
+            for d in args.runs]
+    outputs = convert_batch(runs, args.template, args.jobs)
+    print(f"{sum(1 for o in outputs if o)}/{len(runs)} XML generados")
+
+
+if __name__ == "__main__":
+    main()
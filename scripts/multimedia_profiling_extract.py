@@ -1,9 +1,18 @@
 import os
 import csv
 import glob
-import re
 from collections import defaultdict
 
+from gem5_stats import parse_stats
+
+ISSUED_INST_PREFIX = 'system.cpu.statIssuedInstType_0::'
+MISS_RATE_STATS = {
+    'system.cpu.dcache.overallMissRate::total': 'l1d_miss_rate',
+    'system.cpu.icache.overallMissRate::total': 'l1i_miss_rate',
+    'system.l2cache.overallMissRate::total': 'l2_miss_rate',
+}
+STATS_KEYS = ['system.cpu.cpi', 'simSeconds', *MISS_RATE_STATS]
+
 class MultimediaProfilingAnalysis:
     def __init__(self):
         self.profiling_results = []
@@ -37,39 +46,28 @@ class MultimediaProfilingAnalysis:
         }
         
         try:
-            with open(stats_file, 'r') as f:
-                data = f.read()
+            # Single streaming pass over the stats file
+            stats = parse_stats(stats_file, keys=STATS_KEYS, prefixes=[ISSUED_INST_PREFIX])
             
             # Extract performance metrics
-            cpi_match = re.search(r'system\.cpu\.cpi\s+([\d.]+)', data)
-            if cpi_match:
-                metrics['cpi'] = float(cpi_match.group(1))
+            if 'system.cpu.cpi' in stats:
+                metrics['cpi'] = float(stats['system.cpu.cpi'])
                 metrics['ipc'] = 1.0 / metrics['cpi']
             
-            sim_seconds_match = re.search(r'simSeconds\s+([\d.]+)', data)
-            if sim_seconds_match:
-                metrics['sim_seconds'] = float(sim_seconds_match.group(1))
+            if 'simSeconds' in stats:
+                metrics['sim_seconds'] = float(stats['simSeconds'])
             
             # Extract instruction type distribution
-            stat_issued_pattern = r'system\.cpu\.statIssuedInstType_0::([a-zA-Z]+)\s+(\d+)\s+'
-            stat_issued_matches = re.findall(stat_issued_pattern, data)
-            
-            for op_type, count in stat_issued_matches:
-                if op_type in metrics:
-                    metrics[op_type] = int(count)
+            for stat_name, count in stats.items():
+                if stat_name.startswith(ISSUED_INST_PREFIX):
+                    op_type = stat_name[len(ISSUED_INST_PREFIX):]
+                    if op_type.isalpha() and op_type in metrics:
+                        metrics[op_type] = int(count)
             
             # Extract cache miss rates
-            l1d_miss_match = re.search(r'system\.cpu\.dcache\.overallMissRate::total\s+([\d.]+)', data)
-            if l1d_miss_match:
-                metrics['l1d_miss_rate'] = float(l1d_miss_match.group(1))
-            
-            l1i_miss_match = re.search(r'system\.cpu\.icache\.overallMissRate::total\s+([\d.]+)', data)
-            if l1i_miss_match:
-                metrics['l1i_miss_rate'] = float(l1i_miss_match.group(1))
-            
-            l2_miss_match = re.search(r'system\.l2cache\.overallMissRate::total\s+([\d.]+)', data)
-            if l2_miss_match:
-                metrics['l2_miss_rate'] = float(l2_miss_match.group(1))
+            for stat_name, metric in MISS_RATE_STATS.items():
+                if stat_name in stats:
+                    metrics[metric] = float(stats[stat_name])
                 
         except Exception as e:
             print(f"Error parsing {stats_file}: {e}")
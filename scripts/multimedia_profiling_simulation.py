@@ -1,12 +1,24 @@
+import argparse
 import subprocess
 import os
 import csv
+import math
+import shutil
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gem5_stats import parse_stats
+from sim_cache import SimulationCache, simulation_key, STATS_ARTIFACT, CONFIG_ARTIFACT
 
 # ==== CONFIGURACIÓN ====
 EXE = "./build/ARM/gem5.fast"
 SCRIPT = "scripts/scripts/CortexA76.py"
 
+# Cada job corre en sandbox/<tag>: las salidas de los codecs (compressed.j2k,
+# out.mp3, ...) y m5out/ quedan aisladas y las entradas se enlazan
+SANDBOX_DIR = "sandbox"
+INPUT_DIRS = ["workloads"]
+
 # ==== 6 WORKLOADS MULTIMEDIA (3 codecs × enc/dec) ====
 WORKLOADS = {
     "jpeg2k_enc": {
@@ -60,20 +72,147 @@ PROFILING_CONFIGS = {
     }
 }
 
+# ==== ESTADÍSTICAS DE GEM5 -> MÉTRICAS ====
+PROFILING_STATS = {
+    # Performance básico
+    'system.cpu.cpi': 'cpi',
+    'system.cpu.ipc': 'ipc',
+    'simSeconds': 'sim_seconds',
+    # Total de instrucciones
+    'system.cpu.commitStats0.numInsts': 'total_committed_insts',
+    'system.cpu.commitStats0.numOps': 'total_committed_ops',
+    # Distribución de operaciones (committed)
+    'system.cpu.commit.committedInstType0IntAlu': 'committed_IntAlu',
+    'system.cpu.commit.committedInstType0IntMult': 'committed_IntMult',
+    'system.cpu.commit.committedInstType0IntDiv': 'committed_IntDiv',
+    'system.cpu.commit.committedInstType0MemRead': 'committed_MemRead',
+    'system.cpu.commit.committedInstType0MemWrite': 'committed_MemWrite',
+    # Branches
+    'system.cpu.commit.branchMispredicts': 'branch_mispredicts',
+    # Cache miss rates
+    'system.cpu.dcache.overallMissRate::total': 'l1d_miss_rate',
+    'system.cpu.icache.overallMissRate::total': 'l1i_miss_rate',
+    'system.cpu.l2cache.overallMissRate::total': 'l2_miss_rate',
+    # Accesos a unidades funcionales
+    'system.cpu.intAluAccesses': 'intAluAccesses',
+    'system.cpu.fpAluAccesses': 'fpAluAccesses',
+    'system.cpu.vecAluAccesses': 'vecAluAccesses',
+}
+# Métricas reales; el resto son contadores y se guardan como enteros aunque
+# gem5 los imprima con punto decimal
+FLOAT_METRICS = {'cpi', 'ipc', 'sim_seconds', 'l1d_miss_rate', 'l1i_miss_rate', 'l2_miss_rate'}
+FLOAT_STAT_PREFIX = 'system.cpu.commit.committedInstType0Float'
+SIMD_STAT_PREFIX = 'system.cpu.commit.committedInstType0Simd'
+
+# ==== PERFIL FUNCIONAL (CPU atómica) ====
+# La mezcla de instrucciones no depende de la microarquitectura: una corrida
+# con AtomicSimpleCPU (script genérico de gem5, sin cachés) la da por workload
+FUNCTIONAL_CONFIG = "functional"
+FUNCTIONAL_SCRIPT = "configs/deprecated/example/se.py"
+FUNCTIONAL_PARAMS = {"cpu-type": "AtomicSimpleCPU"}
+FUNCTIONAL_STATS = {
+    'system.cpu.commitStats0.numInsts': 'total_committed_insts',
+    'system.cpu.commitStats0.numOps': 'total_committed_ops',
+    'system.cpu.commitStats0.numLoadInsts': 'committed_loads',
+    'system.cpu.commitStats0.numStoreInsts': 'committed_stores',
+    'system.mem_ctrls.bytesRead::total': 'mem_bytes_read',
+    'system.mem_ctrls.bytesWritten::total': 'mem_bytes_written',
+}
+FUNCTIONAL_OPCLASS_PREFIX = 'system.cpu.commitStats0.committedInstType::'
+FUNCTIONAL_CONTROL_PREFIX = 'system.cpu.commitStats0.committedControl::'
+# Flags de control -> métricas de saltos
+CONTROL_METRICS = {
+    'IsControl': 'control_insts',
+    'IsCondControl': 'cond_branches',
+    'IsUncondControl': 'uncond_branches',
+    'IsIndirectControl': 'indirect_branches',
+    'IsCall': 'call_branches',
+    'IsReturn': 'return_branches',
+}
+# Métricas que dependen de la configuración (solo las da una corrida O3)
+CONFIG_SENSITIVE_METRICS = ['cpi', 'ipc', 'sim_seconds', 'l1d_miss_rate', 'l1i_miss_rate', 'l2_miss_rate',
+                            'intAluAccesses', 'fpAluAccesses', 'vecAluAccesses']
+MIX_PCT_METRICS = ['integer_alu_pct', 'integer_mult_pct', 'integer_div_pct',
+                   'float_total_pct', 'simd_total_pct', 'mem_read_pct', 'mem_write_pct',
+                   'integer_total_pct', 'fp_simd_total_pct', 'memory_total_pct']
+
+def metric_value(metric, value):
+    """Valor de una métrica con el tipo del CSV: int para contadores, float para tasas"""
+    if metric in FLOAT_METRICS or not math.isfinite(value):
+        return value
+    return int(value)
+
+
+def add_mix_percentages(metrics):
+    """Porcentajes de la mezcla de operaciones respecto a las ops committed"""
+    total_ops = metrics['total_committed_ops']
+    if not total_ops or total_ops <= 0:
+        metrics.update({key: 0.0 for key in MIX_PCT_METRICS})
+        return metrics
+
+    metrics['integer_alu_pct'] = (metrics['committed_IntAlu'] / total_ops) * 100
+    metrics['integer_mult_pct'] = (metrics['committed_IntMult'] / total_ops) * 100
+    metrics['integer_div_pct'] = (metrics['committed_IntDiv'] / total_ops) * 100
+    metrics['float_total_pct'] = (metrics['committed_FloatTotal'] / total_ops) * 100
+    metrics['simd_total_pct'] = (metrics['committed_SimdTotal'] / total_ops) * 100
+    metrics['mem_read_pct'] = (metrics['committed_MemRead'] / total_ops) * 100
+    metrics['mem_write_pct'] = (metrics['committed_MemWrite'] / total_ops) * 100
+
+    # Agrupar en categorías principales
+    metrics['integer_total_pct'] = metrics['integer_alu_pct'] + metrics['integer_mult_pct'] + metrics['integer_div_pct']
+    metrics['fp_simd_total_pct'] = metrics['float_total_pct'] + metrics['simd_total_pct']
+    metrics['memory_total_pct'] = metrics['mem_read_pct'] + metrics['mem_write_pct']
+    return metrics
+
+
+def prepare_sandbox(tag):
+    """Crea sandbox/<tag> con las entradas enlazadas; retorna su ruta"""
+    sandbox = os.path.join(SANDBOX_DIR, tag)
+    # Salidas de una corrida anterior del mismo job
+    shutil.rmtree(sandbox, ignore_errors=True)
+    os.makedirs(sandbox)
+    for input_dir in INPUT_DIRS:
+        if os.path.exists(input_dir):
+            os.symlink(os.path.abspath(input_dir), os.path.join(sandbox, input_dir))
+    return sandbox
+
+
 class AccurateWorkloadProfiler:
-    def __init__(self):
+    def __init__(self, use_cache=True, jobs=1, functional=False, o3_configs=None):
+        """
+        use_cache: reutilizar resultados de la caché compartida de simulaciones
+        jobs: número de simulaciones gem5 concurrentes
+        functional: una corrida atómica por workload para la mezcla de instrucciones
+        o3_configs: configuraciones O3 a correr (por defecto todas, o ninguna en modo funcional)
+        """
         self.profiling_results = []
+        self.cache = SimulationCache() if use_cache else None
+        self.jobs = jobs
+        self.functional = functional
+        if o3_configs is None:
+            o3_configs = [] if functional else list(PROFILING_CONFIGS)
+        self.o3_configs = o3_configs
         
-    def run_gem5_simulation(self, workload_key, config_name, params):
+    def run_gem5_simulation(self, workload_key, config_name, params, script=SCRIPT):
         """Ejecuta una simulación gem5"""
         wl = WORKLOADS[workload_key]
         tag = f"profile_{workload_key}_{config_name}"
         
+        if self.cache:
+            sim_key = simulation_key(EXE, script, wl['bin'], wl['opts'], params)
+            artifacts = {STATS_ARTIFACT: f"stats_{tag}.txt", CONFIG_ARTIFACT: f"config_{tag}.json"}
+            if self.cache.fetch(sim_key, artifacts):
+                print(f"[CACHE] {workload_key} - {config_name}")
+                return tag
+        
         print(f"[PROFILING] {workload_key} - {config_name}...")
         
+        # gem5 corre dentro del sandbox: rutas absolutas para ejecutable,
+        # script y binario; las entradas relativas resuelven por el enlace
+        sandbox = prepare_sandbox(tag)
         cmd = [
-            EXE, SCRIPT,
-            "-c", wl['bin'],
+            os.path.abspath(EXE), "--outdir=m5out", os.path.abspath(script),
+            "-c", os.path.abspath(wl['bin']),
             "-o", wl['opts']
         ]
         
@@ -81,9 +220,11 @@ class AccurateWorkloadProfiler:
             cmd.append(f"--{key}={value}")
         
         try:
-            subprocess.run(" ".join(cmd), shell=True, check=True)
-            os.rename("m5out/stats.txt", f"stats_{tag}.txt")
-            os.rename("m5out/config.json", f"config_{tag}.json")
+            subprocess.run(" ".join(cmd), shell=True, check=True, cwd=sandbox)
+            os.rename(os.path.join(sandbox, "m5out", "stats.txt"), f"stats_{tag}.txt")
+            os.rename(os.path.join(sandbox, "m5out", "config.json"), f"config_{tag}.json")
+            if self.cache:
+                self.cache.store(sim_key, artifacts)
             print(f"[OK] {workload_key} - {config_name}")
             return tag
         except subprocess.CalledProcessError as e:
@@ -110,7 +251,7 @@ class AccurateWorkloadProfiler:
             'committed_SimdTotal': 0,
             'committed_MemRead': 0,
             'committed_MemWrite': 0,
-            'committed_Branches': 0,
+            'branch_mispredicts': 0,
             
             # Cache miss rates
             'l1d_miss_rate': None,
@@ -124,99 +265,145 @@ class AccurateWorkloadProfiler:
         }
         
         try:
-            with open(stats_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('#') or not line:
-                        continue
-                    
-                    # === PERFORMANCE BÁSICO ===
-                    if 'system.cpu.cpi ' in line and not 'commitStats' in line:
-                        metrics['cpi'] = float(line.split()[1])
-                    elif 'system.cpu.ipc ' in line and not 'commitStats' in line:
-                        metrics['ipc'] = float(line.split()[1])
-                    elif 'simSeconds ' in line:
-                        metrics['sim_seconds'] = float(line.split()[1])
-                    
-                    # === TOTAL DE INSTRUCCIONES ===
-                    elif 'system.cpu.commitStats0.numInsts ' in line:
-                        metrics['total_committed_insts'] = int(line.split()[1])
-                    elif 'system.cpu.commitStats0.numOps ' in line:
-                        metrics['total_committed_ops'] = int(line.split()[1])
-                    
-                    # === DISTRIBUCIÓN DE OPERACIONES (COMMITTED - más preciso) ===
-                    elif 'system.cpu.commit.committedInstType0IntAlu ' in line:
-                        metrics['committed_IntAlu'] = int(line.split()[1])
-                    elif 'system.cpu.commit.committedInstType0IntMult ' in line:
-                        metrics['committed_IntMult'] = int(line.split()[1])
-                    elif 'system.cpu.commit.committedInstType0IntDiv ' in line:
-                        metrics['committed_IntDiv'] = int(line.split()[1])
-                    
-                    # Float operations (sumar todos los tipos)
-                    elif ('system.cpu.commit.committedInstType0Float' in line and 
-                          not 'MemRead' in line and not 'MemWrite' in line):
-                        metrics['committed_FloatTotal'] += int(line.split()[1])
-                    
-                    # SIMD operations (sumar todos los tipos)
-                    elif 'system.cpu.commit.committedInstType0Simd' in line:
-                        metrics['committed_SimdTotal'] += int(line.split()[1])
-                    
-                    # Memory operations
-                    elif 'system.cpu.commit.committedInstType0MemRead ' in line:
-                        metrics['committed_MemRead'] = int(line.split()[1])
-                    elif 'system.cpu.commit.committedInstType0MemWrite ' in line:
-                        metrics['committed_MemWrite'] = int(line.split()[1])
-                    
-                    # Branches
-                    elif 'system.cpu.commit.branchMispredicts ' in line:
-                        metrics['committed_Branches'] = int(line.split()[1])
-                    
-                    # === CACHE MISS RATES ===
-                    elif 'system.cpu.dcache.overallMissRate::total ' in line:
-                        metrics['l1d_miss_rate'] = float(line.split()[1])
-                    elif 'system.cpu.icache.overallMissRate::total ' in line:
-                        metrics['l1i_miss_rate'] = float(line.split()[1])
-                    elif 'system.cpu.l2cache.overallMissRate::total ' in line:
-                        metrics['l2_miss_rate'] = float(line.split()[1])
-                    
-                    # === ACCESOS A UNIDADES FUNCIONALES ===
-                    elif 'system.cpu.intAluAccesses ' in line:
-                        metrics['intAluAccesses'] = int(line.split()[1])
-                    elif 'system.cpu.fpAluAccesses ' in line:
-                        metrics['fpAluAccesses'] = int(line.split()[1])
-                    elif 'system.cpu.vecAluAccesses ' in line:
-                        metrics['vecAluAccesses'] = int(line.split()[1])
+            stats = parse_stats(stats_file, keys=PROFILING_STATS.keys(),
+                                prefixes=[FLOAT_STAT_PREFIX, SIMD_STAT_PREFIX])
+            
+            # === MÉTRICAS CON NOMBRE EXACTO ===
+            for stat_name, metric in PROFILING_STATS.items():
+                if stat_name in stats:
+                    metrics[metric] = metric_value(metric, stats[stat_name])
+            
+            # Float y SIMD operations (sumar todos los tipos)
+            for stat_name, value in stats.items():
+                if (stat_name.startswith(FLOAT_STAT_PREFIX) and
+                        'MemRead' not in stat_name and 'MemWrite' not in stat_name):
+                    metrics['committed_FloatTotal'] += int(value)
+                elif stat_name.startswith(SIMD_STAT_PREFIX):
+                    metrics['committed_SimdTotal'] += int(value)
         
         except Exception as e:
             print(f"Error parsing {stats_file}: {e}")
         
         # Calcular porcentajes basados en instrucciones committed
-        total_ops = metrics['total_committed_ops']
-        if total_ops and total_ops > 0:
-            metrics['integer_alu_pct'] = (metrics['committed_IntAlu'] / total_ops) * 100
-            metrics['integer_mult_pct'] = (metrics['committed_IntMult'] / total_ops) * 100
-            metrics['integer_div_pct'] = (metrics['committed_IntDiv'] / total_ops) * 100
-            metrics['float_total_pct'] = (metrics['committed_FloatTotal'] / total_ops) * 100
-            metrics['simd_total_pct'] = (metrics['committed_SimdTotal'] / total_ops) * 100
-            metrics['mem_read_pct'] = (metrics['committed_MemRead'] / total_ops) * 100
-            metrics['mem_write_pct'] = (metrics['committed_MemWrite'] / total_ops) * 100
+        return add_mix_percentages(metrics)
+    
+    def extract_functional_metrics(self, stats_file, workload_key):
+        """Mezcla de operaciones, saltos y tráfico de memoria de una corrida atómica"""
+        metrics = {metric: None for metric in CONFIG_SENSITIVE_METRICS}
+        metrics.update({metric: None for metric in FUNCTIONAL_STATS.values()})
+        metrics.update({
+            'committed_IntAlu': 0,
+            'committed_IntMult': 0,
+            'committed_IntDiv': 0,
+            'committed_FloatTotal': 0,
+            'committed_SimdTotal': 0,
+            'committed_MemRead': 0,
+            'committed_MemWrite': 0,
+        })
+        metrics.update({metric: 0 for metric in CONTROL_METRICS.values()})
+        
+        try:
+            stats = parse_stats(stats_file, keys=FUNCTIONAL_STATS.keys(),
+                                prefixes=[FUNCTIONAL_OPCLASS_PREFIX, FUNCTIONAL_CONTROL_PREFIX])
+            for stat_name, metric in FUNCTIONAL_STATS.items():
+                if stat_name in stats:
+                    metrics[metric] = metric_value(metric, stats[stat_name])
             
-            # Agrupar en categorías principales
-            metrics['integer_total_pct'] = metrics['integer_alu_pct'] + metrics['integer_mult_pct'] + metrics['integer_div_pct']
-            metrics['fp_simd_total_pct'] = metrics['float_total_pct'] + metrics['simd_total_pct']
-            metrics['memory_total_pct'] = metrics['mem_read_pct'] + metrics['mem_write_pct']
+            # Misma clasificación que committedInstType0* de O3
+            for stat_name, value in stats.items():
+                if stat_name.startswith(FUNCTIONAL_OPCLASS_PREFIX):
+                    op_class = stat_name[len(FUNCTIONAL_OPCLASS_PREFIX):]
+                    if op_class in ('IntAlu', 'IntMult', 'IntDiv', 'MemRead', 'MemWrite'):
+                        metrics[f'committed_{op_class}'] += int(value)
+                    elif (op_class.startswith('Float') and
+                            'MemRead' not in op_class and 'MemWrite' not in op_class):
+                        metrics['committed_FloatTotal'] += int(value)
+                    elif op_class.startswith('Simd'):
+                        metrics['committed_SimdTotal'] += int(value)
+                elif stat_name.startswith(FUNCTIONAL_CONTROL_PREFIX):
+                    flag = stat_name[len(FUNCTIONAL_CONTROL_PREFIX):]
+                    if flag in CONTROL_METRICS:
+                        metrics[CONTROL_METRICS[flag]] = int(value)
+        
+        except Exception as e:
+            print(f"Error parsing {stats_file}: {e}")
+        
+        total_insts = metrics['total_committed_insts']
+        metrics['branch_pct'] = (metrics['control_insts'] / total_insts) * 100 if total_insts else 0.0
+        metrics['memory_footprint_bytes'] = self.memory_footprint(workload_key)
+        return add_mix_percentages(metrics)
+    
+    def memory_footprint(self, workload_key):
+        """Bytes distintos accedidos, si existe la traza de L1D de stack_distance.py"""
+        import numpy as np
+        from stack_distance import trace_path, load_trace, LINE_SIZE
+        path = trace_path(workload_key)
+        if not os.path.exists(path):
+            return None
+        # La traza ya guarda bloques (dirección / LINE_SIZE): sin copiarla a una lista
+        blocks, _ = load_trace(path)
+        return int(np.unique(blocks).size) * LINE_SIZE
+    
+    def profile_job(self, wl_key, config_name, config_params):
+        """Simula un workload en una configuración y extrae sus métricas"""
+        hits = self.cache.hits if self.cache else 0
+        misses = self.cache.misses if self.cache else 0
+        
+        functional = config_name == FUNCTIONAL_CONFIG
+        tag = self.run_gem5_simulation(wl_key, config_name, config_params,
+                                       FUNCTIONAL_SCRIPT if functional else SCRIPT)
+        if not tag:
+            return None
+        
+        stats_file = f"stats_{tag}.txt"
+        if functional:
+            metrics = self.extract_functional_metrics(stats_file, wl_key)
         else:
-            for key in ['integer_alu_pct', 'integer_mult_pct', 'integer_div_pct', 
-                       'float_total_pct', 'simd_total_pct', 'mem_read_pct', 'mem_write_pct',
-                       'integer_total_pct', 'fp_simd_total_pct', 'memory_total_pct']:
-                metrics[key] = 0.0
+            metrics = self.extract_accurate_metrics(stats_file)
         
-        return metrics
+        result = {
+            'workload': wl_key,
+            'codec': wl_key.split('_')[0],
+            'type': wl_key.split('_')[1],
+            'config': config_name,
+            'tag': tag,
+            **config_params,
+            **metrics
+        }
+        
+        if self.cache:
+            if self.cache.hits > hits:
+                result['_cache'] = "hit"
+            elif self.cache.misses > misses:
+                result['_cache'] = "miss"
+        return result
+    
+    def report_job(self, completed, total, job, result):
+        """Muestra el progreso de un job terminado"""
+        wl_key, config_name, _ = job
+        if not result:
+            print(f"[{completed}/{total}] {wl_key} - {config_name}: sin resultados")
+            return
+        
+        # Mostrar progreso con datos correctos
+        print(f"[{completed}/{total}] {wl_key} - {config_name}:")
+        print(f"  CPI: {result.get('cpi', 'N/A')}")
+        print(f"  IPC: {result.get('ipc', 'N/A')}")
+        print(f"  Integer Total: {result.get('integer_total_pct', 0):.1f}%")
+        print(f"  Integer ALU: {result.get('integer_alu_pct', 0):.1f}%")
+        print(f"  FP+SIMD: {result.get('fp_simd_total_pct', 0):.1f}%")
+        print(f"  Memory Total: {result.get('memory_total_pct', 0):.1f}%")
+        print(f"  L1D Miss Rate: {result.get('l1d_miss_rate', 'N/A')}")
+        print(f"  L1I Miss Rate: {result.get('l1i_miss_rate', 'N/A')}")
+        print()
     
     def run_profiling(self):
         """Ejecuta profiling completo"""
         print("=== PROFILING MULTIMEDIA CON PARSING CORRECTO ===")
-        print(f"Total simulaciones: {len(WORKLOADS)} × {len(PROFILING_CONFIGS)} = {len(WORKLOADS) * len(PROFILING_CONFIGS)}")
+        configs = [(name, PROFILING_CONFIGS[name]) for name in self.o3_configs]
+        if self.functional:
+            configs.insert(0, (FUNCTIONAL_CONFIG, FUNCTIONAL_PARAMS))
+        print(f"Total simulaciones: {len(WORKLOADS)} × {len(configs)} = {len(WORKLOADS) * len(configs)}")
         print()
         
         # Verificar workloads disponibles
@@ -235,41 +422,44 @@ class AccurateWorkloadProfiler:
         print()
         
         # Ejecutar simulaciones
-        completed = 0
-        total = len(available_workloads) * len(PROFILING_CONFIGS)
-        
-        for wl_key in available_workloads.keys():
-            for config_name, config_params in PROFILING_CONFIGS.items():
-                tag = self.run_gem5_simulation(wl_key, config_name, config_params)
-                completed += 1
-                
-                if tag:
-                    stats_file = f"stats_{tag}.txt"
-                    metrics = self.extract_accurate_metrics(stats_file)
-                    
-                    result = {
-                        'workload': wl_key,
-                        'codec': wl_key.split('_')[0],
-                        'type': wl_key.split('_')[1],
-                        'config': config_name,
-                        'tag': tag,
-                        **config_params,
-                        **metrics
-                    }
-                    
-                    self.profiling_results.append(result)
-                    
-                    # Mostrar progreso con datos correctos
-                    print(f"[{completed}/{total}] {wl_key} - {config_name}:")
-                    print(f"  CPI: {metrics.get('cpi', 'N/A')}")
-                    print(f"  IPC: {metrics.get('ipc', 'N/A')}")
-                    print(f"  Integer Total: {metrics.get('integer_total_pct', 0):.1f}%")
-                    print(f"  Integer ALU: {metrics.get('integer_alu_pct', 0):.1f}%")
-                    print(f"  FP+SIMD: {metrics.get('fp_simd_total_pct', 0):.1f}%")
-                    print(f"  Memory Total: {metrics.get('memory_total_pct', 0):.1f}%")
-                    print(f"  L1D Miss Rate: {metrics.get('l1d_miss_rate', 'N/A')}")
-                    print(f"  L1I Miss Rate: {metrics.get('l1i_miss_rate', 'N/A')}")
-                    print()
+        jobs = [(wl_key, config_name, config_params)
+                for wl_key in available_workloads.keys()
+                for config_name, config_params in configs]
+        total = len(jobs)
+        results = {}
+        
+        if self.jobs <= 1:
+            for index, job in enumerate(jobs):
+                results[index] = self.profile_job(*job)
+                self.report_job(len(results), total, job, results[index])
+        else:
+            print(f"Ejecutando {total} simulaciones con {self.jobs} workers")
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                futures = {pool.submit(self.profile_job, *job): index for index, job in enumerate(jobs)}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"[ERROR] {jobs[index][0]} - {jobs[index][1]}: {e}")
+                        result = None
+                    # Los contadores de la caché viven en los workers
+                    if result and self.cache:
+                        if result.get('_cache') == "hit":
+                            self.cache.hits += 1
+                        elif result.get('_cache') == "miss":
+                            self.cache.misses += 1
+                    results[index] = result
+                    self.report_job(len(results), total, jobs[index], result)
+        
+        # Mismo orden del CSV sin importar el orden de terminación
+        for index in sorted(results):
+            if results[index]:
+                results[index].pop('_cache', None)
+                self.profiling_results.append(results[index])
+        
+        if self.cache:
+            self.cache.report()
         
         # Guardar y analizar
         self.save_results()
@@ -283,7 +473,8 @@ class AccurateWorkloadProfiler:
             return
         
         filename = "profiling_multimedia_accurate.csv"
-        fieldnames = list(self.profiling_results[0].keys())
+        # Las filas funcionales y O3 tienen columnas distintas
+        fieldnames = list(dict.fromkeys(key for result in self.profiling_results for key in result))
         
         with open(filename, 'w', newline='') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -455,16 +646,30 @@ class AccurateWorkloadProfiler:
         return None
 
 def main():
+    parser = argparse.ArgumentParser(description="Profiling de workloads multimedia")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Número de simulaciones gem5 concurrentes (cada una en su sandbox)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No reutilizar resultados de la caché de simulaciones")
+    parser.add_argument("--functional", action="store_true",
+                        help="Mezcla de instrucciones con una corrida atómica por workload (sin O3)")
+    parser.add_argument("--o3-configs", nargs="*", choices=list(PROFILING_CONFIGS), default=None,
+                        help="Configuraciones O3 para las métricas sensibles a la configuración "
+                             "(por defecto todas, o ninguna con --functional)")
+    args = parser.parse_args()
+    
     print("PROFILING MULTIMEDIA ")
     print("======================================\\n")
     
-    profiler = AccurateWorkloadProfiler()
+    profiler = AccurateWorkloadProfiler(use_cache=not args.no_cache, jobs=args.jobs,
+                                        functional=args.functional, o3_configs=args.o3_configs)
     recommended = profiler.run_profiling()
     
     print("\\n=== PROFILING COMPLETADO ===")
     print("Archivos generados:")
     print("  - profiling_multimedia_accurate.csv")
     print("  - stats_profile_*.txt")
+    print(f"  - {SANDBOX_DIR}/<tag>/ (salidas de cada codec)")
     
 
 if __name__ == "__main__":
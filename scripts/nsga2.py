@@ -0,0 +1,207 @@
+"""
+Búsqueda multiobjetivo estilo NSGA-II sobre un DesignSpace.
+
+Todos los objetivos se minimizan (p.ej. CPI, energía y área de McPAT).
+Cada generación se evalúa como un lote (paralelizable por el llamador),
+la población sobreviviente se elige por frentes no dominados y distancia
+de crowding, y un archivo guarda todas las soluciones no dominadas vistas.
+"""
+
+import csv
+import json
+import random
+
+
+def dominates(a, b):
+    """True si a domina a b (ninguno peor y al menos uno mejor)"""
+    return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+
+def non_dominated_sort(points):
+    """Frentes de Pareto: lista de listas de índices de points, el primero no dominado"""
+    dominated_by = [[] for _ in points]
+    counts = [0] * len(points)
+    fronts = [[]]
+    for i, p in enumerate(points):
+        for j, q in enumerate(points):
+            if i == j:
+                continue
+            if dominates(p, q):
+                dominated_by[i].append(j)
+            elif dominates(q, p):
+                counts[i] += 1
+        if counts[i] == 0:
+            fronts[0].append(i)
+
+    while fronts[-1]:
+        next_front = []
+        for i in fronts[-1]:
+            for j in dominated_by[i]:
+                counts[j] -= 1
+                if counts[j] == 0:
+                    next_front.append(j)
+        fronts.append(next_front)
+    return fronts[:-1]
+
+
+def crowding_distance(front, points):
+    """Distancia de crowding de cada índice del frente"""
+    distance = {i: 0.0 for i in front}
+    if len(front) <= 2:
+        return {i: float("inf") for i in front}
+    for m in range(len(points[front[0]])):
+        ordered = sorted(front, key=lambda i: points[i][m])
+        low, high = points[ordered[0]][m], points[ordered[-1]][m]
+        distance[ordered[0]] = distance[ordered[-1]] = float("inf")
+        if high == low:
+            continue
+        for k in range(1, len(ordered) - 1):
+            distance[ordered[k]] += (points[ordered[k + 1]][m] - points[ordered[k - 1]][m]) / (high - low)
+    return distance
+
+
+class ParetoArchive:
+    def __init__(self, objectives):
+        """objectives: nombres de las métricas a minimizar"""
+        self.objectives = list(objectives)
+        # [(configuración, resultado)] no dominados
+        self.entries = []
+
+    def point(self, result):
+        return [result[name] for name in self.objectives]
+
+    def add(self, config, result):
+        """Agrega una solución si no es dominada; retorna True si entró al archivo"""
+        point = self.point(result)
+        for _, other in self.entries:
+            other_point = self.point(other)
+            if dominates(other_point, point) or other_point == point:
+                return False
+        self.entries = [(c, r) for c, r in self.entries if not dominates(point, self.point(r))]
+        self.entries.append((config, result))
+        return True
+
+    def write_csv(self, filename, columns=None):
+        """
+        Guarda el frente ordenado por el primer objetivo.
+        columns: {columna del CSV: clave del resultado} (por defecto los objetivos)
+        """
+        columns = columns or {name: name for name in self.objectives}
+        params = list(self.entries[0][0]) if self.entries else []
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(columns) + params + ["Configuración completa"])
+            for config, result in sorted(self.entries, key=lambda e: self.point(e[1])):
+                writer.writerow([result.get(key) for key in columns.values()]
+                                + [config[p] for p in params] + [json.dumps(config)])
+
+
+class NSGA2:
+    def __init__(self, space, objectives, population=12, crossover_prob=0.9,
+                 mutation_prob=None, seed=0):
+        """
+        space: DesignSpace a explorar
+        objectives: claves de los resultados a minimizar
+        mutation_prob: probabilidad de mutar cada parámetro (por defecto 1/n)
+        """
+        self.space = space
+        self.objectives = list(objectives)
+        self.population_size = population
+        self.crossover_prob = crossover_prob
+        self.mutation_prob = mutation_prob or 1.0 / len(space.names)
+        self.rng = random.Random(seed)
+        self.archive = ParetoArchive(objectives)
+        # índice en el espacio -> resultado (None si falló)
+        self.evaluated = {}
+        # [(configuración, resultado)] de la generación actual y su rango/crowding
+        self.population = []
+        self.rank = []
+        self.crowding = []
+
+    def initial_population(self, seeds=()):
+        """Población inicial: configuraciones semilla + muestras aleatorias"""
+        seeds = [dict(c) for c in seeds][:self.population_size]
+        return seeds + self.space.sample(self.population_size - len(seeds), self.rng, exclude=seeds)
+
+    def tell(self, configs, results):
+        """Registra una generación evaluada y selecciona la siguiente población"""
+        for config, result in zip(configs, results):
+            self.evaluated[self.space.index_of(config)] = result
+            if result:
+                self.archive.add(config, result)
+                self.population.append((config, result))
+        self.population = self.select(self.population, self.population_size)
+
+    def select(self, candidates, size):
+        """Selección ambiental de NSGA-II: frentes completos y luego crowding"""
+        points = [self.archive.point(r) for _, r in candidates]
+        rank = {}
+        crowding = {}
+        chosen = []
+        for level, front in enumerate(non_dominated_sort(points)):
+            distance = crowding_distance(front, points)
+            for i in front:
+                rank[i] = level
+                crowding[i] = distance[i]
+            if len(chosen) + len(front) <= size:
+                chosen.extend(front)
+            else:
+                front.sort(key=lambda i: distance[i], reverse=True)
+                chosen.extend(front[:size - len(chosen)])
+                break
+        # rank/crowding indexados por posición en la nueva población
+        self.rank = [rank[i] for i in chosen]
+        self.crowding = [crowding[i] for i in chosen]
+        return [candidates[i] for i in chosen]
+
+    def tournament(self):
+        """Torneo binario por (rango, crowding)"""
+        a, b = self.rng.randrange(len(self.population)), self.rng.randrange(len(self.population))
+        if (self.rank[a], -self.crowding[a]) <= (self.rank[b], -self.crowding[b]):
+            return self.population[a][0]
+        return self.population[b][0]
+
+    def crossover(self, parent_a, parent_b):
+        """Cruce uniforme parámetro a parámetro"""
+        if self.rng.random() >= self.crossover_prob:
+            return dict(parent_a)
+        return {name: (parent_a if self.rng.random() < 0.5 else parent_b)[name]
+                for name in self.space.names}
+
+    def mutate(self, config):
+        """Ordinales: paso a un valor vecino; categóricos: cualquier otro valor"""
+        child = dict(config)
+        for name in self.space.names:
+            values = self.space.parameters[name]
+            if len(values) < 2 or self.rng.random() >= self.mutation_prob:
+                continue
+            position = values.index(child[name])
+            if name in self.space.categorical:
+                child[name] = self.rng.choice([v for v in values if v != child[name]])
+            else:
+                step = self.rng.choice([-1, 1])
+                if not 0 <= position + step < len(values):
+                    step = -step
+                child[name] = values[position + step]
+        return child
+
+    def offspring(self):
+        """Nueva generación de hijos no evaluados antes"""
+        if not self.population:
+            return self.space.sample(self.population_size, self.rng,
+                                     exclude=[self.space.config_at(i) for i in self.evaluated])
+        children = []
+        seen = set(self.evaluated)
+        attempts = 0
+        while len(children) < self.population_size and attempts < 50 * self.population_size:
+            attempts += 1
+            child = self.mutate(self.crossover(self.tournament(), self.tournament()))
+            index = self.space.index_of(child)
+            if index not in seen:
+                seen.add(index)
+                children.append(child)
+        # Población estancada: completar con configuraciones aleatorias no vistas
+        if len(children) < self.population_size:
+            children += self.space.sample(self.population_size - len(children), self.rng,
+                                          exclude=[self.space.config_at(i) for i in seen])
+        return children
@@ -0,0 +1,32 @@
+"""
+Correlación de rangos compartida por el DSE y los modelos analíticos.
+"""
+
+
+def _ranks(values):
+    """Rangos (promedio en empates) para Spearman"""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def spearman(a, b):
+    """Correlación de Spearman entre dos listas (None con menos de 3 puntos)"""
+    if len(a) < 3:
+        return None
+    ra, rb = _ranks(a), _ranks(b)
+    mean_a, mean_b = sum(ra) / len(ra), sum(rb) / len(rb)
+    cov = sum((x - mean_a) * (y - mean_b) for x, y in zip(ra, rb))
+    var_a = sum((x - mean_a) ** 2 for x in ra)
+    var_b = sum((y - mean_b) ** 2 for y in rb)
+    if not var_a or not var_b:
+        return None
+    return cov / (var_a * var_b) ** 0.5
@@ -3,6 +3,10 @@ import os
 import re
 import csv
 
+from gem5_stats import get_stat
+from sim_cache import (SimulationCache, simulation_key, mcpat_artifact, mcpat_key,
+                       STATS_ARTIFACT, CONFIG_ARTIFACT, MCPAT_ARTIFACT, MCPAT_CACHE_DIR)
+
 EXE = "./build/ARM/gem5.fast"
 SCRIPT = "scripts/scripts/CortexA76.py"
 BIN = "workloads/jpeg2k_dec/jpg2k_dec"
@@ -15,8 +19,27 @@ L1D_ASSOCS = [4, 8]
 ROB_ENTRIES = [128, 192]
 ISSUE_WIDTHS = [6, 8]
 
+MCPAT_TEMPLATE = "scripts/McPAT/ARM_A76_2.1GHz.xml"
+CONVERT_SCRIPT = "scripts/McPAT/gem5toMcPAT_cortexA76.py"
+MCPAT_EXEC = "./mcpat/mcpat"
+
+# Caché compartida de simulaciones y caché de McPAT indexada por XML
+cache = SimulationCache()
+mcpat_cache = SimulationCache(MCPAT_CACHE_DIR)
+
+def params_de(l1i, l1d, l1d_assoc, rob, issue_width):
+    return {"l1i_size": l1i, "l1d_size": l1d, "l1d_assoc": l1d_assoc,
+            "rob_entries": rob, "issue_width": issue_width}
+
 def run_simulation(l1i, l1d, l1d_assoc, rob, issue_width):
     tag = f"L1I_{l1i}_L1D_{l1d}_L1DA_{l1d_assoc}_ROB_{rob}_IW_{issue_width}"
+    
+    key = simulation_key(EXE, SCRIPT, BIN, OPTS, params_de(l1i, l1d, l1d_assoc, rob, issue_width))
+    artifacts = {STATS_ARTIFACT: f"stats_{tag}.txt", CONFIG_ARTIFACT: f"config_{tag}.json"}
+    if cache.fetch(key, artifacts):
+        print(f"[CACHE] {tag}")
+        return tag
+    
     print(f"Ejecutando simulación: {tag}")
     
     cmd = [
@@ -34,14 +57,15 @@ def run_simulation(l1i, l1d, l1d_assoc, rob, issue_width):
     
     os.rename("m5out/stats.txt", f"stats_{tag}.txt")
     os.rename("m5out/config.json", f"config_{tag}.json")
+    cache.store(key, artifacts)
     
     return tag
 
-def generar_xml_mcpat(tag, template_xml="scripts/McPAT/ARM_A76_2.1GHz.xml"):
+def generar_xml_mcpat(tag, template_xml=MCPAT_TEMPLATE):
     stats_file = f"stats_{tag}.txt"
     config_file = f"config_{tag}.json"
     xml_output = f"config_{tag}.xml"
-    convert_script = "scripts/McPAT/gem5toMcPAT_cortexA76.py"
+    convert_script = CONVERT_SCRIPT
     
     cmd = ["python3", convert_script, stats_file, config_file, template_xml]
     with open(xml_output, "w") as outxml:
@@ -49,12 +73,17 @@ def generar_xml_mcpat(tag, template_xml="scripts/McPAT/ARM_A76_2.1GHz.xml"):
     
     return xml_output
 
-def ejecutar_mcpat(xml_file, tag, mcpat_exec="./mcpat/mcpat"):
+def ejecutar_mcpat(xml_file, tag, mcpat_exec=MCPAT_EXEC):
     salida_mcpat = f"mcpat_{tag}.txt"
     cmd = [mcpat_exec, "-infile", xml_file, "-print_level", "1"]
     
+    xml_key = mcpat_key(xml_file, mcpat_exec)
+    if mcpat_cache.fetch(xml_key, {MCPAT_ARTIFACT: salida_mcpat}):
+        return salida_mcpat
+    
     with open(salida_mcpat, "w") as fout:
         subprocess.run(cmd, check=True, stdout=fout)
+    mcpat_cache.store(xml_key, {MCPAT_ARTIFACT: salida_mcpat})
     
     return salida_mcpat
 
@@ -85,13 +114,7 @@ def extraer_total_leakage(mcpat_file):
     return leakage
 
 def extraer_cpi(stats_file):
-    cpi = None
-    with open(stats_file, "r") as f:
-        for line in f:
-            if "system.cpu.cpi" in line and not line.strip().startswith("#"):
-                cpi = float(line.split()[1])
-                break
-    return cpi
+    return get_stat(stats_file, "system.cpu.cpi")
 
 def main():
     results = []
@@ -102,8 +125,16 @@ def main():
                 for rob in ROB_ENTRIES:
                     for issue_width in ISSUE_WIDTHS:
                         tag = run_simulation(l1i, l1d, l1d_assoc, rob, issue_width)
-                        xml_file = generar_xml_mcpat(tag)
-                        mcpat_file = ejecutar_mcpat(xml_file, tag)
+                        
+                        # McPAT desde la caché si esta simulación ya fue procesada
+                        key = simulation_key(EXE, SCRIPT, BIN, OPTS,
+                                             params_de(l1i, l1d, l1d_assoc, rob, issue_width))
+                        mcpat_file = f"mcpat_{tag}.txt"
+                        artifact = mcpat_artifact(MCPAT_TEMPLATE, CONVERT_SCRIPT, MCPAT_EXEC)
+                        if not cache.fetch(key, {artifact: mcpat_file}):
+                            xml_file = generar_xml_mcpat(tag)
+                            mcpat_file = ejecutar_mcpat(xml_file, tag)
+                            cache.store(key, {artifact: mcpat_file})
                         
                         # Extraer métricas
                         cpi = extraer_cpi(f"stats_{tag}.txt")
@@ -137,6 +168,8 @@ def main():
         writer.writerows(results)
     
     print("DSE completado. Resultados guardados en dse_results.csv")
+    cache.report()
+    mcpat_cache.report("MCPAT CACHE")
 
 if __name__ == "__main__":
     main()
@@ -2,7 +2,27 @@ import subprocess
 import os
 import re
 import csv
+import json
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from itertools import product
+from math import ceil, exp, log
+
+from campaign_journal import CampaignJournal
+from checkpoints import take_checkpoint, restore_args, restore_key_params, normalize_switched_stats
+import simpoints
+import mcpat_xml
+from dse_phases import (L1D_SIZES_PHASE1, L1D_ASSOCS_PHASE1, L2_SIZES_PHASE1, L2_ASSOCS_PHASE1,
+                        L1I_SIZE_FIXED, L1I_ASSOC_FIXED, ROB_ENTRIES_FIXED, ISSUE_WIDTH_FIXED,
+                        DECODE_WIDTH_FIXED, NUM_FU_INTALU_PHASE2, NUM_FU_FPSIMD_PHASE2,
+                        NUM_FU_READ_PHASE2, NUM_FU_WRITE_PHASE2, ROB_ENTRIES_PHASE3,
+                        ISSUE_WIDTH_PHASE3, DECODE_WIDTH_PHASE3)
+from gem5_stats import parse_stats
+from multimedia_profiling_simulation import WORKLOADS, prepare_sandbox
+from rank_stats import spearman
+from sim_cache import (SimulationCache, simulation_key, mcpat_artifact, mcpat_key,
+                       STATS_ARTIFACT, CONFIG_ARTIFACT, MCPAT_ARTIFACT, MCPAT_CACHE_DIR)
 
 # Configuración de rutas
 EXE = "./build/ARM/gem5.fast"
@@ -12,41 +32,144 @@ BIN_DECODER = "workloads/jpeg2k_dec/jpg2k_dec"
 OPTS_ENCODER = "'-i workloads/jpeg2k_enc/jpg2kenc_testfile.ppm -o compressed.j2k'"
 OPTS_DECODER = "'-i workloads/jpeg2k_dec/jpg2kdec_testfile.j2k -o image.pgm'"
 
-# DSE optimizado para JPEG2000 - Implementación por fases
-# Fase 1: Cache Hierarchy (más crítico para JPEG2000)
-L1D_SIZES_PHASE1 = ["32kB", "64kB", "128kB", "256kB"]
-L1D_ASSOCS_PHASE1 = [4, 8, 16]
-L2_SIZES_PHASE1 = ["256kB", "512kB", "1MB", "2MB"]  
-L2_ASSOCS_PHASE1 = [8, 16, 24]
-
-# Parámetros fijos para Fase 1
-L1I_SIZE_FIXED = "64kB"
-L1I_ASSOC_FIXED = 4
-ROB_ENTRIES_FIXED = 128
-ISSUE_WIDTH_FIXED = 4
-DECODE_WIDTH_FIXED = 4
-NUM_FU_INTALU_FIXED = 3
-NUM_FU_FPSIMD_FIXED = 2
-
-# Fase 2: Functional Units (después de cache optimization)
-NUM_FU_INTALU_PHASE2 = [2, 3, 4, 6]
-NUM_FU_FPSIMD_PHASE2 = [1, 2, 3, 4]
-NUM_FU_READ_PHASE2 = [2, 3, 4]
-NUM_FU_WRITE_PHASE2 = [1, 2, 3]
-
-# Fase 3: Pipeline Parameters
-ROB_ENTRIES_PHASE3 = [64, 128, 192]
-ISSUE_WIDTH_PHASE3 = [2, 4, 6]
-DECODE_WIDTH_PHASE3 = [2, 4, 6]
+# Estadísticas de gem5 usadas por extraer_metricas
+STAT_CPI = "system.cpu.cpi"
+STAT_L1D_MISS_RATE = "system.cpu.dcache.overall_miss_rate::total"
+STAT_L2_MISS_RATE = "system.l2.overall_miss_rate::total"
+STAT_INTALU_UTILIZATION = "system.cpu.fuPool.IntALU_utilization"
+METRIC_STATS = [STAT_CPI, STAT_L1D_MISS_RATE, STAT_L2_MISS_RATE, STAT_INTALU_UTILIZATION]
+
+# gem5toMcPAT y McPAT
+MCPAT_TEMPLATE = "scripts/McPAT/ARM_A76_2.1GHz.xml"
+CONVERT_SCRIPT = "scripts/McPAT/gem5toMcPAT_cortexA76.py"
+MCPAT_EXEC = "./mcpat/mcpat"
+
+# Mejores configuraciones de una fase sobre las que la siguiente arranca especulativamente
+SPECULATE_TOP_K = 2
+
+# Agregación del EDP (normalizado por workload) de un candidato evaluado en varios workloads
+AGGREGATIONS = ["geomean", "weighted", "worst"]
+# Abandono temprano: un workload pendiente puede ser hasta este factor mejor que el mejor visto en él
+ABANDON_MARGIN = 2.0
+
+# Instrucciones de la corrida de referencia del estimador de área (solo aporta config.json y actividad nominal)
+AREA_REFERENCE_INSTS = 1000000
+
+def aggregate(values, method="geomean", weights=None):
+    """
+    Puntaje de un candidato a partir de sus métricas normalizadas por
+    workload ({workload: valor}): media geométrica, suma ponderada o peor caso
+    """
+    if method == "geomean":
+        if min(values.values()) <= 0:
+            return 0.0
+        return exp(sum(log(v) for v in values.values()) / len(values))
+    if method == "weighted":
+        weights = weights or {}
+        return sum(weights.get(w, 1.0 / len(values)) * v for w, v in values.items())
+    if method == "worst":
+        return max(values.values())
+    raise ValueError(f"Agregación desconocida: {method}")
+
 
 class DSEExplorer:
-    def __init__(self, workload="both"):
+    def __init__(self, workload="both", jobs=1, use_cache=True, resume=False,
+                 fast_forward=0, warmup=0, use_simpoints=False, post_jobs=None,
+                 inproc_xml=False, use_surrogate=False, surrogate_data=None,
+                 sh_budgets=None, sh_eta=3, screen_trajectories=0, screen_threshold=None,
+                 speculate=SPECULATE_TOP_K, area_budget=None, leakage_budget=None,
+                 area_reference=None, co_workloads=None, aggregation="geomean", weights=None,
+                 abandon_margin=ABANDON_MARGIN):
         """
         workload: "encoder", "decoder", o "both"
+        jobs: número de simulaciones gem5 concurrentes
+        post_jobs: workers para gem5toMcPAT/McPAT (por defecto jobs // 4)
+        use_cache: reutilizar resultados de la caché compartida de simulaciones
+        resume: retomar una campaña interrumpida desde su journal
+        fast_forward: instrucciones a saltar con un checkpoint compartido (0 = desactivado)
+        warmup: instrucciones de warm-up en la CPU detallada tras restaurar
+        use_simpoints: simular solo los intervalos representativos de SimPoint
+        inproc_xml: generar el XML de McPAT en proceso (mcpat_xml) en vez de lanzar gem5toMcPAT
+        use_surrogate: descartar con un modelo sustituto las configuraciones dominadas con confianza
+        surrogate_data: CSV de resultados previos para entrenarlo (por defecto surrogate.TRAINING_FILES)
+        sh_budgets: presupuestos de instrucciones (--maxinsts) de successive halving antes de la corrida completa
+        sh_eta: en cada nivel de successive halving se promueve 1/eta de las configuraciones
+        screen_trajectories: trayectorias de Morris para fijar parámetros inertes antes del barrido (0 = desactivado)
+        screen_threshold: mu* relativo bajo el cual un parámetro se considera inerte
+        speculate: mejores configuraciones parciales sobre las que la fase siguiente
+                   arranca antes de que termine la actual (0 = fases secuenciales)
+        area_budget: área máxima en mm^2 (estimada con McPAT) para encolar una configuración
+        leakage_budget: leakage máximo en W (estimado con McPAT) para encolar una configuración
+        area_reference: (stats.txt, config.json) de referencia para el estimador; por
+                        defecto una corrida corta de la configuración base
+        co_workloads: claves de WORKLOADS; cada configuración es un candidato evaluado
+                      en todos ellos y se rankea por el EDP agregado (reemplaza a workload)
+        aggregation: geomean, weighted o worst (ver AGGREGATIONS)
+        weights: pesos de la suma ponderada, en el orden de co_workloads
+        abandon_margin: factor por el que un workload pendiente podría mejorar el mejor valor visto
         """
         self.workload = workload
+        self.jobs = jobs
+        self.post_jobs = post_jobs or max(1, jobs // 4)
+        self.cache = SimulationCache() if use_cache else None
+        self.mcpat_cache = SimulationCache(MCPAT_CACHE_DIR) if use_cache else None
+        self.mcpat_stats = {"hit": 0, "miss": 0}
+        self.resume = resume
+        self.fast_forward = fast_forward
+        self.warmup = warmup
+        self.checkpoints = {}
+        self.use_simpoints = use_simpoints
+        self.simpoint_dirs = {}
+        self.simpoint_errors = {}
+        self.inproc_xml = inproc_xml
+        self.use_surrogate = use_surrogate
+        self.surrogate_data = surrogate_data
+        self.surrogate = None
+        # Fases cuyos parámetros coinciden con las features del modelo sustituto
+        self.surrogate_phases = set()
+        self.surrogate_skipped = {"phase1": [], "phase2": [], "phase3": []}
+        self.sh_budgets = sorted(sh_budgets or [])
+        self.sh_eta = sh_eta
+        # Límite de instrucciones de las simulaciones en curso (0 = corrida completa)
+        self.max_insts = 0
+        self.screen_trajectories = screen_trajectories
+        self.screen_threshold = screen_threshold
+        self.speculate = speculate
+        self.area_budget = area_budget
+        self.leakage_budget = leakage_budget
+        self.area_reference = area_reference
+        self.area_estimator = None
+        self.area_rejected = {}
+        self.co_workloads = list(co_workloads or [])
+        self.aggregation = aggregation
+        total_weight = sum(weights) if weights else 0
+        self.weights = ({w: x / total_weight for w, x in zip(self.co_workloads, weights)}
+                        if total_weight else None)
+        self.abandon_margin = abandon_margin
+        # fase -> candidatos abandonados por quedar fuera de competencia
+        self.abandoned = {}
+        # Configuración base de la Fase 1: su EDP en cada workload normaliza los puntajes
+        self.reference_params = None
+        # Colas por fase y jobs en curso del pipeline de pools
+        self.queues = {}
+        self.in_flight = {}
+        self.discarded = set()
+        self.pipeline_total = 0
+        # fase -> nombres de los parámetros de sus jobs
+        self.phase_params = {}
+        self.journals = {}
         self.results = []
         self.phase_results = {"phase1": [], "phase2": [], "phase3": []}
+    
+    def __getstate__(self):
+        """Estado enviado a los workers: el modelo sustituto y el pipeline se quedan en el proceso principal"""
+        state = self.__dict__.copy()
+        state["surrogate"] = None
+        state["area_estimator"] = None
+        state["queues"] = {}
+        state["in_flight"] = {}
+        state["discarded"] = set()
+        return state
         
     def get_workload_config(self, workload_type):
         """Retorna la configuración según el workload"""
@@ -54,25 +177,89 @@ class DSEExplorer:
             return BIN_ENCODER, OPTS_ENCODER
         elif workload_type == "decoder":
             return BIN_DECODER, OPTS_DECODER
+        elif workload_type in WORKLOADS:
+            return WORKLOADS[workload_type]["bin"], WORKLOADS[workload_type]["opts"]
         else:
-            raise ValueError("workload_type debe ser 'encoder' o 'decoder'")
+            raise ValueError(f"workload_type debe ser 'encoder', 'decoder' o uno de {list(WORKLOADS)}")
+
+    def workloads(self):
+        """Workloads a simular en cada configuración"""
+        if self.co_workloads:
+            return self.co_workloads
+        return ["encoder", "decoder"] if self.workload == "both" else [self.workload]
     
-    def run_simulation(self, params, workload_type, tag_suffix=""):
-        """Ejecuta una simulación con los parámetros dados"""
+    def cache_key(self, params, workload_type, extra_key=None):
+        """Clave de la caché compartida para una simulación"""
         binary, opts = self.get_workload_config(workload_type)
+        if self.restores_fast_forward(workload_type):
+            params = {**params, **restore_key_params(self.fast_forward, self.warmup)}
+        if self.max_insts:
+            params = {**params, "maxinsts": self.max_insts}
+        if extra_key:
+            params = {**params, **extra_key}
+        return simulation_key(EXE, SCRIPT, binary, opts, params)
+
+    def prepare_checkpoints(self, workloads):
+        """Toma el checkpoint de fast-forward de cada workload (una sola vez)"""
+        if not self.fast_forward:
+            return
         
-        # Construir tag único
+        for workload_type in workloads:
+            if workload_type in self.checkpoints:
+                continue
+            binary, opts = self.get_workload_config(workload_type)
+            ckpt_dir = take_checkpoint(EXE, SCRIPT, binary, opts, workload_type,
+                                       self.fast_forward, self.warmup)
+            if ckpt_dir:
+                self.checkpoints[workload_type] = ckpt_dir
+            else:
+                print(f"Sin checkpoint para {workload_type}: se simula desde el inicio")
+
+    def restores_fast_forward(self, workload_type):
+        """
+        True si las simulaciones del workload restauran el checkpoint de
+        fast-forward. Los intervalos de SimPoint restauran su propio
+        checkpoint (tomado desde el inicio del programa), que lo reemplaza.
+        """
+        return workload_type in self.checkpoints and workload_type not in self.simpoint_dirs
+
+    def build_tag(self, params, workload_type, tag_suffix=""):
+        """Construye el tag único de una simulación"""
         tag_components = []
         for key, value in sorted(params.items()):
             tag_components.append(f"{key.upper()}_{value}")
         
-        tag = f"{workload_type}_{'_'.join(tag_components)}{tag_suffix}"
+        return f"{workload_type}_{'_'.join(tag_components)}{tag_suffix}"
+
+    def run_simulation(self, params, workload_type, tag_suffix="", extra_args=None, extra_key=None):
+        """
+        Ejecuta una simulación con los parámetros dados.
+        extra_args: argumentos adicionales de gem5 (p.ej. restore de un intervalo SimPoint)
+        extra_key: parámetros adicionales para la clave de caché
+        """
+        binary, opts = self.get_workload_config(workload_type)
+        
+        # Construir tag único
+        tag = self.build_tag(params, workload_type, tag_suffix)
+        
+        if self.cache:
+            sim_key = self.cache_key(params, workload_type, extra_key)
+            if self.cache.fetch(sim_key, {STATS_ARTIFACT: f"stats_{tag}.txt",
+                                      CONFIG_ARTIFACT: f"config_{tag}.json"}):
+                print(f"[CACHE] {tag}")
+                return tag
+        
         print(f"Ejecutando simulación: {tag}")
         
-        # Construir comando gem5
+        # Cada job corre en sandbox/<tag>: m5out/ y las salidas del codec
+        # (compressed.j2k, image.pgm) no chocan entre jobs paralelos
+        sandbox = prepare_sandbox(tag)
+        outdir = os.path.join(sandbox, "m5out")
+        
+        # Construir comando gem5 (rutas absolutas: gem5 corre dentro del sandbox)
         cmd = [
-            EXE, SCRIPT,
-            "-c", binary,
+            os.path.abspath(EXE), "--outdir=m5out", os.path.abspath(SCRIPT),
+            "-c", os.path.abspath(binary),
             "-o", opts
         ]
         
@@ -80,12 +267,31 @@ class DSEExplorer:
         for key, value in params.items():
             cmd.append(f"--{key}={value}")
         
+        # Restaurar desde el checkpoint compartido del workload
+        if self.restores_fast_forward(workload_type):
+            cmd.extend(restore_args(self.checkpoints[workload_type], self.fast_forward, self.warmup))
+        
+        # Corrida de baja fidelidad (successive halving)
+        if self.max_insts:
+            cmd.append(f"--maxinsts={self.max_insts}")
+        
+        if extra_args:
+            cmd.extend(extra_args)
+        
         try:
-            subprocess.run(" ".join(cmd), shell=True, check=True)
+            subprocess.run(" ".join(cmd), shell=True, check=True, cwd=sandbox)
             
             # Renombrar archivos de salida
-            os.rename("m5out/stats.txt", f"stats_{tag}.txt")
-            os.rename("m5out/config.json", f"config_{tag}.json")
+            os.rename(os.path.join(outdir, "stats.txt"), f"stats_{tag}.txt")
+            os.rename(os.path.join(outdir, "config.json"), f"config_{tag}.json")
+            
+            # Con warm-up el core medido es system.switch_cpus_1
+            if self.restores_fast_forward(workload_type) and self.warmup:
+                normalize_switched_stats(f"stats_{tag}.txt")
+            
+            if self.cache:
+                self.cache.store(sim_key, {STATS_ARTIFACT: f"stats_{tag}.txt",
+                                       CONFIG_ARTIFACT: f"config_{tag}.json"})
             
             return tag
             
@@ -93,12 +299,20 @@ class DSEExplorer:
             print(f"Error en simulación {tag}: {e}")
             return None
 
-    def generar_xml_mcpat(self, tag, template_xml="scripts/McPAT/ARM_A76_2.1GHz.xml"):
+    def generar_xml_mcpat(self, tag, template_xml=MCPAT_TEMPLATE):
         """Genera archivo XML para McPAT"""
         stats_file = f"stats_{tag}.txt"
         config_file = f"config_{tag}.json"
         xml_output = f"config_{tag}.xml"
-        convert_script = "scripts/McPAT/gem5toMcPAT_cortexA76.py"
+        convert_script = CONVERT_SCRIPT
+        
+        if self.inproc_xml:
+            # Template parseado una vez por proceso y reutilizado entre jobs
+            try:
+                return mcpat_xml.convert(stats_file, config_file, template_xml, xml_output)
+            except (OSError, ValueError) as e:
+                print(f"Error generando XML McPAT para {tag}: {e}")
+                return None
         
         cmd = ["python3", convert_script, stats_file, config_file, template_xml]
         
@@ -110,35 +324,655 @@ class DSEExplorer:
             print(f"Error generando XML McPAT para {tag}: {e}")
             return None
 
-    def ejecutar_mcpat(self, xml_file, tag, mcpat_exec="./mcpat/mcpat"):
+    def ejecutar_mcpat(self, xml_file, tag, mcpat_exec=MCPAT_EXEC):
         """Ejecuta McPAT para análisis de potencia"""
         salida_mcpat = f"mcpat_{tag}.txt"
         cmd = [mcpat_exec, "-infile", xml_file, "-print_level", "1"]
         
+        # XML equivalentes producen el mismo reporte: se reutiliza sin correr McPAT
+        if self.mcpat_cache:
+            xml_key = mcpat_key(xml_file, mcpat_exec)
+            if self.mcpat_cache.fetch(xml_key, {MCPAT_ARTIFACT: salida_mcpat}):
+                return salida_mcpat
+        
         try:
             with open(salida_mcpat, "w") as fout:
                 subprocess.run(cmd, check=True, stdout=fout)
+            if self.mcpat_cache:
+                self.mcpat_cache.store(xml_key, {MCPAT_ARTIFACT: salida_mcpat})
             return salida_mcpat
         except subprocess.CalledProcessError as e:
             print(f"Error ejecutando McPAT para {tag}: {e}")
             return None
 
+    def obtener_mcpat(self, tag, sim_key):
+        """gem5toMcPAT + McPAT; la salida se cachea junto a la simulación"""
+        mcpat_file = f"mcpat_{tag}.txt"
+        converter = mcpat_xml.__file__ if self.inproc_xml else CONVERT_SCRIPT
+        artifact = mcpat_artifact(MCPAT_TEMPLATE, converter, MCPAT_EXEC)
+        
+        if self.cache and self.cache.fetch(sim_key, {artifact: mcpat_file}):
+            return mcpat_file
+        
+        xml_file = self.generar_xml_mcpat(tag)
+        mcpat_file = self.ejecutar_mcpat(xml_file, tag) if xml_file else None
+        if self.cache and mcpat_file:
+            self.cache.store(sim_key, {artifact: mcpat_file})
+        return mcpat_file
+
+    def evaluate_config(self, params, workload_type, tag_suffix="", phase=1):
+        """Job completo: gem5 + gem5toMcPAT + McPAT + extracción de métricas"""
+        if workload_type in self.simpoint_dirs:
+            return self.evaluate_config_simpoints(params, workload_type, tag_suffix, phase)
+        
+        tag = self.run_simulation(params, workload_type, tag_suffix)
+        if not tag:
+            return None
+        
+        return self.postprocess(tag, params, workload_type, phase)
+
+    def postprocess(self, tag, params, workload_type, phase=1):
+        """Post-procesamiento de una simulación: gem5toMcPAT + McPAT + métricas"""
+        key = self.cache_key(params, workload_type) if self.cache else None
+        mcpat_hits = self.mcpat_cache.hits if self.mcpat_cache else 0
+        mcpat_misses = self.mcpat_cache.misses if self.mcpat_cache else 0
+        mcpat_file = self.obtener_mcpat(tag, key)
+        
+        metrics = self.extraer_metricas(f"stats_{tag}.txt", mcpat_file)
+        
+        result = {
+            "tag": tag,
+            "workload": workload_type,
+            "phase": phase,
+            **params,
+            **metrics
+        }
+        
+        # El job puede correr en otro proceso: el uso de la caché de McPAT viaja en el resultado
+        if self.mcpat_cache:
+            if self.mcpat_cache.hits > mcpat_hits:
+                result["_mcpat_cache"] = "hit"
+            elif self.mcpat_cache.misses > mcpat_misses:
+                result["_mcpat_cache"] = "miss"
+        
+        return result
+
+    def get_journal(self, phase):
+        """Journal de jobs completados de una fase"""
+        if phase not in self.journals:
+            self.journals[phase] = CampaignJournal(f"dse_jpeg2k_{phase}_journal.jsonl",
+                                                   resume=self.resume)
+        return self.journals[phase]
+
+    def record_result(self, phase, result):
+        """Agrega un resultado a la fase y lo registra en el journal"""
+        mcpat_cache = result.pop("_mcpat_cache", None)
+        if mcpat_cache:
+            self.mcpat_stats[mcpat_cache] += 1
+        
+        self.phase_results[phase].append(result)
+        self.get_journal(phase).append(result["tag"], result)
+        
+        if self.co_workloads and phase in self.queues:
+            self.abandon_candidates(phase)
+        
+        # El modelo sustituto se reentrena a medida que llegan resultados reales
+        # (solo corridas completas: las de baja fidelidad tienen otro CPI)
+        if self.surrogate and not self.max_insts and phase in self.surrogate_phases:
+            self.surrogate.add(result)
+
+    def record_failure(self, phase, tag, error):
+        """Registra en el journal un job que falló (se reintenta con --resume)"""
+        self.get_journal(phase).append_failure(tag, error)
+
+    def prepare_simpoints(self, workloads, baseline_params=None):
+        """
+        Prepara SimPoints (BBV, clustering, checkpoints) de cada workload.
+        Con baseline_params se corre además esa configuración completa y
+        muestreada para estimar el error de la reconstrucción.
+        """
+        if not self.use_simpoints:
+            return
+        
+        for workload_type in workloads:
+            if workload_type in self.simpoint_dirs:
+                continue
+            binary, opts = self.get_workload_config(workload_type)
+            try:
+                ckpt_dir = simpoints.prepare_workload(EXE, binary, opts, workload_type)
+            except subprocess.CalledProcessError as e:
+                print(f"Error preparando SimPoints de {workload_type}: {e}")
+                continue
+            
+            if not simpoints.list_checkpoints(ckpt_dir):
+                print(f"Sin checkpoints SimPoint para {workload_type}: se simula completo")
+                continue
+            
+            if baseline_params:
+                full = self.evaluate_config(baseline_params, workload_type, "_baseline")
+                self.simpoint_dirs[workload_type] = ckpt_dir
+                sampled = self.evaluate_config(baseline_params, workload_type, "_baseline")
+                if full and sampled:
+                    self.simpoint_errors[workload_type] = simpoints.relative_errors(sampled, full)
+                    print(f"Error SimPoint vs corrida completa ({workload_type}): "
+                          f"{self.simpoint_errors[workload_type]}")
+            else:
+                self.simpoint_dirs[workload_type] = ckpt_dir
+
+    def evaluate_config_simpoints(self, params, workload_type, tag_suffix="", phase=1):
+        """Evalúa una configuración simulando solo los intervalos de SimPoint"""
+        ckpt_dir = self.simpoint_dirs[workload_type]
+        tag = self.build_tag(params, workload_type, tag_suffix)
+        
+        intervals = []
+        for restore_index, simpoint_id, weight in simpoints.list_checkpoints(ckpt_dir):
+            sp_tag = self.run_simulation(params, workload_type, f"{tag_suffix}_sp{simpoint_id}",
+                                         extra_args=simpoints.restore_args(ckpt_dir, restore_index),
+                                         extra_key={"_simpoint": simpoint_id, "_simpoint_dir": ckpt_dir})
+            if not sp_tag:
+                continue
+            
+            key = (self.cache_key(params, workload_type,
+                                  {"_simpoint": simpoint_id, "_simpoint_dir": ckpt_dir})
+                   if self.cache else None)
+            mcpat_file = self.obtener_mcpat(sp_tag, key)
+            
+            interval = self.extraer_metricas(f"stats_{sp_tag}.txt", mcpat_file)
+            interval["weight"] = weight
+            intervals.append(interval)
+        
+        metrics = simpoints.reconstruct(intervals)
+        if not metrics:
+            return None
+        
+        if metrics['cpi'] and metrics['runtime_dynamic'] and metrics['total_leakage']:
+            metrics['energy'] = (metrics['total_leakage'] + metrics['runtime_dynamic']) * metrics['cpi']
+            metrics['edp'] = metrics['energy'] * metrics['cpi']
+        
+        return {
+            "tag": tag,
+            "workload": workload_type,
+            "phase": phase,
+            **params,
+            **metrics,
+            **self.simpoint_errors.get(workload_type, {})
+        }
+
+    def run_jobs(self, jobs, phase):
+        """
+        Ejecuta una lista de jobs (params, workload_type, tag_suffix) y agrega
+        los resultados a phase_results[phase] a medida que terminan.
+        Con self.jobs > 1 las simulaciones gem5 corren en un pool de procesos
+        y el post-procesamiento (gem5toMcPAT + McPAT) en un pool aparte, de
+        modo que gem5 nunca espera a McPAT. Con el modelo sustituto activo,
+        los jobs dominados con confianza se descartan antes de enviarse.
+        """
+        phase_num = int(re.match(r"phase(\d+)", phase).group(1))
+        self.queues = {}
+        self.pipeline_total = 0
+        self.enqueue(phase, jobs)
+        
+        if self.jobs <= 1:
+            while True:
+                # El abandono de candidatos (co-optimización) puede reemplazar la cola
+                job = self.next_job(self.queues[phase], phase)
+                if job is None:
+                    break
+                params, workload_type, tag_suffix = job
+                tag = self.build_tag(params, workload_type, tag_suffix)
+                # Igual que en el pipeline: una configuración fallida no detiene la campaña
+                error = None
+                try:
+                    result = self.evaluate_config(params, workload_type, tag_suffix, phase_num)
+                except Exception as e:
+                    print(f"Error en job {tag}: {e}")
+                    result = None
+                    error = e
+                if result:
+                    self.record_result(phase, result)
+                else:
+                    self.record_failure(phase, tag, error or "sin resultado")
+            self.save_surrogate_skipped(phase)
+            return
+        
+        print(f"Ejecutando {len(self.queues[phase])} jobs: {self.jobs} workers gem5, {self.post_jobs} workers McPAT")
+        self.run_pipeline()
+        self.save_surrogate_skipped(phase)
+
+    def enqueue(self, phase, jobs):
+        """
+        Agrega jobs a la cola de una fase. Los ya registrados en el journal no
+        se vuelven a ejecutar: su resultado se toma de ahí.
+        """
+        self.phase_results.setdefault(phase, [])
+        self.surrogate_skipped.setdefault(phase, [])
+        if jobs:
+            self.phase_params.setdefault(phase, list(jobs[0][0]))
+        journal = self.get_journal(phase)
+        
+        pending = []
+        for params, workload_type, tag_suffix in jobs:
+            tag = self.build_tag(params, workload_type, tag_suffix)
+            if journal.is_done(tag):
+                self.phase_results[phase].append(journal.records[tag])
+            else:
+                pending.append((params, workload_type, tag_suffix))
+        
+        if len(pending) < len(jobs):
+            print(f"[JOURNAL] {len(jobs) - len(pending)} jobs ya completados, {len(pending)} pendientes")
+        
+        if self.area_estimator and pending:
+            pending = self.area_filter(pending, phase)
+        if self.use_surrogate and pending:
+            pending = self.prepare_surrogate(pending, phase)
+        self.queues.setdefault(phase, deque()).extend(pending)
+        self.pipeline_total += len(pending)
+
+    def run_pipeline(self, on_progress=None):
+        """
+        Ejecuta los jobs de self.queues con un pool de gem5 y otro de McPAT.
+        Un worker gem5 libre toma el siguiente job de la primera fase (en el
+        orden de self.queues) que tenga jobs pendientes, así las fases
+        posteriores solo ocupan workers que las anteriores ya no usan.
+        on_progress(): se llama tras cada job terminado; puede encolar jobs
+        (enqueue) o cancelarlos (cancel_jobs).
+        """
+        self.in_flight = {}
+        self.discarded = set()
+        done = 0
+        
+        with ProcessPoolExecutor(max_workers=self.jobs) as sim_pool, \
+                ProcessPoolExecutor(max_workers=self.post_jobs) as post_pool:
+            
+            def fill():
+                """Envía jobs no descartados al pool de gem5 hasta ocupar todos sus workers"""
+                busy = sum(1 for _, _, _, sim_worker in self.in_flight.values() if sim_worker)
+                while busy < self.jobs:
+                    for phase, queue in self.queues.items():
+                        job = self.next_job(queue, phase)
+                        if job is not None:
+                            break
+                    else:
+                        return
+                    params, workload_type, tag_suffix = job
+                    phase_num = int(re.match(r"phase(\d+)", phase).group(1))
+                    if workload_type in self.simpoint_dirs:
+                        # Varias simulaciones por configuración: el job completo va al pool de gem5
+                        future = sim_pool.submit(self.evaluate_config, params, workload_type, tag_suffix, phase_num)
+                        self.in_flight[future] = ("post", phase, job, True)
+                    else:
+                        future = sim_pool.submit(self.run_simulation, params, workload_type, tag_suffix)
+                        self.in_flight[future] = ("sim", phase, job, True)
+                    busy += 1
+            
+            # Los jobs se envían a medida que se liberan workers, así el
+            # descarte por modelo sustituto ve los resultados más recientes
+            fill()
+            
+            # futuro -> (etapa, fase, job, ocupa un worker gem5); etapa "sim" produce un tag, "post" un resultado
+            while self.in_flight:
+                finished, _ = wait(self.in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, phase, job, _ = self.in_flight.pop(future)
+                    if future in self.discarded:
+                        self.discarded.discard(future)
+                        continue
+                    params, workload_type, tag_suffix = job
+                    tag = self.build_tag(params, workload_type, tag_suffix)
+                    error = None
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        print(f"Error en job {tag}: {e}")
+                        value = None
+                        error = e
+                    
+                    if stage == "sim" and value:
+                        phase_num = int(re.match(r"phase(\d+)", phase).group(1))
+                        post = post_pool.submit(self.postprocess, value, params, workload_type, phase_num)
+                        self.in_flight[post] = ("post", phase, job, False)
+                        continue
+                    
+                    done += 1
+                    if value:
+                        self.record_result(phase, value)
+                    else:
+                        self.record_failure(phase, tag, error or "sin resultado")
+                    print(f"[{done}/{self.pipeline_total}] {tag}")
+                
+                if on_progress:
+                    on_progress()
+                fill()
+
+    def cancel_jobs(self, phase, predicate):
+        """
+        Cancela los jobs de una fase que cumplen predicate(job): los que están
+        en cola o aún no empezaron no se ejecutan, y el resultado de los que
+        ya están corriendo se ignora. Retorna (cancelados, descartados en curso).
+        """
+        queue = self.queues.get(phase, deque())
+        kept = deque(job for job in queue if not predicate(job))
+        cancelled = len(queue) - len(kept)
+        self.queues[phase] = kept
+        
+        running = 0
+        for future, (_, job_phase, job, _) in self.in_flight.items():
+            if job_phase != phase or future in self.discarded or not predicate(job):
+                continue
+            self.discarded.add(future)
+            if future.cancel():
+                cancelled += 1
+            else:
+                running += 1
+        self.pipeline_total -= cancelled + running
+        return cancelled, running
+
+    def phase_active(self, phase):
+        """True si la fase tiene jobs en cola o en curso"""
+        return bool(self.queues.get(phase)) or any(
+            job_phase == phase and future not in self.discarded
+            for future, (_, job_phase, _, _) in self.in_flight.items())
+
+    def screen_parameters(self, base_params, grids, phase):
+        """
+        Screening de Morris: simula screen_trajectories trayectorias por
+        workload, estima la influencia de cada parámetro en CPI, energía y
+        EDP, y fija los parámetros inertes en su valor de la mejor corrida
+        (menor EDP) del screening. Retorna las grillas reducidas y guarda el ranking de
+        importancia en dse_jpeg2k_<fase>_sensitivity.csv.
+        """
+        from design_space import DesignSpace
+        import sensitivity
+        
+        threshold = self.screen_threshold if self.screen_threshold is not None else sensitivity.INERT_THRESHOLD
+        spaces = {w: DesignSpace(grid) for w, grid in grids.items()}
+        trajectories = {w: sensitivity.morris_trajectories(space, self.screen_trajectories)
+                        for w, space in spaces.items()}
+        
+        # Trayectorias distintas pueden repetir configuraciones: un job por tag
+        jobs = {}
+        for workload_type, workload_trajectories in trajectories.items():
+            for trajectory in workload_trajectories:
+                for config in trajectory:
+                    params = {**base_params, **config}
+                    jobs.setdefault(self.build_tag(params, workload_type, f"_{phase}"),
+                                    (params, workload_type, f"_{phase}"))
+        
+        screen_phase = f"{phase}_screen"
+        print(f"\n--- Screening de Morris: {len(jobs)} simulaciones "
+              f"({self.screen_trajectories} trayectorias por workload) ---")
+        self.run_jobs(list(jobs.values()), screen_phase)
+        
+        reports = {}
+        reduced = {}
+        for workload_type, space in spaces.items():
+            results = {space.index_of({name: r[name] for name in space.names}): r
+                       for r in self.phase_results[screen_phase] if r["workload"] == workload_type}
+            indices = sensitivity.elementary_effects(space, trajectories[workload_type], results)
+            inert = sensitivity.inert_parameters(indices, threshold)
+            reports[workload_type] = indices
+            reduced[workload_type] = dict(grids[workload_type])
+            for name in inert:
+                reduced[workload_type][name] = [self.best_screened_value(
+                    name, grids[workload_type][name], results.values())]
+            
+            print(f"\n{workload_type}: importancia por EDP (mu* relativo)")
+            for name in sensitivity.ranking(indices, "edp"):
+                value = indices[name]["edp"]["mu_star_rel"]
+                value_text = f"{value:.4f}" if value is not None else "N/A"
+                if name in inert:
+                    value_text += f"  (inerte, fijado en {reduced[workload_type][name][0]})"
+                print(f"  {name}: {value_text}")
+            before = len(list(product(*grids[workload_type].values())))
+            after = len(list(product(*reduced[workload_type].values())))
+            print(f"  Grilla: {before} -> {after} configuraciones")
+        
+        filename = f"dse_jpeg2k_{phase}_sensitivity.csv"
+        sensitivity.write_report(filename, reports, threshold)
+        print(f"Reporte de sensibilidad guardado en {filename}")
+        return reduced
+
+    def best_screened_value(self, name, values, results):
+        """Valor de un parámetro en la corrida de menor EDP del screening (el primero si no hay datos)"""
+        valid = [r for r in results if r.get("edp") is not None and r.get(name) in values]
+        return min(valid, key=lambda r: r["edp"])[name] if valid else values[0]
+
+    def run_successive_halving(self, jobs, phase):
+        """
+        Successive halving: todas las configuraciones corren primero con el
+        menor presupuesto de instrucciones (--maxinsts), se ordenan por EDP
+        y solo el mejor 1/eta de cada workload pasa al siguiente presupuesto;
+        las finalistas corren completas y quedan en phase_results[phase].
+        Reporta la correlación de Spearman de cada nivel con el ranking final.
+        """
+        candidates = jobs
+        rung_results = []
+        
+        for budget in self.sh_budgets + [0]:
+            # La corrida completa usa la fase, tags y journal normales
+            rung = f"{phase}_sh{budget}" if budget else phase
+            suffix = f"_sh{budget}" if budget else ""
+            label = f"{budget} instrucciones" if budget else "completa"
+            print(f"\n--- Successive halving: {len(candidates)} configuraciones, {label} ---")
+            
+            self.max_insts = budget
+            self.run_jobs([(params, workload_type, tag_suffix + suffix)
+                           for params, workload_type, tag_suffix in candidates], rung)
+            self.max_insts = 0
+            
+            scores = {}
+            for result in self.phase_results[rung]:
+                if result.get("edp") is not None:
+                    config_id = self.build_tag({k: result[k] for k in jobs[0][0]}, result["workload"])
+                    scores[config_id] = result["edp"]
+            rung_results.append((label, scores))
+            
+            if not budget:
+                break
+            candidates = self.promote(candidates, scores)
+        
+        self.report_fidelity_correlation(phase, rung_results)
+
+    def promote(self, jobs, scores):
+        """Mejor 1/eta (por EDP) de cada workload"""
+        promoted = []
+        for workload_type in dict.fromkeys(w for _, w, _ in jobs):
+            ranked = [job for job in jobs if job[1] == workload_type
+                      and self.build_tag(job[0], workload_type) in scores]
+            ranked.sort(key=lambda job: scores[self.build_tag(job[0], workload_type)])
+            promoted.extend(ranked[:max(1, ceil(len(ranked) / self.sh_eta))])
+        return promoted
+
+    def report_fidelity_correlation(self, phase, rung_results):
+        """Spearman entre el ranking de cada presupuesto y el de las corridas completas"""
+        _, final_scores = rung_results[-1]
+        rows = []
+        print("\n=== Correlación de rankings con la corrida completa ===")
+        for label, scores in rung_results[:-1]:
+            common = [c for c in final_scores if c in scores]
+            rho = spearman([scores[c] for c in common], [final_scores[c] for c in common])
+            rows.append({"presupuesto": label, "configuraciones": len(scores),
+                         "comunes_con_final": len(common), "spearman": rho})
+            rho_text = f"{rho:.3f}" if rho is not None else "N/A"
+            print(f"  {label}: rho={rho_text} sobre {len(common)} finalistas")
+        
+        if rows:
+            filename = f"dse_jpeg2k_{phase}_sh_correlation.csv"
+            with open(filename, "w", newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Correlaciones guardadas en {filename}")
+
+    def prepare_surrogate(self, jobs, phase):
+        """
+        Entrena el modelo sustituto (una vez) y ordena los jobs de la fase
+        por EDP predicho, de modo que los prometedores corran primero y
+        sirvan de referencia para descartar los dominados.
+        """
+        if self.surrogate is None:
+            from surrogate import SurrogateModel, load_training_files, TRAINING_FILES
+            features = sorted(jobs[0][0]) + ["workload"]
+            rows = load_training_files(self.surrogate_data or TRAINING_FILES)
+            # Resultados ya registrados en los journals de esta campaña
+            for results in self.phase_results.values():
+                rows.extend(results)
+            self.surrogate = SurrogateModel(features, rows)
+        
+        if self.surrogate.features != sorted(jobs[0][0]) + ["workload"]:
+            print(f"[SURROGATE] {phase} explora parámetros distintos a los del modelo: se simulan todos sus jobs")
+            return jobs
+        self.surrogate_phases.add(phase)
+        
+        if not self.surrogate.ready():
+            print("[SURROGATE] Pocos datos de entrenamiento: se simulan todos los jobs")
+            return jobs
+        
+        # Todos los jobs de la fase en una sola pasada por el bosque
+        edps = self.surrogate.predicted_edp([{**params, "workload": workload_type}
+                                             for params, workload_type, _ in jobs])
+        order = sorted(range(len(jobs)), key=lambda i: edps[i] if edps[i] is not None else float("inf"))
+        return [jobs[i] for i in order]
+
+    def next_job(self, queue, phase):
+        """Siguiente job de la cola que el modelo sustituto no descarta"""
+        while queue:
+            job = queue.popleft()
+            if not self.surrogate or not self.surrogate.ready() or phase not in self.surrogate_phases:
+                return job
+            params, workload_type, tag_suffix = job
+            row = {**params, "workload": workload_type}
+            if not self.surrogate.has_bound(row):
+                # Cotas de toda la cola en una pasada (se recalculan tras cada reentrenamiento)
+                self.surrogate.optimistic([row] + [{**p, "workload": w} for p, w, _ in queue])
+            bound = self.surrogate.optimistic([row])[0]
+            reference = [r for r in self.phase_results[phase] if r.get("workload") == workload_type]
+            dominating = self.surrogate.dominated_by(bound, reference)
+            if dominating is None:
+                return job
+            tag = self.build_tag(params, workload_type, tag_suffix)
+            print(f"[SURROGATE] Descartado {tag}: dominado por {dominating['tag']}")
+            self.surrogate_skipped[phase].append({
+                "tag": tag, "workload": workload_type, **params,
+                "cpi_optimista": bound["cpi"], "energy_optimista": bound["energy"],
+                "dominado_por": dominating["tag"]
+            })
+        return None
+
+    def prepare_area_filter(self, workload_type, baseline_params):
+        """
+        Prepara el estimador de área/leakage a partir de la corrida de
+        referencia (area_reference o una corrida corta de la configuración base)
+        """
+        if (self.area_budget is None and self.leakage_budget is None) or self.area_estimator:
+            return
+        from area_model import AreaEstimator
+        
+        if self.area_reference:
+            stats_file, config_file = self.area_reference
+        else:
+            self.max_insts = AREA_REFERENCE_INSTS
+            tag = self.run_simulation(baseline_params, workload_type, "_area_ref")
+            self.max_insts = 0
+            if not tag:
+                print("[AREA] Sin corrida de referencia: no se filtra por área/leakage")
+                return
+            stats_file, config_file = f"stats_{tag}.txt", f"config_{tag}.json"
+        
+        self.area_estimator = AreaEstimator(stats_file, config_file, MCPAT_TEMPLATE, MCPAT_EXEC,
+                                            use_cache=self.cache is not None)
+
+    def over_budget(self, estimate):
+        """Motivo por el que una estimación excede el presupuesto ("" si no lo excede o no hay estimación)"""
+        if not estimate:
+            return ""
+        reasons = []
+        if self.area_budget is not None and estimate["area"] is not None \
+                and estimate["area"] > self.area_budget:
+            reasons.append(f"área {estimate['area']:.2f} > {self.area_budget} mm^2")
+        if self.leakage_budget is not None and estimate["total_leakage"] is not None \
+                and estimate["total_leakage"] > self.leakage_budget:
+            reasons.append(f"leakage {estimate['total_leakage']:.3f} > {self.leakage_budget} W")
+        return "; ".join(reasons)
+
+    def area_filter(self, jobs, phase):
+        """
+        Estima con McPAT (sin gem5) el área y leakage de cada configuración y
+        descarta, antes de encolarlos, los jobs que exceden el presupuesto
+        """
+        estimates = self.area_estimator.estimate_many([params for params, _, _ in jobs],
+                                                      workers=self.post_jobs)
+        kept = []
+        rejected = self.area_rejected.setdefault(phase, [])
+        for job, estimate in zip(jobs, estimates):
+            params, workload_type, tag_suffix = job
+            reason = self.over_budget(estimate)
+            if not reason:
+                kept.append(job)
+                continue
+            rejected.append({"tag": self.build_tag(params, workload_type, tag_suffix),
+                             "workload": workload_type, **params,
+                             "area_estimada": estimate["area"],
+                             "leakage_estimado": estimate["total_leakage"], "motivo": reason})
+        
+        if len(kept) < len(jobs):
+            print(f"[AREA] {len(jobs) - len(kept)} de {len(jobs)} jobs de {phase} exceden el presupuesto")
+        self.save_area_estimates(phase)
+        return kept
+
+    def save_area_estimates(self, phase):
+        """Guarda las estimaciones de área/leakage y los jobs rechazados de la fase"""
+        rows = []
+        for key, estimate in self.area_estimator.estimates.items():
+            rows.append({**json.loads(key), **(estimate or {"area": None, "total_leakage": None}),
+                         "dentro_presupuesto": "NO" if self.over_budget(estimate) else "YES"})
+        fieldnames = []
+        for row in rows:
+            fieldnames += [k for k in row if k not in fieldnames]
+        with open("dse_jpeg2k_area_estimates.csv", "w", newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        
+        rejected = self.area_rejected.get(phase)
+        if rejected:
+            filename = f"dse_jpeg2k_{phase}_area_rejected.csv"
+            with open(filename, "w", newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=list(rejected[0].keys()))
+                writer.writeheader()
+                writer.writerows(rejected)
+
+    def save_surrogate_skipped(self, phase):
+        """Guarda los jobs descartados por el modelo sustituto"""
+        skipped = self.surrogate_skipped[phase]
+        if not skipped:
+            return
+        filename = f"dse_jpeg2k_{phase}_skipped.csv"
+        with open(filename, "w", newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=list(skipped[0].keys()))
+            writer.writeheader()
+            writer.writerows(skipped)
+        print(f"[SURROGATE] {len(skipped)} jobs descartados sin simular ({filename})")
+
     def extraer_metricas(self, stats_file, mcpat_file):
         """Extrae métricas de performance y energía"""
         metrics = {}
         
+        # Una sola pasada sobre stats.txt para todas las métricas
+        stats = self.leer_stats(stats_file, METRIC_STATS)
+        
         # CPI desde stats
-        metrics['cpi'] = self.extraer_cpi(stats_file)
+        metrics['cpi'] = stats.get(STAT_CPI)
         
         # IPC calculado
         metrics['ipc'] = 1.0 / metrics['cpi'] if metrics['cpi'] else None
         
         # Cache miss rates específicos para JPEG2000
-        metrics['l1d_miss_rate'] = self.extraer_cache_miss_rate(stats_file, "system.cpu.dcache.overall_miss_rate::total")
-        metrics['l2_miss_rate'] = self.extraer_cache_miss_rate(stats_file, "system.l2.overall_miss_rate::total")
+        metrics['l1d_miss_rate'] = stats.get(STAT_L1D_MISS_RATE)
+        metrics['l2_miss_rate'] = stats.get(STAT_L2_MISS_RATE)
         
         # Utilización de unidades funcionales (importante para JPEG2000)
-        metrics['intalu_utilization'] = self.extraer_fu_utilization(stats_file, "system.cpu.fuPool.IntALU")
+        metrics['intalu_utilization'] = stats.get(STAT_INTALU_UTILIZATION)
         
         # Potencia desde McPAT
         if mcpat_file:
@@ -152,38 +986,25 @@ class DSEExplorer:
         
         return metrics
 
+    def leer_stats(self, stats_file, keys):
+        """Lee las estadísticas pedidas en una sola pasada ({} si el archivo no existe)"""
+        try:
+            return parse_stats(stats_file, keys=keys)
+        except FileNotFoundError:
+            return {}
+
     def extraer_cpi(self, stats_file):
         """Extrae CPI del archivo de estadísticas"""
-        try:
-            with open(stats_file, "r") as f:
-                for line in f:
-                    if "system.cpu.cpi" in line and not line.strip().startswith("#"):
-                        return float(line.split()[1])
-        except (FileNotFoundError, ValueError):
-            pass
-        return None
+        return self.leer_stats(stats_file, [STAT_CPI]).get(STAT_CPI)
 
     def extraer_cache_miss_rate(self, stats_file, stat_name):
         """Extrae cache miss rate específico"""
-        try:
-            with open(stats_file, "r") as f:
-                for line in f:
-                    if stat_name in line and not line.strip().startswith("#"):
-                        return float(line.split()[1])
-        except (FileNotFoundError, ValueError):
-            pass
-        return None
+        return self.leer_stats(stats_file, [stat_name]).get(stat_name)
 
     def extraer_fu_utilization(self, stats_file, fu_prefix):
         """Extrae utilización de unidades funcionales"""
-        try:
-            with open(stats_file, "r") as f:
-                for line in f:
-                    if f"{fu_prefix}_utilization" in line and not line.strip().startswith("#"):
-                        return float(line.split()[1])
-        except (FileNotFoundError, ValueError):
-            pass
-        return None
+        stat_name = f"{fu_prefix}_utilization"
+        return self.leer_stats(stats_file, [stat_name]).get(stat_name)
 
     def extraer_runtime_dynamic(self, mcpat_file):
         """Extrae potencia dinámica de McPAT"""
@@ -217,6 +1038,19 @@ class DSEExplorer:
 
     def run_phase1_cache_exploration(self):
         """Fase 1: Exploración de jerarquía de cache"""
+        jobs = self.phase1_jobs()
+        
+        if self.sh_budgets:
+            self.run_successive_halving(jobs, "phase1")
+        else:
+            self.run_jobs(jobs, "phase1")
+        
+        # Guardar resultados de Fase 1
+        self.save_phase_results("phase1")
+        return self.find_best_cache_config()
+
+    def phase1_jobs(self):
+        """Prepara checkpoints/SimPoints/screening y retorna los jobs de la Fase 1"""
         print("=== FASE 1: Exploración de Cache Hierarchy ===")
         
         base_params = {
@@ -227,51 +1061,332 @@ class DSEExplorer:
             "decode_width": DECODE_WIDTH_FIXED
         }
         
-        # Generar todas las combinaciones de cache
-        cache_combinations = list(product(
-            L1D_SIZES_PHASE1, L1D_ASSOCS_PHASE1,
-            L2_SIZES_PHASE1, L2_ASSOCS_PHASE1
-        ))
+        workloads = self.workloads()
         
-        print(f"Total configuraciones Fase 1: {len(cache_combinations)}")
+        # Valores a barrer por workload (el screening puede fijar los inertes)
+        grids = {workload_type: {
+            "l1d_size": L1D_SIZES_PHASE1,
+            "l1d_assoc": L1D_ASSOCS_PHASE1,
+            "l2_size": L2_SIZES_PHASE1,
+            "l2_assoc": L2_ASSOCS_PHASE1
+        } for workload_type in workloads}
         
-        workloads = ["encoder", "decoder"] if self.workload == "both" else [self.workload]
+        print(f"Total configuraciones Fase 1: {len(list(product(*grids[workloads[0]].values())))}")
         
+        self.prepare_checkpoints(workloads)
+        baseline = {**base_params, **{name: values[0] for name, values in grids[workloads[0]].items()}}
+        self.prepare_simpoints(workloads, baseline_params=baseline)
+        self.prepare_area_filter(workloads[0], baseline)
+        self.reference_params = baseline
+        if self.screen_trajectories:
+            grids = self.screen_parameters(base_params, grids, "phase1")
+        
+        jobs = []
         for workload_type in workloads:
-            for l1d_size, l1d_assoc, l2_size, l2_assoc in cache_combinations:
+            grid = grids[workload_type]
+            for values in product(*grid.values()):
                 params = base_params.copy()
-                params.update({
-                    "l1d_size": l1d_size,
-                    "l1d_assoc": l1d_assoc,
-                    "l2_size": l2_size,
-                    "l2_assoc": l2_assoc
-                })
+                params.update(zip(grid, values))
+                jobs.append((params, workload_type, "_phase1"))
+        return self.group_by_candidate(jobs)
+
+    def phase_grid(self, phase):
+        """Valores a barrer en las Fases 2 (unidades funcionales) y 3 (pipeline)"""
+        if phase == "phase2":
+            return {
+                "num_fu_intalu": NUM_FU_INTALU_PHASE2,
+                "num_fu_fpsimd": NUM_FU_FPSIMD_PHASE2,
+                "num_fu_read": NUM_FU_READ_PHASE2,
+                "num_fu_write": NUM_FU_WRITE_PHASE2
+            }
+        if phase == "phase3":
+            return {
+                "rob_entries": ROB_ENTRIES_PHASE3,
+                "issue_width": ISSUE_WIDTH_PHASE3,
+                "decode_width": DECODE_WIDTH_PHASE3
+            }
+        raise ValueError(f"Fase sin grilla: {phase}")
+
+    def phase_jobs(self, phase, parent):
+        """Jobs de la Fase 2 o 3: la grilla de la fase sobre una configuración de la fase anterior"""
+        grid = self.phase_grid(phase)
+        jobs = []
+        for workload_type in self.workloads():
+            for values in product(*grid.values()):
+                params = dict(parent)
+                params.update(zip(grid, values))
+                jobs.append((params, workload_type, f"_{phase}"))
+        return self.group_by_candidate(jobs)
+
+    def group_by_candidate(self, jobs):
+        """En co-optimización, los workloads de cada configuración quedan juntos en la cola y corren a la vez"""
+        if not self.co_workloads:
+            return jobs
+        groups = {}
+        for job in jobs:
+            groups.setdefault(self.build_tag(job[0], "config"), []).append(job)
+        return [job for group in groups.values() for job in group]
+
+    def top_configs(self, phase, keys, k):
+        """
+        Las k mejores configuraciones distintas (restringidas a keys) de una
+        fase, por el menor EDP obtenido con cada una (mismo criterio que
+        find_best_cache_config) o, en co-optimización, por el puntaje agregado.
+        """
+        best = {}
+        for score, full_config in self.scored_configs(phase):
+            config = {key: full_config[key] for key in keys}
+            config_id = self.build_tag(config, "config")
+            if config_id not in best or score < best[config_id][0]:
+                best[config_id] = (score, config)
+        return [config for _, config in sorted(best.values(), key=lambda e: e[0])[:k]]
+
+    def scored_configs(self, phase):
+        """[(puntaje, configuración)]: EDP de cada resultado o, en co-optimización, puntaje de cada candidato completo"""
+        if not self.co_workloads:
+            return [(r["edp"], r) for r in self.phase_results.get(phase, []) if r.get("edp") is not None]
+        return [(self.candidate_score(values), config)
+                for config, values in self.co_candidates(phase).values()
+                if len(values) == len(self.co_workloads)]
+
+    def candidate_score(self, values):
+        return aggregate(values, self.aggregation, self.weights)
+
+    def co_reference(self):
+        """
+        EDP de referencia por workload: el de la configuración base de la
+        Fase 1, fijo durante toda la campaña para que ningún workload domine
+        la suma o el peor caso. Si la base falló en un workload, al terminar
+        la Fase 1 se usa el menor EDP de ese workload.
+        """
+        reference = {}
+        phase1 = self.phase_results.get("phase1", [])
+        for r in phase1:
+            if r.get("edp") and self.reference_params and \
+                    all(r.get(k) == v for k, v in self.reference_params.items()):
+                reference[r["workload"]] = r["edp"]
+        if not self.phase_active("phase1"):
+            for w in self.co_workloads:
+                values = [r["edp"] for r in phase1 if r.get("workload") == w and r.get("edp")]
+                if w not in reference and values:
+                    reference[w] = min(values)
+        return reference
+
+    def co_candidates(self, phase):
+        """
+        {id: (configuración, {workload: EDP normalizado})} de los candidatos
+        de una fase. Los workloads sin EDP de referencia todavía no cuentan.
+        """
+        reference = self.co_reference()
+        keys = self.phase_params.get(phase, [])
+        candidates = {}
+        for r in self.phase_results.get(phase, []):
+            if not r.get("edp") or r.get("workload") not in self.co_workloads:
+                continue
+            config = {key: r[key] for key in keys}
+            _, values = candidates.setdefault(self.build_tag(config, "config"), (config, {}))
+            if r["workload"] in reference:
+                values[r["workload"]] = r["edp"] / reference[r["workload"]]
+        return candidates
+
+    def abandon_candidates(self, phase):
+        """
+        Co-optimización: cancela los workloads pendientes de los candidatos
+        que ya no pueden superar al mejor candidato completo. En peor caso la
+        cota es exacta (el máximo de los workloads terminados); en media
+        geométrica y suma ponderada se supone que cada workload pendiente
+        puede ser abandon_margin veces mejor que el mejor valor visto en él.
+        """
+        candidates = self.co_candidates(phase)
+        complete = [self.candidate_score(v) for _, v in candidates.values()
+                    if len(v) == len(self.co_workloads)]
+        if not complete:
+            return
+        best = min(complete)
+        optimistic = {w: 0.0 for w in self.co_workloads}
+        if self.aggregation != "worst":
+            for _, values in candidates.values():
+                for w, v in values.items():
+                    if not optimistic[w] or v / self.abandon_margin < optimistic[w]:
+                        optimistic[w] = v / self.abandon_margin
+        
+        abandoned = self.abandoned.setdefault(phase, {})
+        for config_id, (config, values) in candidates.items():
+            if len(values) == len(self.co_workloads) or config_id in abandoned:
+                continue
+            bound = self.candidate_score({w: values.get(w, optimistic[w]) for w in self.co_workloads})
+            if bound <= best:
+                continue
+            cancelled, running = self.cancel_jobs(
+                phase, lambda job: all(job[0].get(k) == v for k, v in config.items()))
+            abandoned[config_id] = {**config, **{f"edp_norm_{w}": v for w, v in values.items()},
+                                    "cota": bound, "mejor_puntaje": best,
+                                    "jobs_cancelados": cancelled + running}
+            print(f"[CO-OPT] Abandonado {config_id}: cota {bound:.4f} > mejor {best:.4f} "
+                  f"({cancelled + running} jobs cancelados)")
+
+    def save_co_scores(self, phase):
+        """Puntaje agregado de cada candidato y candidatos abandonados de la fase"""
+        rows = []
+        for config, values in self.co_candidates(phase).values():
+            complete = len(values) == len(self.co_workloads)
+            rows.append({**config, **{f"edp_norm_{w}": values.get(w) for w in self.co_workloads},
+                         self.aggregation: self.candidate_score(values) if complete else None,
+                         "completo": "YES" if complete else "NO"})
+        rows.sort(key=lambda r: (r[self.aggregation] is None, r[self.aggregation]))
+        for filename, data in ((f"dse_jpeg2k_{phase}_coopt.csv", rows),
+                               (f"dse_jpeg2k_{phase}_abandoned.csv", list(self.abandoned.get(phase, {}).values()))):
+            if not data:
+                continue
+            fieldnames = []
+            for row in data:
+                fieldnames += [k for k in row if k not in fieldnames]
+            with open(filename, "w", newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(data)
+
+    def parent_keys(self, phase, parent_phase):
+        """Parámetros de la fase anterior que la fase hereda fijos"""
+        grid = self.phase_grid(phase)
+        return [key for key in self.phase_params.get(parent_phase, []) if key not in grid]
+
+    def run_phase(self, phase, parent_phase):
+        """Fase 2 o 3 sobre la mejor configuración de la fase anterior"""
+        best = self.top_configs(parent_phase, self.parent_keys(phase, parent_phase), 1)
+        if not best:
+            print(f"Error: sin resultados válidos en {parent_phase}")
+            return None
+        
+        print(f"\n=== {phase.upper()}: {', '.join(self.phase_grid(phase))} ===")
+        self.run_jobs(self.phase_jobs(phase, best[0]), phase)
+        self.save_phase_results(phase)
+        return self.best_config(phase)
+
+    def best_config(self, phase):
+        """Configuración completa de menor EDP de una fase (None si no hay resultados)"""
+        best = self.top_configs(phase, self.phase_params.get(phase, []), 1)
+        if not best:
+            return None
+        print(f"Mejor configuración de {phase}: {best[0]}")
+        return best[0]
+
+    def run_overlapped_exploration(self):
+        """
+        Fases 1 a 3 en los mismos pools. Cuando una fase ya no tiene jobs en
+        cola y solo quedan sus últimas simulaciones en curso, la fase
+        siguiente arranca especulativamente sobre las speculate mejores
+        configuraciones hasta el momento, con los workers que se van
+        liberando. Los jobs de configuraciones que salen del top-k, o que no
+        resultan la mejor al cerrar la fase, se cancelan (los que ya corrían
+        se ignoran; su simulación queda en la caché).
+        """
+        jobs = self.phase1_jobs()
+        if self.sh_budgets:
+            # Successive halving decide la Fase 1 por niveles: se solapan las Fases 2 y 3
+            self.run_successive_halving(jobs, "phase1")
+            jobs = []
+        
+        self.queues = {"phase1": deque(), "phase2": deque(), "phase3": deque()}
+        self.pipeline_total = 0
+        self.enqueue("phase1", jobs)
+        
+        chain = [("phase2", "phase1"), ("phase3", "phase2")]
+        # fase -> configuración heredada confirmada (None mientras la fase padre no termina)
+        confirmed = {"phase1": {}, "phase2": None, "phase3": None}
+        # fase -> {id: configuración heredada} con jobs lanzados
+        launched = {"phase2": {}, "phase3": {}}
+        stats = {"cancelados": 0, "descartados": 0, "acertadas": 0, "lanzadas": 0}
+        
+        def matches(parent):
+            return lambda job: all(job[0].get(k) == v for k, v in parent.items())
+        
+        def launch(phase, config_id, parent):
+            launched[phase][config_id] = parent
+            self.enqueue(phase, self.phase_jobs(phase, parent))
+        
+        def drop(phase, config_id):
+            parent = launched[phase].pop(config_id)
+            cancelled, running = self.cancel_jobs(phase, matches(parent))
+            # Sus resultados no pertenecen a la fase (siguen en el journal si se vuelve a lanzar)
+            self.phase_results[phase] = [r for r in self.phase_results[phase]
+                                         if not all(r.get(k) == v for k, v in parent.items())]
+            stats["cancelados"] += cancelled
+            stats["descartados"] += running
+            print(f"[SPEC] {phase} cancelada sobre {config_id}: {cancelled} jobs sin correr, "
+                  f"{running} en curso ignorados")
+        
+        def advance():
+            for phase, parent_phase in chain:
+                if confirmed[phase] is not None:
+                    continue
+                if confirmed[parent_phase] is None:
+                    return
+                keys = self.parent_keys(phase, parent_phase)
                 
-                tag = self.run_simulation(params, workload_type, "_phase1")
-                if tag:
-                    xml_file = self.generar_xml_mcpat(tag)
-                    mcpat_file = self.ejecutar_mcpat(xml_file, tag) if xml_file else None
-                    
-                    metrics = self.extraer_metricas(f"stats_{tag}.txt", mcpat_file)
-                    
-                    result = {
-                        "tag": tag,
-                        "workload": workload_type,
-                        "phase": 1,
-                        **params,
-                        **metrics
-                    }
-                    
-                    self.phase_results["phase1"].append(result)
+                if self.phase_active(parent_phase):
+                    if self.queues[parent_phase]:
+                        return
+                    # Cola vacía: solo quedan las últimas corridas de la fase anterior
+                    top = {self.build_tag(c, "config"): c
+                           for c in self.top_configs(parent_phase, keys, self.speculate)}
+                    for config_id in [c for c in launched[phase] if c not in top]:
+                        drop(phase, config_id)
+                    for config_id, parent in top.items():
+                        if config_id not in launched[phase]:
+                            print(f"[SPEC] {phase} especulativa sobre {config_id}")
+                            stats["lanzadas"] += 1
+                            launch(phase, config_id, parent)
+                    return
+                
+                # Fase anterior terminada: se confirma su mejor configuración
+                self.save_phase_results(parent_phase)
+                best = self.top_configs(parent_phase, keys, 1)
+                if not best:
+                    print(f"Error: sin resultados válidos en {parent_phase}")
+                    return
+                best_id = self.build_tag(best[0], "config")
+                for config_id in [c for c in launched[phase] if c != best_id]:
+                    drop(phase, config_id)
+                if best_id in launched[phase]:
+                    stats["acertadas"] += 1
+                    print(f"[SPEC] {phase} especulativa confirmada sobre {best_id}")
+                else:
+                    launch(phase, best_id, best[0])
+                confirmed[phase] = best[0]
+                print(f"\n=== {phase.upper()} sobre la mejor configuración de {parent_phase} ===")
         
-        # Guardar resultados de Fase 1
-        self.save_phase_results("phase1")
-        return self.find_best_cache_config()
+        print(f"Ejecutando fases solapadas: {self.jobs} workers gem5, {self.post_jobs} workers McPAT, "
+              f"especulación sobre las {self.speculate} mejores configuraciones")
+        advance()
+        self.run_pipeline(on_progress=advance)
+        for phase in self.queues:
+            self.save_surrogate_skipped(phase)
+        
+        print(f"[SPEC] {stats['lanzadas']} fases especulativas lanzadas, {stats['acertadas']} confirmadas; "
+              f"{stats['cancelados']} jobs cancelados sin correr, {stats['descartados']} corridas descartadas")
+        if confirmed["phase3"] is None:
+            print("Error: no se pudieron completar las Fases 2 y 3")
+            return None
+        self.save_phase_results("phase3")
+        return self.best_config("phase3")
 
     def find_best_cache_config(self):
         """Encuentra la mejor configuración de cache de la Fase 1"""
         if not self.phase_results["phase1"]:
             return None
+        
+        if self.co_workloads:
+            # Candidato con mejor puntaje agregado sobre todos los workloads
+            cache_keys = ["l1d_size", "l1d_assoc", "l2_size", "l2_assoc"]
+            best = self.top_configs("phase1", cache_keys, 1)
+            if not best:
+                print("Ningún candidato de la Fase 1 completó todos los workloads")
+                return None
+            print(f"Mejor configuración de cache encontrada ({self.aggregation} sobre {len(self.co_workloads)} workloads):")
+            print(f"  L1D: {best[0]['l1d_size']}, Assoc: {best[0]['l1d_assoc']}")
+            print(f"  L2: {best[0]['l2_size']}, Assoc: {best[0]['l2_assoc']}")
+            return best[0]
             
         # Ordenar por EDP (Energy-Delay Product) - menor es mejor
         valid_results = [r for r in self.phase_results["phase1"] if r.get("edp") is not None]
@@ -311,30 +1426,113 @@ class DSEExplorer:
             writer.writerows(self.phase_results[phase])
             
         print(f"Resultados de {phase} guardados en {filename}")
+        if self.co_workloads:
+            self.save_co_scores(phase)
 
     def run_full_exploration(self):
         """Ejecuta exploración completa en fases"""
+        if self.speculate and self.jobs > 1:
+            best_config = self.run_overlapped_exploration()
+            self.report_mcpat_cache()
+            return best_config
+        
         # Fase 1: Cache exploration
         best_cache_config = self.run_phase1_cache_exploration()
         
         if not best_cache_config:
+            self.report_mcpat_cache()
             print("Error: No se pudo completar la Fase 1")
             return
             
         print("\\n=== Fase 1 completada. Iniciando análisis... ===")
         
-        # Aquí podrías continuar con Fase 2 y 3 usando best_cache_config
-        # Por ahora, solo implementamos Fase 1 para el DSE básico
-        
-        return best_cache_config
+        # Fases 2 (unidades funcionales) y 3 (pipeline) sobre la mejor configuración anterior
+        best_config = self.run_phase("phase2", "phase1") and self.run_phase("phase3", "phase2")
+        self.report_mcpat_cache()
+        return best_config
+
+    def report_mcpat_cache(self):
+        """Hits/misses de la caché de McPAT indexada por XML"""
+        if self.mcpat_cache:
+            print(f"[MCPAT CACHE] hits={self.mcpat_stats['hit']} misses={self.mcpat_stats['miss']}")
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="DSE para JPEG2000 Encoder/Decoder")
+    parser.add_argument("--workload", default="both", choices=["encoder", "decoder", "both"])
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Número de simulaciones gem5 concurrentes")
+    parser.add_argument("--post-jobs", type=int, default=None,
+                        help="Workers para gem5toMcPAT/McPAT (por defecto jobs/4)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No reutilizar resultados de la caché de simulaciones")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retomar una campaña interrumpida a partir de su journal")
+    parser.add_argument("--fast-forward", type=int, default=0,
+                        help="Instrucciones a saltar con un checkpoint compartido por workload")
+    parser.add_argument("--warmup", type=int, default=0,
+                        help="Instrucciones de warm-up tras restaurar el checkpoint")
+    parser.add_argument("--inproc-xml", action="store_true",
+                        help="Generar el XML de McPAT en proceso, sin lanzar gem5toMcPAT por corrida")
+    parser.add_argument("--simpoints", action="store_true",
+                        help="Simular solo los intervalos representativos de SimPoint")
+    parser.add_argument("--sh-budgets", type=int, nargs="+", default=None,
+                        help="Successive halving: presupuestos de --maxinsts antes de la corrida completa")
+    parser.add_argument("--sh-eta", type=int, default=3,
+                        help="Successive halving: se promueve 1/eta de las configuraciones por nivel")
+    parser.add_argument("--screen", type=int, default=0,
+                        help="Trayectorias de Morris para fijar parámetros inertes antes de la Fase 1 (0 = desactivado)")
+    parser.add_argument("--screen-threshold", type=float, default=None,
+                        help="mu* relativo bajo el cual un parámetro se considera inerte (por defecto 0.01)")
+    parser.add_argument("--speculate", type=int, default=SPECULATE_TOP_K,
+                        help="Arrancar cada fase sobre las K mejores configuraciones de la anterior "
+                             "antes de que termine (0 = fases secuenciales)")
+    parser.add_argument("--area-budget", type=float, default=None,
+                        help="Área máxima (mm^2, estimada con McPAT sin gem5) de las configuraciones a simular")
+    parser.add_argument("--leakage-budget", type=float, default=None,
+                        help="Leakage máximo (W, estimado con McPAT sin gem5) de las configuraciones a simular")
+    parser.add_argument("--area-reference", nargs=2, metavar=("STATS", "CONFIG"), default=None,
+                        help="stats.txt y config.json de referencia para estimar área "
+                             "(por defecto una corrida corta de la configuración base)")
+    parser.add_argument("--co-workloads", nargs="+", choices=list(WORKLOADS), default=None,
+                        help="Co-optimización: cada configuración es un candidato evaluado en estos workloads")
+    parser.add_argument("--aggregate", choices=AGGREGATIONS, default="geomean",
+                        help="Agregación del EDP normalizado de los workloads de un candidato")
+    parser.add_argument("--weights", type=float, nargs="+", default=None,
+                        help="Pesos de --aggregate weighted, en el orden de --co-workloads")
+    parser.add_argument("--abandon-margin", type=float, default=ABANDON_MARGIN,
+                        help="Co-optimización (geomean/weighted): factor por el que un workload pendiente "
+                             "podría mejorar el mejor valor visto antes de abandonar al candidato")
+    parser.add_argument("--surrogate", action="store_true",
+                        help="No simular configuraciones que un modelo sustituto predice dominadas con confianza")
+    parser.add_argument("--surrogate-data", nargs="+", default=None,
+                        help="CSV de resultados previos para entrenar el modelo sustituto")
+    args = parser.parse_args()
+    
+    if args.simpoints and args.fast_forward:
+        parser.error("--simpoints y --fast-forward son excluyentes")
+    if args.simpoints and args.sh_budgets:
+        parser.error("--simpoints y --sh-budgets son excluyentes")
+    if args.co_workloads and (args.screen or args.sh_budgets):
+        parser.error("--co-workloads no se combina con --screen ni --sh-budgets (rankean por workload)")
+    if args.weights and len(args.weights) != len(args.co_workloads or []):
+        parser.error("--weights necesita un peso por workload de --co-workloads")
+    
     print("DSE para JPEG2000 Encoder/Decoder - Optimizado para características del workload")
     print("Basado en análisis comparativo vs MP3 workloads")
     
-    # Crear explorador para ambos workloads
-    explorer = DSEExplorer(workload="both")
+    # Crear explorador para los workloads seleccionados
+    explorer = DSEExplorer(workload=args.workload, jobs=args.jobs, post_jobs=args.post_jobs,
+                           use_cache=not args.no_cache, resume=args.resume,
+                           fast_forward=args.fast_forward, warmup=args.warmup,
+                           use_simpoints=args.simpoints, inproc_xml=args.inproc_xml,
+                           use_surrogate=args.surrogate, surrogate_data=args.surrogate_data,
+                           sh_budgets=args.sh_budgets, sh_eta=args.sh_eta,
+                           screen_trajectories=args.screen, screen_threshold=args.screen_threshold,
+                           speculate=args.speculate, area_budget=args.area_budget,
+                           leakage_budget=args.leakage_budget, area_reference=args.area_reference,
+                           co_workloads=args.co_workloads, aggregation=args.aggregate,
+                           weights=args.weights, abandon_margin=args.abandon_margin)
     
     # Ejecutar exploración
     best_config = explorer.run_full_exploration()
@@ -0,0 +1,127 @@
+"""
+Screening de sensibilidad global (efectos elementales de Morris).
+
+Con r trayectorias de k+1 configuraciones (k parámetros) se estima la
+influencia de cada parámetro sobre CPI, energía y EDP: mu* (media del
+efecto elemental absoluto) mide la importancia y sigma las interacciones
+o no linealidades. Los parámetros con mu* despreciable en todas las
+métricas se pueden fijar antes de barrer el espacio completo.
+"""
+
+import csv
+import math
+import random
+
+METRICS = ["cpi", "energy", "edp"]
+# mu* relativo (respecto a la media de la métrica) por debajo del cual un parámetro es inerte
+INERT_THRESHOLD = 0.01
+
+
+def morris_trajectories(space, r, seed=0):
+    """
+    r trayectorias de Morris sobre un DesignSpace: desde un punto al azar,
+    cada paso cambia un parámetro (en orden aleatorio) a otro de sus valores.
+    """
+    rng = random.Random(seed)
+    trajectories = []
+    for _ in range(r):
+        current = {name: rng.choice(values) for name, values in space.parameters.items()}
+        trajectory = [dict(current)]
+        order = [name for name in space.names if len(space.parameters[name]) > 1]
+        rng.shuffle(order)
+        for name in order:
+            current[name] = rng.choice([v for v in space.parameters[name] if v != current[name]])
+            trajectory.append(dict(current))
+        trajectories.append(trajectory)
+    return trajectories
+
+
+def step_size(space, name, before, after):
+    """Distancia normalizada del paso (categóricos: 1)"""
+    values = space.parameters[name]
+    if name in space.categorical:
+        return 1.0
+    return (values.index(after) - values.index(before)) / (len(values) - 1)
+
+
+def elementary_effects(space, trajectories, results, metrics=METRICS):
+    """
+    Índices de Morris por parámetro y métrica.
+    results: {índice de configuración en el espacio: resultado (dict de métricas) o None}
+    Retorna {parámetro: {métrica: {"mu_star", "mu_star_rel", "sigma", "n"}}}
+    """
+    effects = {name: {m: [] for m in metrics} for name in space.names}
+    for trajectory in trajectories:
+        for before, after in zip(trajectory, trajectory[1:]):
+            name = next(n for n in space.names if before[n] != after[n])
+            r0 = results.get(space.index_of(before))
+            r1 = results.get(space.index_of(after))
+            if not r0 or not r1:
+                continue
+            delta = step_size(space, name, before[name], after[name])
+            for m in metrics:
+                if r0.get(m) is not None and r1.get(m) is not None:
+                    effects[name][m].append((r1[m] - r0[m]) / delta)
+
+    # Escala de cada métrica para comparar parámetros entre métricas
+    scale = {}
+    for m in metrics:
+        values = [abs(r[m]) for r in results.values() if r and r.get(m) is not None]
+        scale[m] = sum(values) / len(values) if values else 0.0
+
+    indices = {}
+    for name in space.names:
+        indices[name] = {}
+        for m in metrics:
+            ee = effects[name][m]
+            if not ee:
+                indices[name][m] = {"mu_star": None, "mu_star_rel": None, "sigma": None, "n": 0}
+                continue
+            mu = sum(ee) / len(ee)
+            mu_star = sum(abs(e) for e in ee) / len(ee)
+            sigma = math.sqrt(sum((e - mu) ** 2 for e in ee) / (len(ee) - 1)) if len(ee) > 1 else 0.0
+            indices[name][m] = {
+                "mu_star": mu_star,
+                "mu_star_rel": mu_star / scale[m] if scale[m] else None,
+                "sigma": sigma,
+                "n": len(ee),
+            }
+    return indices
+
+
+def inert_parameters(indices, threshold=INERT_THRESHOLD):
+    """Parámetros con mu* relativo bajo el umbral en todas las métricas medidas"""
+    inert = []
+    for name, by_metric in indices.items():
+        measured = [i["mu_star_rel"] for i in by_metric.values() if i["mu_star_rel"] is not None]
+        if measured and max(measured) < threshold:
+            inert.append(name)
+    return inert
+
+
+def ranking(indices, metric="edp"):
+    """Parámetros ordenados por mu* relativo (más influyente primero) en una métrica"""
+    def importance(name):
+        value = indices[name][metric]["mu_star_rel"]
+        return value if value is not None else -1.0
+    return sorted(indices, key=importance, reverse=True)
+
+
+def write_report(filename, reports, threshold=INERT_THRESHOLD):
+    """
+    Reporte de importancia de parámetros.
+    reports: {etiqueta (p.ej. workload): índices de elementary_effects}
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["workload", "rank", "parameter", "metric", "mu_star",
+                         "mu_star_rel", "sigma", "n", "inert"])
+        for label, indices in reports.items():
+            inert = set(inert_parameters(indices, threshold))
+            for metric in METRICS:
+                for rank, name in enumerate(ranking(indices, metric), 1):
+                    i = indices[name].get(metric)
+                    if i is None:
+                        continue
+                    writer.writerow([label, rank, name, metric, i["mu_star"], i["mu_star_rel"],
+                                     i["sigma"], i["n"], "YES" if name in inert else "NO"])
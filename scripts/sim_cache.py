@@ -0,0 +1,207 @@
+"""
+Caché de resultados de simulación compartida por los scripts de DSE.
+
+Cada entrada se direcciona por el hash de (build de gem5, script de
+configuración, binario, opciones, parámetros) y guarda stats.txt,
+config.json y las salidas de McPAT asociadas.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import xml.etree.ElementTree as ET
+
+# ==== CONFIGURACIÓN ====
+CACHE_DIR = os.environ.get("SIM_CACHE_DIR", ".sim_cache")
+CACHE_MAX_ENTRIES = int(os.environ.get("SIM_CACHE_MAX_ENTRIES", 5000))
+CACHE_MAX_BYTES = int(os.environ.get("SIM_CACHE_MAX_BYTES", 50 * 1024 ** 3))
+# Stores entre recorridos completos de la caché (otros procesos también agregan entradas)
+CACHE_SCAN_INTERVAL = int(os.environ.get("SIM_CACHE_SCAN_INTERVAL", 100))
+
+STATS_ARTIFACT = "stats.txt"
+CONFIG_ARTIFACT = "config.json"
+MCPAT_ARTIFACT = "mcpat.txt"
+
+# Subdirectorio de la caché de McPAT indexada por XML de entrada
+MCPAT_CACHE_DIR = os.path.join(CACHE_DIR, "mcpat")
+
+# Digests ya calculados en este proceso: ruta -> (tamaño, mtime, digest)
+_file_digests = {}
+
+
+def file_digest(path):
+    """sha256 del contenido de un archivo (memoizado por tamaño y mtime)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return f"missing:{path}"
+
+    cached = _file_digests.get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime:
+        return cached[2]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    digest = h.hexdigest()
+    _file_digests[path] = (st.st_size, st.st_mtime, digest)
+    return digest
+
+
+def simulation_key(exe, script, binary, opts, params):
+    """Clave de caché para una simulación gem5"""
+    payload = {
+        "gem5": file_digest(exe),
+        "script": file_digest(script),
+        "binary": file_digest(binary),
+        "opts": opts.strip("'\""),
+        "params": {str(k): str(v) for k, v in params.items()},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def mcpat_artifact(template_xml, convert_script, mcpat_exec):
+    """Nombre del artefacto McPAT según el template, conversor y binario usados"""
+    payload = "|".join(file_digest(p) for p in (template_xml, convert_script, mcpat_exec))
+    return f"mcpat_{hashlib.sha256(payload.encode()).hexdigest()[:16]}.txt"
+
+
+def mcpat_key(xml_file, mcpat_exec):
+    """
+    Clave de caché de McPAT: digest del XML canonicalizado (C14N, sin
+    comentarios ni espacios entre nodos) y del binario de McPAT.
+    McPAT es determinista, así que XML equivalentes dan el mismo reporte.
+    """
+    canonical = ET.canonicalize(from_file=xml_file, strip_text=True)
+    payload = f"{file_digest(mcpat_exec)}|{canonical}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SimulationCache:
+    def __init__(self, root=CACHE_DIR, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 scan_interval=CACHE_SCAN_INTERVAL):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.scan_interval = scan_interval
+        # [entradas, bytes] estimados desde el último recorrido (None = sin recorrer)
+        self.usage = None
+        self.stores_since_scan = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def entry_dir(self, key):
+        """Directorio de una entrada"""
+        return os.path.join(self.root, key[:2], key)
+
+    def fetch(self, key, artifacts):
+        """
+        Copia los artefactos cacheados a sus destinos.
+        artifacts: {nombre_artefacto: ruta_destino}
+        Retorna True solo si todos los artefactos estaban en caché.
+        """
+        entry = self.entry_dir(key)
+        sources = {name: os.path.join(entry, name) for name in artifacts}
+
+        if not all(os.path.exists(src) for src in sources.values()):
+            self.misses += 1
+            return False
+
+        try:
+            for name, dest in artifacts.items():
+                shutil.copyfile(sources[name], dest)
+            self._touch(entry)
+        except FileNotFoundError:
+            # Otro proceso desalojó la entrada entre la verificación y la copia
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def store(self, key, artifacts):
+        """
+        Guarda artefactos en la entrada de la clave.
+        artifacts: {nombre_artefacto: ruta_origen}
+        """
+        entry = self.entry_dir(key)
+        new_entry = not os.path.isdir(entry)
+        os.makedirs(entry, exist_ok=True)
+
+        added_bytes = 0
+        for name, src in artifacts.items():
+            if not src or not os.path.exists(src):
+                continue
+            dest = os.path.join(entry, name)
+            if os.path.exists(dest):
+                added_bytes -= os.path.getsize(dest)
+            # Copia atómica: otro proceso nunca ve un archivo a medias
+            tmp = os.path.join(entry, f".{name}.{os.getpid()}.tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+            added_bytes += os.path.getsize(dest)
+
+        self._touch(entry)
+        self._account(new_entry, added_bytes)
+
+    def _account(self, new_entry, added_bytes):
+        """
+        Actualiza el uso estimado tras un store. La caché se recorre completa
+        (evict) solo al superar un límite o cada scan_interval stores, no en
+        cada simulación.
+        """
+        if self.usage is None:
+            self.evict()
+            return
+
+        self.usage[0] += int(new_entry)
+        self.usage[1] += added_bytes
+        self.stores_since_scan += 1
+        if (self.usage[0] > self.max_entries or self.usage[1] > self.max_bytes
+                or self.stores_since_scan >= self.scan_interval):
+            self.evict()
+
+    def _touch(self, entry):
+        """Marca la entrada como usada recientemente"""
+        with open(os.path.join(entry, ".last_used"), "w") as f:
+            f.write(str(time.time()))
+
+    def _entries(self):
+        """Lista (último uso, bytes, directorio) de todas las entradas"""
+        entries = []
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            # Solo los directorios de prefijo de clave (otros cachés viven como subdirectorios)
+            if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry = os.path.join(prefix_dir, key)
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry, ".last_used"))
+                    size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+                except OSError:
+                    continue
+                entries.append((last_used, size, entry))
+        return entries
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta respetar los límites"""
+        entries = sorted(self._entries())
+        total_bytes = sum(size for _, size, _ in entries)
+
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, entry = entries.pop(0)
+            shutil.rmtree(entry, ignore_errors=True)
+            total_bytes -= size
+
+        self.usage = [len(entries), total_bytes]
+        self.stores_since_scan = 0
+
+    def report(self, label="CACHE"):
+        """Imprime hits/misses de la caché"""
+        print(f"[{label}] hits={self.hits} misses={self.misses} ({self.root})")
@@ -0,0 +1,207 @@
+"""
+Simulación muestreada con SimPoint para campañas de DSE.
+
+Pipeline por workload (una sola vez):
+  1. Perfil de basic-block vectors con la CPU atómica (--simpoint-profile).
+  2. Clustering con SimPoint 3.2 -> intervalos representativos y pesos.
+  3. Un checkpoint por intervalo (--take-simpoint-checkpoints).
+Por configuración solo se simulan los intervalos y CPI/potencia se
+reconstruyen ponderando por los pesos de SimPoint.
+"""
+
+import argparse
+import glob
+import math
+import os
+import re
+import subprocess
+
+# Perfil y checkpoints con la CPU atómica del se.py genérico (el script del
+# Cortex-A76 solo arma el core O3)
+from checkpoints import FAST_CPU, FAST_SCRIPT
+
+# ==== CONFIGURACIÓN ====
+SIMPOINT_DIR = "simpoints"
+SIMPOINT_EXEC = "./SimPoint.3.2/bin/simpoint"
+INTERVAL_INSTS = 10000000
+WARMUP_INSTS = 1000000
+MAX_K = 30
+
+# Métricas por intervalo que se reconstruyen (mismas columnas que una corrida completa)
+INST_WEIGHTED_METRICS = ("l1d_miss_rate", "l2_miss_rate")
+TIME_WEIGHTED_METRICS = ("runtime_dynamic", "total_leakage", "intalu_utilization")
+
+CPT_PATTERN = re.compile(r"cpt\.simpoint_(\d+)_inst_(\d+)_weight_([\d.eE+-]+)_interval_(\d+)_warmup_(\d+)")
+
+
+def workload_dir(workload_key):
+    return os.path.join(SIMPOINT_DIR, workload_key)
+
+
+def profile_bbv(exe, binary, opts, workload_key, interval=INTERVAL_INSTS, script=FAST_SCRIPT):
+    """Genera simpoint.bb.gz con la CPU atómica"""
+    outdir = workload_dir(workload_key)
+    bbv_file = os.path.join(outdir, "simpoint.bb.gz")
+    if os.path.exists(bbv_file):
+        return bbv_file
+
+    os.makedirs(outdir, exist_ok=True)
+    print(f"[SIMPOINT] {workload_key}: perfil BBV (intervalo {interval})")
+    cmd = [
+        exe, f"--outdir={outdir}", script,
+        "-c", binary,
+        "-o", opts,
+        f"--cpu-type={FAST_CPU}",
+        "--simpoint-profile",
+        f"--simpoint-interval={interval}"
+    ]
+    subprocess.run(" ".join(cmd), shell=True, check=True)
+    return bbv_file
+
+
+def cluster_bbv(workload_key, max_k=MAX_K, simpoint_exec=SIMPOINT_EXEC):
+    """Ejecuta SimPoint sobre los BBV; retorna (archivo simpoints, archivo pesos)"""
+    outdir = workload_dir(workload_key)
+    simpoints_file = os.path.join(outdir, "simpoints.txt")
+    weights_file = os.path.join(outdir, "weights.txt")
+    if os.path.exists(simpoints_file) and os.path.exists(weights_file):
+        return simpoints_file, weights_file
+
+    print(f"[SIMPOINT] {workload_key}: clustering (maxK={max_k})")
+    cmd = [
+        simpoint_exec,
+        "-loadFVFile", os.path.join(outdir, "simpoint.bb.gz"),
+        "-inputVectorsGzipped",
+        "-maxK", str(max_k),
+        "-saveSimpoints", simpoints_file,
+        "-saveSimpointWeights", weights_file
+    ]
+    subprocess.run(cmd, check=True)
+    return simpoints_file, weights_file
+
+
+def take_simpoint_checkpoints(exe, binary, opts, workload_key,
+                              interval=INTERVAL_INSTS, warmup=WARMUP_INSTS, script=FAST_SCRIPT):
+    """Toma un checkpoint por intervalo representativo"""
+    outdir = workload_dir(workload_key)
+    ckpt_dir = os.path.join(outdir, "checkpoints")
+    if list_checkpoints(ckpt_dir):
+        return ckpt_dir
+
+    simpoints_file, weights_file = cluster_bbv(workload_key)
+    print(f"[SIMPOINT] {workload_key}: checkpoints de intervalos")
+    cmd = [
+        exe, f"--outdir={ckpt_dir}", script,
+        "-c", binary,
+        "-o", opts,
+        f"--cpu-type={FAST_CPU}",
+        f"--take-simpoint-checkpoints={simpoints_file},{weights_file},{interval},{warmup}",
+        f"--checkpoint-dir={ckpt_dir}"
+    ]
+    subprocess.run(" ".join(cmd), shell=True, check=True)
+    return ckpt_dir
+
+
+def prepare_workload(exe, binary, opts, workload_key,
+                     interval=INTERVAL_INSTS, warmup=WARMUP_INSTS):
+    """Pipeline completo de SimPoint para un workload; retorna el directorio de checkpoints"""
+    profile_bbv(exe, binary, opts, workload_key, interval)
+    cluster_bbv(workload_key)
+    return take_simpoint_checkpoints(exe, binary, opts, workload_key, interval, warmup)
+
+
+def list_checkpoints(ckpt_dir):
+    """
+    Checkpoints de SimPoint en el orden que usa gem5 para --checkpoint-restore.
+    Retorna [(índice de restore, id simpoint, peso)]
+    """
+    checkpoints = []
+    names = sorted(os.path.basename(p) for p in glob.glob(os.path.join(ckpt_dir, "cpt.simpoint_*")))
+    for restore_index, name in enumerate(names, 1):
+        match = CPT_PATTERN.match(name)
+        if match:
+            checkpoints.append((restore_index, int(match.group(1)), float(match.group(3))))
+    return checkpoints
+
+
+def restore_args(ckpt_dir, restore_index):
+    """Argumentos de gem5 para simular solo un intervalo representativo"""
+    return [
+        "--restore-simpoint-checkpoint",
+        f"--checkpoint-restore={restore_index}",
+        f"--checkpoint-dir={os.path.abspath(ckpt_dir)}"
+    ]
+
+
+def reconstruct(intervals):
+    """
+    Reconstrucción ponderada a partir de métricas por intervalo.
+    intervals: [{"weight", "cpi", "runtime_dynamic", "total_leakage", ...}]
+    Los intervalos tienen igual número de instrucciones, así que el CPI y
+    los miss rates se ponderan por peso, y la potencia y la utilización de
+    unidades funcionales por peso × CPI (tiempo del intervalo).
+    """
+    valid = [i for i in intervals if i.get("cpi") is not None]
+    total_weight = sum(i["weight"] for i in valid)
+    if not valid or total_weight <= 0:
+        return {}
+
+    cpi = sum(i["weight"] * i["cpi"] for i in valid) / total_weight
+    cpi_std = math.sqrt(sum(i["weight"] * (i["cpi"] - cpi) ** 2 for i in valid) / total_weight)
+
+    metrics = {
+        "cpi": cpi,
+        "ipc": 1.0 / cpi if cpi else None,
+        "cpi_interval_std": cpi_std,
+        "simpoint_coverage": total_weight,
+        "simpoint_intervals": len(valid),
+    }
+
+    for key in INST_WEIGHTED_METRICS:
+        measured = [i for i in valid if i.get(key) is not None]
+        weight = sum(i["weight"] for i in measured)
+        metrics[key] = (sum(i["weight"] * i[key] for i in measured) / weight
+                        if measured and weight else None)
+
+    for key in TIME_WEIGHTED_METRICS:
+        measured = [i for i in valid if i.get(key) is not None]
+        time_weight = sum(i["weight"] * i["cpi"] for i in measured)
+        metrics[key] = (sum(i["weight"] * i["cpi"] * i[key] for i in measured) / time_weight
+                        if measured and time_weight else None)
+
+    return metrics
+
+
+def relative_errors(sampled, baseline, keys=("cpi", "runtime_dynamic", "total_leakage")):
+    """Error relativo (%) de la reconstrucción frente a una corrida completa"""
+    errors = {}
+    for key in keys:
+        if sampled.get(key) is not None and baseline.get(key):
+            errors[f"{key}_error_pct"] = (sampled[key] - baseline[key]) / baseline[key] * 100
+    return errors
+
+
+def main():
+    """Prepara SimPoints para los workloads multimedia"""
+    from multimedia_profiling_simulation import EXE, WORKLOADS
+
+    parser = argparse.ArgumentParser(description="Pipeline SimPoint por workload")
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS.keys()))
+    parser.add_argument("--interval", type=int, default=INTERVAL_INSTS)
+    parser.add_argument("--warmup", type=int, default=WARMUP_INSTS)
+    args = parser.parse_args()
+
+    for workload_key in args.workloads:
+        wl = WORKLOADS[workload_key]
+        if not os.path.exists(wl['bin']):
+            print(f"WARNING: {workload_key} no encontrado: {wl['bin']}")
+            continue
+        ckpt_dir = prepare_workload(EXE, wl['bin'], wl['opts'], workload_key,
+                                    args.interval, args.warmup)
+        checkpoints = list_checkpoints(ckpt_dir)
+        print(f"[SIMPOINT] {workload_key}: {len(checkpoints)} intervalos, "
+              f"cobertura {sum(w for _, _, w in checkpoints):.3f}")
+
+
+if __name__ == "__main__":
+    main()
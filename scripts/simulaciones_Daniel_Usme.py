@@ -1,7 +1,12 @@
 import os
 import subprocess
+import argparse
 from time import sleep
-import itertools
+
+from campaign_journal import CampaignJournal
+from design_space import DesignSpace, SAMPLERS
+from gem5_stats import parse_stats
+from sim_cache import SimulationCache, simulation_key, STATS_ARTIFACT, CONFIG_ARTIFACT
 
 # Ruta al ejecutable y script de configuración
 GEM5 = "./build/ARM/gem5.fast"
@@ -11,8 +16,36 @@ CONFIG_SCRIPT = "scripts/CortexA76_scripts_gem5/CortexA76.py"
 OUTPUT_DIR = "Simulaciones_usme"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Workload
+BINARY = "workloads/jpeg2k_dec/jpg2k_dec"
+OPTS = "\"-i workloads/jpeg2k_dec/jpg2kdec_testfile.j2k -o image.pgm\""
+
+# Caché compartida de simulaciones
+cache = SimulationCache()
+
+# Journal de simulaciones completadas y resumen agregado (leído por Proceamiento_100_pruebas.py)
+JOURNAL_FILE = os.path.join(OUTPUT_DIR, "journal.jsonl")
+SUMMARY_CSV = os.path.join(OUTPUT_DIR, "gem5_summary_stats.csv")
+SUMMARY_STATS = ["system.cpu.ipc", "system.cpu.cpi", "simSeconds",
+                 "hostSeconds", "system.cpu.numCycles"]
+
+parser = argparse.ArgumentParser(description="Simulaciones de exploración del Cortex-A76")
+parser.add_argument("--resume", action="store_true",
+                    help="Saltar las simulaciones ya registradas en el journal")
+parser.add_argument("--samples", type=int, default=100,
+                    help="Número de simulaciones de la campaña")
+parser.add_argument("--sampler", default="lhs", choices=SAMPLERS,
+                    help="Diseño de muestreo: lhs, sobol, random o grid (primeras N del producto)")
+parser.add_argument("--seed", type=int, default=0,
+                    help="Semilla del muestreo (la misma para retomar con --resume)")
+args = parser.parse_args()
+
+journal = CampaignJournal(JOURNAL_FILE, resume=args.resume)
+if args.resume:
+    journal.write_csv(SUMMARY_CSV, fieldnames=["simulation"] + SUMMARY_STATS)
+
 # Definición de valores posibles para cada parámetro
-# (Combinaciones de estos generarán 100 simulaciones)
+# (el muestreo elige --samples combinaciones de estos valores)
 L1I_SIZES = ["32kB", "64kB", "128kB"]
 L1D_SIZES = ["32kB", "64kB", "128kB"]
 L2_SIZES = ["256kB", "512kB", "1MB", "2MB"]
@@ -26,13 +59,18 @@ ROB_ENTRIES = [64, 128, 192, 256]
 BTB_ENTRIES = [1024, 2048, 4096, 8192]
 BRANCH_PREDICTOR = [0, 1, 7, 10]  # BiMode, LTAGE, TAGE, Tournament
 
-# Generar todas las combinaciones y cortar a 100
-param_combinations = list(itertools.product(
-    L1I_SIZES, L1D_SIZES, L2_SIZES,
-    L1_LAT, L2_LAT,
-    FETCH_WIDTH, DECODE_WIDTH, COMMIT_WIDTH,
-    ASSOC, ROB_ENTRIES, BTB_ENTRIES, BRANCH_PREDICTOR
-))[:100]
+# Espacio indexado sin materializar el producto cartesiano (~4M combinaciones)
+space = DesignSpace({
+    "l1i_size": L1I_SIZES, "l1d_size": L1D_SIZES, "l2_size": L2_SIZES,
+    "l1_lat": L1_LAT, "l2_lat": L2_LAT,
+    "fetch_width": FETCH_WIDTH, "decode_width": DECODE_WIDTH, "commit_width": COMMIT_WIDTH,
+    "assoc": ASSOC, "rob_entries": ROB_ENTRIES, "btb_entries": BTB_ENTRIES,
+    "branch_predictor": BRANCH_PREDICTOR
+}, categorical=["branch_predictor"])
+
+# Muestra que cubre todo el espacio (en el orden de los parámetros de arriba)
+param_combinations = [tuple(config.values())
+                      for config in space.design(args.samples, args.sampler, args.seed)]
 
 # Función de barra de progreso
 def progress_bar(current, total, length=30):
@@ -40,7 +78,8 @@ def progress_bar(current, total, length=30):
     bar = "█" * filled + "-" * (length - filled)
     print(f"\r[{bar}] {current}/{total} simulaciones", end="")
 
-print(f"Iniciando {len(param_combinations)} simulaciones de exploración completa del Cortex-A76\n")
+print(f"Iniciando {len(param_combinations)} simulaciones de exploración completa del Cortex-A76 "
+      f"(muestreo {args.sampler} sobre {space.size()} combinaciones)\n")
 
 # Bucle principal de simulaciones
 for i, params in enumerate(param_combinations, 1):
@@ -51,14 +90,20 @@ for i, params in enumerate(param_combinations, 1):
         OUTPUT_DIR,
         f"sim_{i:03d}_L1i{l1i}_L1d{l1d}_L2{l2}_FW{fw}_DW{dw}_CW{cw}_A{assoc}_ROB{rob}_BTB{btb}_BP{bp}"
     )
+    sim_name = os.path.basename(outdir)
+
+    if journal.is_done(sim_name):
+        progress_bar(i, len(param_combinations))
+        continue
+
     os.makedirs(outdir, exist_ok=True)
 
     cmd = [
         GEM5,
         f"--outdir={outdir}",
         CONFIG_SCRIPT,
-        "-c", "workloads/jpeg2k_dec/jpg2k_dec",
-        "-o", "\"-i workloads/jpeg2k_dec/jpg2kdec_testfile.j2k -o image.pgm\"",
+        "-c", BINARY,
+        "-o", OPTS,
         f"--l1i_size={l1i}",
         f"--l1d_size={l1d}",
         f"--l2_size={l2}",
@@ -79,10 +124,25 @@ for i, params in enumerate(param_combinations, 1):
     print(f"L1i={l1i}, L1d={l1d}, L2={l2}, FW={fw}, DW={dw}, CW={cw}, Assoc={assoc}, ROB={rob}, BTB={btb}, BP={bp}")
     print(f"Salida: {outdir}")
 
-    subprocess.run(" ".join(cmd), shell=True, check=True)
+    # Parámetros = argumentos --clave=valor posteriores al script de configuración
+    sim_params = dict(arg[2:].split("=", 1) for arg in cmd[3:] if arg.startswith("--"))
+    key = simulation_key(GEM5, CONFIG_SCRIPT, BINARY, OPTS, sim_params)
+    artifacts = {STATS_ARTIFACT: os.path.join(outdir, "stats.txt"),
+                 CONFIG_ARTIFACT: os.path.join(outdir, "config.json")}
 
+    if cache.fetch(key, artifacts):
+        print("[CACHE] resultado reutilizado")
+    else:
+        subprocess.run(" ".join(cmd), shell=True, check=True)
+        cache.store(key, artifacts)
+
+    journal.append(sim_name, {"simulation": sim_name,
+                              **parse_stats(artifacts[STATS_ARTIFACT], keys=SUMMARY_STATS)})
     progress_bar(i, len(param_combinations))
     sleep(1)
 
+journal.write_csv(SUMMARY_CSV, fieldnames=["simulation"] + SUMMARY_STATS)
+
 print("\n\nTodas las simulaciones finalizaron correctamente.")
 print(f"Resultados guardados en: {os.path.abspath(OUTPUT_DIR)}")
+cache.report()
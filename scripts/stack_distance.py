@@ -0,0 +1,273 @@
+"""
+Perfil de distancias de pila LRU para barrer tamaños y asociatividades de caché.
+
+Se captura una vez el flujo de accesos a la L1D de cada workload (traza
+de debug Cache de gem5) y se analiza con el algoritmo de Mattson por
+conjunto: para un número de conjuntos S, una pasada sobre la traza da la
+distancia de pila de cada acceso dentro de su conjunto, y una caché LRU
+de S conjuntos y asociatividad A falla exactamente en los accesos con
+distancia >= A. Con una pasada por cada número de conjuntos distinto (en
+paralelo) salen las tasas de fallo de toda la grilla tamaño × asociatividad,
+y solo los puntos interesantes necesitan simulación de timing completa.
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from area_model import size_bytes
+from multimedia_profiling_simulation import SCRIPT, WORKLOADS
+
+# gem5.fast se compila sin trazas de debug
+TRACE_EXE = "./build/ARM/gem5.opt"
+TRACE_DIR = "traces"
+LINE_SIZE = 64
+CACHE_NAME = "dcache"
+DEBUG_FILE = "cache_trace.out.gz"
+# Mejora relativa de la tasa de fallos por debajo de la cual agrandar la caché no vale la pena
+KNEE_TOLERANCE = 0.05
+
+# "<tick>: system.cpu.dcache: access for ReadReq [8b6c0:8b6c3] miss"
+ACCESS_MATCH = re.compile(r"(\S+): access for (\w+) \[([0-9a-fA-F]+):([0-9a-fA-F]+)\]")
+# Paquetes que no vienen de la CPU
+IGNORED_COMMANDS = {"WritebackDirty", "WritebackClean", "CleanEvict", "WriteClean"}
+WRITE_COMMANDS = {"WriteReq", "WriteLineReq", "StoreCondReq", "SwapReq"}
+
+
+def trace_path(workload_key, cache_name=CACHE_NAME):
+    return os.path.join(TRACE_DIR, f"{workload_key}_{cache_name}.npz")
+
+
+def capture_outdir(workload_key):
+    """Directorio de salida de gem5 de la captura (stats.txt de la corrida trazada)"""
+    return os.path.join(TRACE_DIR, f"m5out_{workload_key}")
+
+
+def debug_trace_path(workload_key):
+    """Traza de debug Cache completa de la captura (todas las caches)"""
+    return os.path.join(capture_outdir(workload_key), DEBUG_FILE)
+
+
+def capture_trace(workload_key, max_insts=0, cache_name=CACHE_NAME):
+    """
+    Corre el workload en gem5 con la traza de debug Cache y guarda los
+    accesos a la caché cache_name como bloques (dirección / LINE_SIZE) y
+    marca de escritura. Retorna la ruta del .npz (None si gem5 falla).
+    """
+    wl = WORKLOADS[workload_key]
+    outdir = capture_outdir(workload_key)
+    os.makedirs(outdir, exist_ok=True)
+    cmd = [TRACE_EXE, f"--outdir={outdir}", "--debug-flags=Cache", f"--debug-file={DEBUG_FILE}",
+           SCRIPT, "-c", wl["bin"], "-o", wl["opts"]]
+    if max_insts:
+        cmd.append(f"--maxinsts={max_insts}")
+
+    print(f"[TRACE] Capturando accesos de {workload_key}...")
+    try:
+        subprocess.run(" ".join(cmd), shell=True, check=True, stdout=subprocess.DEVNULL)
+    except subprocess.CalledProcessError as e:
+        print(f"[TRACE] Error capturando {workload_key}: {e}")
+        return None
+
+    blocks, writes = read_debug_trace(debug_trace_path(workload_key), cache_name)
+    output = trace_path(workload_key, cache_name)
+    np.savez_compressed(output, blocks=blocks, writes=writes)
+    print(f"[TRACE] {workload_key}: {len(blocks)} accesos -> {output}")
+    return output
+
+
+def read_debug_trace(debug_file, cache_name=CACHE_NAME, line_size=LINE_SIZE):
+    """Bloques accedidos y marca de escritura, en orden, desde la traza de debug de gem5"""
+    opener = gzip.open if debug_file.endswith(".gz") else open
+    blocks = []
+    writes = []
+    with opener(debug_file, "rt") as f:
+        for line in f:
+            match = ACCESS_MATCH.search(line)
+            if not match or not match.group(1).endswith(cache_name):
+                continue
+            command = match.group(2)
+            if command in IGNORED_COMMANDS:
+                continue
+            blocks.append(int(match.group(3), 16) // line_size)
+            writes.append(command in WRITE_COMMANDS)
+    return np.array(blocks, dtype=np.uint64), np.array(writes, dtype=bool)
+
+
+def load_trace(path):
+    """(bloques, escrituras) de una traza guardada"""
+    with np.load(path) as data:
+        return data["blocks"], data["writes"]
+
+
+def stack_histogram(blocks, num_sets, max_assoc, demand=None):
+    """
+    Histograma de distancias de pila LRU por conjunto (Mattson).
+    hist[d], d < max_assoc: accesos con distancia d dentro de su conjunto;
+    hist[max_assoc]: distancia >= max_assoc o primer acceso al bloque.
+    Cada conjunto guarda solo sus max_assoc bloques más recientes: un
+    bloque más profundo falla en toda caché de asociatividad <= max_assoc.
+    demand: máscara opcional; los accesos en False (writebacks) actualizan
+    la pila pero no se cuentan.
+    """
+    stacks = [[] for _ in range(num_sets)]
+    hist = [0] * (max_assoc + 1)
+    counted = demand.tolist() if demand is not None else repeat(True)
+    for block, count in zip(blocks.tolist(), counted):
+        stack = stacks[block % num_sets]
+        try:
+            distance = stack.index(block)
+            del stack[distance]
+        except ValueError:
+            distance = max_assoc
+            if len(stack) == max_assoc:
+                stack.pop()
+        if count:
+            hist[distance] += 1
+        stack.insert(0, block)
+    return hist
+
+
+def _histogram_job(args):
+    path, num_sets, max_assoc = args
+    with np.load(path) as data:
+        demand = data["demand"] if "demand" in data else None
+        return stack_histogram(data["blocks"], num_sets, max_assoc, demand)
+
+
+def cache_geometry(size, assoc, line_size=LINE_SIZE):
+    """Número de conjuntos de una caché ("64kB", 8)"""
+    return size_bytes(size) // (line_size * int(assoc))
+
+
+def modeled_bytes(num_sets, assoc, line_size=LINE_SIZE):
+    """
+    Capacidad realmente modelada: con un número de conjuntos que no es
+    potencia de dos (p.ej. 24 vías) el índice por módulo trunca los
+    conjuntos y la caché simulada es menor que el tamaño nominal.
+    """
+    return num_sets * int(assoc) * line_size
+
+
+def miss_curves(path, sizes, assocs, line_size=LINE_SIZE, jobs=1):
+    """
+    Tasa de fallos LRU de cada punto sizes × assocs para la traza path
+    (un .npz con "blocks" y opcionalmente "demand").
+    Una pasada por número de conjuntos distinto; cada pasada sirve para
+    todas las asociatividades con ese número de conjuntos.
+    Retorna [{"size", "assoc", "num_sets", "modeled_bytes", "accesses", "misses", "miss_rate"}]
+    """
+    points = [(size, assoc, cache_geometry(size, assoc, line_size)) for size in sizes for assoc in assocs]
+    max_assoc = {}
+    for _, assoc, num_sets in points:
+        max_assoc[num_sets] = max(int(assoc), max_assoc.get(num_sets, 0))
+
+    set_counts = sorted(max_assoc)
+    passes = [(path, num_sets, max_assoc[num_sets]) for num_sets in set_counts]
+    if jobs > 1 and len(passes) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            histograms = dict(zip(set_counts, pool.map(_histogram_job, passes)))
+    else:
+        histograms = dict(zip(set_counts, map(_histogram_job, passes)))
+
+    curves = []
+    for size, assoc, num_sets in points:
+        hist = histograms[num_sets]
+        accesses = sum(hist)
+        misses = sum(hist[int(assoc):])
+        curves.append({"size": size, "assoc": assoc, "num_sets": num_sets,
+                       "modeled_bytes": modeled_bytes(num_sets, assoc, line_size), "accesses": accesses,
+                       "misses": misses, "miss_rate": misses / accesses if accesses else None})
+    return curves
+
+
+def knee_points(curves, tolerance=KNEE_TOLERANCE):
+    """
+    Para cada asociatividad, el menor tamaño cuya tasa de fallos está a
+    menos de tolerance (relativo) de la del mayor tamaño: los puntos que
+    vale la pena simular con timing completo.
+    """
+    knees = []
+    for assoc in dict.fromkeys(c["assoc"] for c in curves):
+        row = sorted((c for c in curves if c["assoc"] == assoc and c["miss_rate"] is not None),
+                     key=lambda c: size_bytes(c["size"]))
+        if not row:
+            continue
+        best = min(c["miss_rate"] for c in row)
+        knees.append(next(c for c in row if c["miss_rate"] <= best * (1 + tolerance)))
+    return knees
+
+
+def write_curves(filename, curves_by_workload, tolerance=KNEE_TOLERANCE, prefix="l1d"):
+    """CSV con las curvas de todos los workloads y los puntos sugeridos para simular"""
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["workload", f"{prefix}_size", f"{prefix}_assoc", "num_sets", "modeled_bytes",
+                         "accesses", "misses", "miss_rate", "simular"])
+        for workload_key, curves in curves_by_workload.items():
+            knees = {(c["size"], c["assoc"]) for c in knee_points(curves, tolerance)}
+            for c in curves:
+                writer.writerow([workload_key, c["size"], c["assoc"], c["num_sets"], c["modeled_bytes"],
+                                 c["accesses"], c["misses"], c["miss_rate"],
+                                 "YES" if (c["size"], c["assoc"]) in knees else "NO"])
+
+
+def report_truncated(curves):
+    """Avisa de los puntos cuya capacidad modelada es menor que la nominal"""
+    for c in curves:
+        if c["modeled_bytes"] != size_bytes(c["size"]):
+            print(f"  Nota: {c['size']}/{c['assoc']}-way modela {c['num_sets']} conjuntos "
+                  f"({c['modeled_bytes']} bytes)")
+
+
+def main():
+    """Captura las trazas (si faltan) y calcula las curvas de fallos de la L1D de la Fase 1"""
+    from dse_phases import L1D_SIZES_PHASE1, L1D_ASSOCS_PHASE1
+
+    parser = argparse.ArgumentParser(description="Curvas de fallos de L1D por distancia de pila LRU")
+    parser.add_argument("--workloads", nargs="+", default=["jpeg2k_enc", "jpeg2k_dec"],
+                        choices=list(WORKLOADS))
+    parser.add_argument("--sizes", nargs="+", default=L1D_SIZES_PHASE1)
+    parser.add_argument("--assocs", type=int, nargs="+", default=L1D_ASSOCS_PHASE1)
+    parser.add_argument("--max-insts", type=int, default=0,
+                        help="Instrucciones a capturar por workload (0 = programa completo)")
+    parser.add_argument("--recapture", action="store_true", help="Capturar aunque la traza ya exista")
+    parser.add_argument("--jobs", type=int, default=1, help="Capturas y pasadas concurrentes")
+    parser.add_argument("--tolerance", type=float, default=KNEE_TOLERANCE)
+    parser.add_argument("--output", default="stack_distance_l1d.csv")
+    args = parser.parse_args()
+
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    missing = [w for w in args.workloads if args.recapture or not os.path.exists(trace_path(w))]
+    if missing:
+        with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(missing)))) as pool:
+            list(pool.map(capture_trace, missing, [args.max_insts] * len(missing)))
+
+    curves_by_workload = {}
+    for workload_key in args.workloads:
+        if not os.path.exists(trace_path(workload_key)):
+            continue
+        curves = miss_curves(trace_path(workload_key), args.sizes, args.assocs, jobs=args.jobs)
+        curves_by_workload[workload_key] = curves
+        print(f"\n{workload_key}: tasa de fallos L1D (LRU)")
+        print("  tamaño  " + "".join(f"{a:>10}-way" for a in args.assocs))
+        for size in args.sizes:
+            rates = {c["assoc"]: c["miss_rate"] for c in curves if c["size"] == size}
+            print(f"  {size:>6}  " + "".join(f"{rates[a]:>14.4%}" for a in args.assocs))
+        knees = ", ".join(f"{c['size']}/{c['assoc']}-way" for c in knee_points(curves, args.tolerance))
+        print(f"  Puntos a simular con timing: {knees}")
+        report_truncated(curves)
+
+    write_curves(args.output, curves_by_workload, args.tolerance)
+    print(f"\nCurvas guardadas en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
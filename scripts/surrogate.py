@@ -0,0 +1,227 @@
+"""
+Modelo sustituto para descartar configuraciones antes de correr gem5.
+
+Un random forest multi-salida, entrenado con los resultados ya
+disponibles (CSV de campañas anteriores, history.csv del greedy y las
+corridas de la campaña actual a medida que terminan), predice CPI,
+runtime dynamic y leakage. La dispersión entre árboles da la
+incertidumbre: una configuración se descarta solo si incluso su
+predicción optimista queda dominada por un resultado real.
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+TARGETS = ["cpi", "runtime_dynamic", "total_leakage"]
+
+# Datos de entrenamiento por defecto (los que no existan se ignoran)
+TRAINING_FILES = [
+    "report/dse_jpeg2k_phase1_results.csv",
+    "report/dse_results.csv",
+    "greedy_results/history.csv",
+]
+
+# Columnas de report/dse_results.csv -> nombres de parámetros/métricas de los scripts
+DSE_RESULTS_COLUMNS = {
+    "L1I": "l1i_size", "L1D": "l1d_size", "L1D_Assoc": "l1d_assoc",
+    "ROB": "rob_entries", "Issue_Width": "issue_width",
+    "CPI": "cpi", "Runtime_Dynamic_W": "runtime_dynamic", "Total_Leakage_W": "total_leakage",
+}
+# Columnas de history.csv (greedy) -> métricas
+HISTORY_COLUMNS = {"CPI": "cpi", "RuntimeDynamic": "runtime_dynamic", "Leakage": "total_leakage"}
+# greedy_usme.py simula el decoder de JPEG2000
+HISTORY_WORKLOAD = "decoder"
+
+WORKLOAD_CODES = {"encoder": 0.0, "decoder": 1.0}
+
+# Desviaciones estándar de margen para considerar "segura" una dominancia
+CONFIDENCE_Z = 2.0
+MIN_TRAINING_ROWS = 20
+RETRAIN_EVERY = 8
+
+
+def feature_value(value):
+    """Valor numérico de un parámetro: tamaños en kB, workload codificado, números tal cual"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if text in WORKLOAD_CODES:
+        return WORKLOAD_CODES[text]
+    for suffix, factor in (("kB", 1), ("KB", 1), ("MB", 1024), ("GB", 1024 ** 2)):
+        if text.endswith(suffix):
+            return float(text[:-len(suffix)]) * factor
+    return float(text)
+
+
+def load_results_csv(filename):
+    """Filas de un CSV de resultados (formato de scriptv2 o de report/dse_results.csv)"""
+    rows = []
+    with open(filename, newline="") as f:
+        for row in csv.DictReader(f):
+            rows.append({DSE_RESULTS_COLUMNS.get(k, k): v for k, v in row.items()})
+    return rows
+
+
+def load_history_csv(filename, workload=HISTORY_WORKLOAD):
+    """Filas de greedy_results/history.csv con la configuración completa expandida"""
+    rows = []
+    with open(filename, newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                config = json.loads(row["Configuración completa"])
+            except (KeyError, ValueError):
+                continue
+            rows.append({"workload": workload, **config,
+                         **{metric: row.get(col) for col, metric in HISTORY_COLUMNS.items()}})
+    return rows
+
+
+def load_training_files(files=TRAINING_FILES):
+    """Carga todos los archivos de entrenamiento disponibles"""
+    rows = []
+    for filename in files:
+        if not os.path.exists(filename):
+            print(f"[SURROGATE] No existe {filename}, se omite")
+            continue
+        with open(filename, newline="") as f:
+            header = f.readline()
+        loader = load_history_csv if "Configuración completa" in header else load_results_csv
+        loaded = loader(filename)
+        print(f"[SURROGATE] {len(loaded)} filas de {filename}")
+        rows.extend(loaded)
+    return rows
+
+
+class SurrogateModel:
+    def __init__(self, features, rows=(), z=CONFIDENCE_Z, retrain_every=RETRAIN_EVERY, seed=0):
+        """
+        features: parámetros de entrada (p.ej. las claves de params + "workload");
+                  solo se entrena con las filas que tienen todos
+        rows: resultados iniciales ({parámetro/métrica: valor})
+        """
+        self.features = list(features)
+        self.z = z
+        self.retrain_every = retrain_every
+        self.seed = seed
+        self.X = []
+        self.y = []
+        self.model = None
+        # Valor de cada hoja por árbol: (árboles, nodos, métricas)
+        self.leaf_values = None
+        # Cotas optimistas ya calculadas con el modelo actual (x codificado -> cota)
+        self.bounds = {}
+        self.pending = 0
+        for row in rows:
+            self.add(row, retrain=False)
+        self.fit()
+
+    def encode(self, row):
+        """Vector de features de una fila, o None si le falta alguno"""
+        try:
+            return [feature_value(row[name]) for name in self.features]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def add(self, row, retrain=True):
+        """Agrega un resultado real; reentrena cada retrain_every resultados nuevos"""
+        x = self.encode(row)
+        try:
+            y = [float(row[t]) for t in TARGETS]
+        except (KeyError, TypeError, ValueError):
+            return
+        if x is None or any(np.isnan(y)):
+            return
+        self.X.append(x)
+        self.y.append(y)
+        self.pending += 1
+        if retrain and self.pending >= self.retrain_every:
+            self.fit()
+
+    def fit(self):
+        """Reentrena el bosque con todos los datos acumulados"""
+        self.pending = 0
+        self.bounds = {}
+        if len(self.X) < MIN_TRAINING_ROWS:
+            self.model = None
+            return
+        self.model = RandomForestRegressor(n_estimators=200, min_samples_leaf=2,
+                                           random_state=self.seed, n_jobs=-1)
+        self.model.fit(np.array(self.X), np.array(self.y))
+        trees = [estimator.tree_ for estimator in self.model.estimators_]
+        self.leaf_values = np.zeros((len(trees), max(t.node_count for t in trees), len(TARGETS)))
+        for i, tree in enumerate(trees):
+            self.leaf_values[i, :tree.node_count] = tree.value[:, :, 0]
+        print(f"[SURROGATE] Modelo entrenado con {len(self.X)} resultados")
+
+    def ready(self):
+        return self.model is not None
+
+    def predict(self, rows):
+        """
+        [{métrica: (media, desviación)}] para cpi, runtime_dynamic y total_leakage
+        (None en las filas sin features). Una sola pasada por el bosque: apply()
+        da la hoja de cada fila en cada árbol y sus valores salen de leaf_values.
+        """
+        encoded = [self.encode(row) for row in rows]
+        predictions = [None] * len(rows)
+        valid = [i for i, x in enumerate(encoded) if x is not None]
+        if not self.ready() or not valid:
+            return predictions
+        leaves = self.model.apply(np.array([encoded[i] for i in valid]))  # (filas, árboles)
+        per_tree = self.leaf_values[np.arange(leaves.shape[1]), leaves]  # (filas, árboles, métricas)
+        means, stds = per_tree.mean(axis=1), per_tree.std(axis=1)
+        for i, mean, std in zip(valid, means, stds):
+            predictions[i] = {t: (mean[j], std[j]) for j, t in enumerate(TARGETS)}
+        return predictions
+
+    def predicted_edp(self, rows):
+        """EDP predicho (media) de cada fila, para ordenar candidatos"""
+        edps = []
+        for prediction in self.predict(rows):
+            if not prediction:
+                edps.append(None)
+                continue
+            cpi = prediction["cpi"][0]
+            edps.append((prediction["runtime_dynamic"][0] + prediction["total_leakage"][0]) * cpi * cpi)
+        return edps
+
+    def has_bound(self, row):
+        """True si la cota optimista de la fila ya está calculada con el modelo actual"""
+        x = self.encode(row)
+        return x is not None and tuple(x) in self.bounds
+
+    def optimistic(self, rows):
+        """
+        CPI y energía en el extremo optimista del intervalo de confianza de
+        cada fila; las cotas se guardan hasta el próximo reentrenamiento
+        """
+        keys = [self.encode(row) for row in rows]
+        keys = [tuple(x) if x is not None else None for x in keys]
+        missing = [i for i, key in enumerate(keys) if key is not None and key not in self.bounds]
+        for i, prediction in zip(missing, self.predict([rows[i] for i in missing])):
+            if not prediction:
+                continue
+            low = {t: max(mean - self.z * std, 0.0) for t, (mean, std) in prediction.items()}
+            self.bounds[keys[i]] = {"cpi": low["cpi"],
+                                    "energy": (low["runtime_dynamic"] + low["total_leakage"]) * low["cpi"]}
+        return [self.bounds.get(key) if key is not None else None for key in keys]
+
+    def dominated_by(self, bound, results):
+        """
+        Resultado real que domina (CPI y energía) a la cota optimista de una
+        configuración, o None si la configuración podría estar en el frente.
+        """
+        if not bound:
+            return None
+        for result in results:
+            cpi, energy = result.get("cpi"), result.get("energy")
+            if cpi is None or energy is None:
+                continue
+            if cpi <= bound["cpi"] and energy <= bound["energy"] and \
+                    (cpi < bound["cpi"] or energy < bound["energy"]):
+                return result
+        return None
@@ -0,0 +1,52 @@
+import json
+
+from campaign_journal import CampaignJournal
+
+
+def test_resume_ignores_truncated_last_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CampaignJournal(str(path))
+    journal.append("a", {"edp": 1.0})
+    journal.append("b", {"edp": 2.0})
+    with open(path, "a") as f:
+        f.write('{"job": "c", "res')
+
+    resumed = CampaignJournal(str(path), resume=True)
+    assert resumed.is_done("a") and resumed.is_done("b")
+    assert not resumed.is_done("c")
+
+    # Los nuevos registros empiezan en una línea nueva
+    resumed.append("c", {"edp": 3.0})
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["job"] for line in lines] == ["a", "b", "c"]
+
+
+def test_without_resume_starts_over(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    CampaignJournal(str(path)).append("a", {})
+    assert not CampaignJournal(str(path)).is_done("a")
+    assert not path.exists()
+
+
+def test_failures_are_retried_on_resume(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CampaignJournal(str(path))
+    journal.append_failure("a", ValueError("sin resultado"))
+    journal.append("b", {"edp": 1.0})
+
+    resumed = CampaignJournal(str(path), resume=True)
+    assert not resumed.is_done("a")
+    assert resumed.failures == {"a": "sin resultado"}
+    assert resumed.results() == [{"edp": 1.0}]
+
+    resumed.append("a", {"edp": 2.0})
+    assert CampaignJournal(str(path), resume=True).failures == {}
+
+
+def test_write_csv_uses_union_of_columns(tmp_path):
+    journal = CampaignJournal(str(tmp_path / "journal.jsonl"))
+    journal.append("a", {"tag": "a", "cpi": 1.0})
+    journal.append("b", {"tag": "b", "cpi": 2.0, "edp": 3.0})
+    output = tmp_path / "out.csv"
+    journal.write_csv(str(output))
+    assert output.read_text().splitlines()[0] == "tag,cpi,edp"
@@ -0,0 +1,76 @@
+import os
+import stat
+
+import pytest
+
+import checkpoints
+from checkpoints import missing_options, normalize_switched_stats, restore_args
+from scriptv2 import DSEExplorer
+
+# Corrida restaurada con --standard-switch: system.cpu es la CPU timing del
+# warm-up y system.switch_cpus_1 el core O3 medido; las caches cuelgan de system.cpu
+SWITCHED_STATS = """
+---------- Begin Simulation Statistics ----------
+simSeconds                                   0.001000
+system.cpu.cpi                               4.000000
+system.cpu.numCycles                         4000
+system.cpu.dcache.overall_miss_rate::total   0.050000
+system.l2.overall_miss_rate::total           0.250000
+system.switch_cpus.cpi                       3.000000
+system.switch_cpus_1.cpi                     1.250000
+system.switch_cpus_1.numCycles               1250
+system.switch_cpus_1.fuPool.IntALU_utilization 0.400000
+---------- End Simulation Statistics   ----------
+"""
+
+
+def test_restore_args_with_warmup():
+    args = restore_args("ckpt", 1000, warmup_insts=500)
+    assert args[0] == f"--checkpoint-dir={os.path.abspath('ckpt')}"
+    assert args[1:] == ["--at-instruction", "--checkpoint-restore=1000",
+                        "--standard-switch=1", "--warmup-insts=500"]
+    assert "--standard-switch=1" not in restore_args("ckpt", 1000)
+
+
+def test_switched_stats_report_the_detailed_core(tmp_path):
+    stats_file = tmp_path / "stats.txt"
+    stats_file.write_text(SWITCHED_STATS)
+
+    assert normalize_switched_stats(str(stats_file))
+    metrics = DSEExplorer(use_cache=False).extraer_metricas(str(stats_file), None)
+    assert metrics["cpi"] == pytest.approx(1.25)
+    assert metrics["intalu_utilization"] == pytest.approx(0.4)
+    # Las caches no dependen de la CPU conmutada
+    assert metrics["l1d_miss_rate"] == pytest.approx(0.05)
+    assert metrics["l2_miss_rate"] == pytest.approx(0.25)
+
+    text = stats_file.read_text()
+    assert "system.switch_cpus_1." not in text
+    assert text.count("system.cpu.numCycles") == 1
+    # Idempotente: sin core conmutado no se reescribe
+    assert not normalize_switched_stats(str(stats_file))
+
+
+def fake_gem5(tmp_path, options):
+    """Ejecutable que imprime un --help con las opciones dadas"""
+    exe = tmp_path / "gem5.fake"
+    exe.write_text("#!/bin/sh\n" + "".join(f"echo '  {opt}=VALUE'\n" for opt in options))
+    exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    return str(exe)
+
+
+def test_missing_options_checks_the_config_script(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "_script_options", {})
+    options = checkpoints.TAKE_OPTIONS + checkpoints.RESTORE_OPTIONS
+    exe = fake_gem5(tmp_path, options)
+    assert missing_options(exe, "CortexA76.py") == []
+    assert missing_options(exe, "CortexA76.py", warmup_insts=500) == ["--standard-switch",
+                                                                      "--warmup-insts"]
+
+
+def test_take_checkpoint_skips_unsupported_script(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "_script_options", {})
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    exe = fake_gem5(tmp_path, ["--cpu-type"])
+    assert checkpoints.take_checkpoint(exe, "CortexA76.py", "bin", "", "w", 1000) is None
+    assert not os.path.exists(tmp_path / "checkpoints")
@@ -0,0 +1,37 @@
+from itertools import product
+
+from design_space import DesignSpace
+
+PARAMETERS = {"l1d_size": ["32kB", "64kB", "128kB"], "assoc": [4, 8], "bp": [7, 10]}
+
+
+def test_enumeration_matches_product_order():
+    space = DesignSpace(PARAMETERS)
+    expected = [dict(zip(PARAMETERS, values)) for values in product(*PARAMETERS.values())]
+    assert space.size() == len(expected)
+    assert list(space.configs()) == expected
+
+
+def test_index_round_trip():
+    space = DesignSpace(PARAMETERS)
+    for index in range(space.size()):
+        assert space.index_of(space.config_at(index)) == index
+
+
+def test_design_returns_distinct_configs():
+    space = DesignSpace(PARAMETERS)
+    for method in ("lhs", "random", "grid"):
+        configs = space.design(8, method, seed=3)
+        assert len(configs) == 8
+        assert len({space.index_of(c) for c in configs}) == 8
+
+
+def test_design_caps_at_space_size():
+    space = DesignSpace(PARAMETERS)
+    assert len(space.design(100, "lhs")) == space.size()
+
+
+def test_encode_ordinal_and_one_hot():
+    space = DesignSpace(PARAMETERS, categorical=["bp"])
+    assert space.dimensions() == 4
+    assert space.encode({"l1d_size": "64kB", "assoc": 8, "bp": 10}) == [0.5, 1.0, 0.0, 1.0]
@@ -0,0 +1,60 @@
+import pytest
+
+from interval_model import DEFAULT_PROFILE, TERMS, IntervalModel, rank_correlation
+
+CONFIGS = [
+    {"issue_width": w, "decode_width": w, "rob_entries": rob, "num_fu_intalu": alu}
+    for w in (2, 4, 6) for rob in (64, 128, 192) for alu in (2, 3, 4)
+]
+
+
+def samples_from(model, profiles):
+    return [(workload, profile, params, model.predict(profile, params))
+            for workload, profile in profiles.items() for params in CONFIGS]
+
+
+def test_uncalibrated_model_is_sum_of_terms():
+    model = IntervalModel()
+    terms = model.components(DEFAULT_PROFILE, CONFIGS[0])
+    assert set(terms) == set(TERMS)
+    assert model.predict(DEFAULT_PROFILE, CONFIGS[0]) == pytest.approx(
+        sum(v for t, v in terms.items() if t != "overhead"))
+
+
+def test_wider_core_and_bigger_rob_do_not_increase_cpi():
+    model = IntervalModel()
+    narrow = model.predict(DEFAULT_PROFILE, {"issue_width": 2, "decode_width": 2})
+    wide = model.predict(DEFAULT_PROFILE, {"issue_width": 6, "decode_width": 6})
+    assert wide <= narrow
+
+
+def test_calibration_recovers_known_weights():
+    truth = IntervalModel({"dispatch": 1.2, "branch": 0.8, "icache": 1.0, "l2_hit": 1.0,
+                           "memory": 0.6, "overhead": 0.3})
+    profiles = {
+        "a": DEFAULT_PROFILE,
+        "b": {**DEFAULT_PROFILE, "branch_mpki": 15.0, "l1d_miss_rate": 0.15, "l2_miss_rate": 0.6},
+        "c": {**DEFAULT_PROFILE, "int_frac": 0.8, "branch_mpki": 1.0, "l1d_miss_rate": 0.01},
+    }
+    samples = samples_from(truth, profiles)
+    model = IntervalModel()
+    coefficients = model.fit(samples, prior_weight=1e-6)
+    assert all(c >= 0 for c in coefficients.values())
+    for workload, profile, params, cpi in samples:
+        assert model.predict(profile, params) == pytest.approx(cpi, rel=0.02)
+
+
+def test_calibration_weights_are_non_negative():
+    profiles = {"a": DEFAULT_PROFILE}
+    # CPI que decrece con los fallos: el término de memoria no puede tener peso negativo
+    samples = [(w, {**p, "l1d_miss_rate": r}, params, 2.0 - r)
+               for w, p in profiles.items() for params in CONFIGS for r in (0.01, 0.1, 0.3)]
+    coefficients = IntervalModel().fit(samples)
+    assert all(c >= 0 for c in coefficients.values())
+
+
+def test_rank_correlation_averages_ties():
+    assert rank_correlation([1, 2, 3, 4], [10, 20, 30, 40]) == pytest.approx(1.0)
+    # Con rangos promedio, dos valores empatados no se ordenan arbitrariamente
+    assert rank_correlation([1, 1, 2, 3], [2, 1, 3, 4]) == pytest.approx(0.9486833)
+    assert rank_correlation([1, 1, 1], [1, 2, 3]) is None
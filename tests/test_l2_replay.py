@@ -0,0 +1,32 @@
+import numpy as np
+
+from l2_replay import filter_l1, read_l1_trace
+
+DEBUG_TRACE = """\
+100: system.cpu.icache: access for ReadReq [1000:103f] miss
+200: system.cpu.dcache: access for WriteReq [2000:2003] miss
+300: system.cpu.icache: access for ReadReq [1000:103f] hit
+400: system.cpu.dcache: access for WritebackDirty [3000:303f] miss
+500: system.l2: access for ReadSharedReq [1000:103f] miss
+600: system.cpu.dcache: access for ReadReq [2040:2043] miss
+"""
+
+
+def test_read_l1_trace_keeps_both_l1_in_order(tmp_path):
+    debug_file = tmp_path / "cache_trace.out"
+    debug_file.write_text(DEBUG_TRACE)
+    blocks, writes, inst = read_l1_trace(str(debug_file))
+    assert blocks.tolist() == [0x40, 0x80, 0x40, 0x81]
+    assert writes.tolist() == [False, True, False, False]
+    assert inst.tolist() == [True, False, True, False]
+
+
+def test_filter_l1_merges_instruction_misses():
+    # L1D y L1I de una línea (64 B, 1 vía): cada bloque nuevo expulsa al anterior
+    blocks = np.array([1, 10, 2, 1, 11, 3], dtype=np.uint64)
+    writes = np.array([True, False, False, False, False, False])
+    inst = np.array([False, True, False, False, True, False])
+    stream, demand = filter_l1(blocks, writes, inst, ("64B", 1), ("64B", 1))
+    # Fallos de ambas L1 en orden; el bloque 1 sucio sale como writeback de la L1D
+    assert stream.tolist() == [1, 10, 2, 1, 1, 11, 3]
+    assert demand.tolist() == [True, True, True, False, True, True, True]
@@ -0,0 +1,71 @@
+import json
+
+from gem5_stats import parse_stats
+from mcpat_xml import McPATTemplate, read_stats
+
+STATS = """
+---------- Begin Simulation Statistics ----------
+simInsts                 1000                 # comentario
+system.cpu.cpi           2.5
+system.cpu.numCycles     2500
+---------- End Simulation Statistics   ----------
+
+---------- Begin Simulation Statistics ----------
+system.cpu.cpi           nan
+system.cpu.numCycles     4000
+system.cpu.idleCycles    inf
+---------- End Simulation Statistics   ----------
+"""
+
+TEMPLATE = """<component id="root">
+  <param name="clock" value="config.system.cpu_clk_domain.clock.0"/>
+  <stat name="cycles" value="stats.system.cpu.numCycles"/>
+  <stat name="cpi" value="stats.system.cpu.cpi"/>
+  <stat name="busy" value="stats.system.cpu.numCycles - stats.system.cpu.idleCycles"/>
+  <stat name="insts" value="stats.simInsts * 2"/>
+</component>
+"""
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def test_parse_stats_dumps(tmp_path):
+    stats_file = write(tmp_path, "stats.txt", STATS)
+    assert parse_stats(stats_file)["system.cpu.numCycles"] == 2500
+    assert parse_stats(stats_file, keys=["system.cpu.numCycles"], dump=-1) == {"system.cpu.numCycles": 4000}
+    # Todos los dumps: gana el último valor de cada estadística
+    merged = parse_stats(stats_file, dump=None)
+    assert merged["simInsts"] == 1000
+    assert merged["system.cpu.numCycles"] == 4000
+
+
+def test_read_stats_follows_gem5tomcpat(tmp_path):
+    stats = read_stats(write(tmp_path, "stats.txt", STATS))
+    assert stats["system.cpu.numCycles"] == "4000"
+    assert stats["system.cpu.cpi"] == "0"
+    assert stats["system.cpu.idleCycles"] == "0"
+
+
+def test_fill_substitutes_stats_and_config(tmp_path):
+    template = McPATTemplate(write(tmp_path, "template.xml", TEMPLATE))
+    config = {"system": {"cpu_clk_domain": {"clock": [476]}}}
+    stats = read_stats(write(tmp_path, "stats.txt", STATS))
+    root = template.fill(stats, config).getroot()
+    values = {node.attrib["name"]: node.attrib["value"] for node in root}
+    assert values == {"clock": "476", "cycles": "4000", "cpi": "0", "busy": "4000", "insts": "2000"}
+
+
+def test_unevaluable_expression_keeps_template_value(tmp_path):
+    template = McPATTemplate(write(tmp_path, "template.xml", TEMPLATE))
+    stats = {"system.cpu.numCycles": "nan", "system.cpu.cpi": "1", "simInsts": "1"}
+    config_file = write(tmp_path, "config.json", json.dumps({"system": {"cpu_clk_domain": {"clock": [1]}}}))
+    with open(config_file) as f:
+        root = template.fill(stats, json.load(f)).getroot()
+    values = {node.attrib["name"]: node.attrib["value"] for node in root}
+    # "nan" no es una expresión válida: el nodo queda sin sustituir en vez de abortar
+    assert values["cycles"] == "stats.system.cpu.numCycles"
+    assert values["cpi"] == "1"
@@ -0,0 +1,64 @@
+from itertools import product
+
+from design_space import DesignSpace
+from nsga2 import NSGA2, ParetoArchive, crowding_distance, dominates, non_dominated_sort
+
+
+def brute_force_fronts(points):
+    remaining = set(range(len(points)))
+    fronts = []
+    while remaining:
+        front = sorted(i for i in remaining
+                       if not any(dominates(points[j], points[i]) for j in remaining if j != i))
+        fronts.append(front)
+        remaining -= set(front)
+    return fronts
+
+
+def test_dominates():
+    assert dominates([1, 2], [2, 2])
+    assert not dominates([1, 2], [1, 2])
+    assert not dominates([1, 3], [2, 2])
+
+
+def test_non_dominated_sort_matches_brute_force():
+    points = [[x, y] for x, y in product(range(4), repeat=2)] + [[1.5, 0.5], [0.5, 2.5]]
+    fronts = [sorted(front) for front in non_dominated_sort(points)]
+    assert fronts == brute_force_fronts(points)
+
+
+def test_crowding_distance_boundaries_and_interior():
+    points = [[0, 4], [1, 2], [2, 1], [4, 0]]
+    distance = crowding_distance([0, 1, 2, 3], points)
+    assert distance[0] == distance[3] == float("inf")
+    assert distance[1] == (2 - 0) / 4 + (4 - 1) / 4
+    assert distance[2] == (4 - 1) / 4 + (2 - 0) / 4
+
+
+def test_small_fronts_are_infinitely_crowded():
+    assert crowding_distance([0, 1], [[0, 1], [1, 0]]) == {0: float("inf"), 1: float("inf")}
+
+
+def test_archive_keeps_only_non_dominated():
+    archive = ParetoArchive(["cpi", "energy"])
+    assert archive.add({"c": 1}, {"cpi": 2, "energy": 2})
+    assert archive.add({"c": 2}, {"cpi": 1, "energy": 3})
+    assert not archive.add({"c": 3}, {"cpi": 3, "energy": 3})
+    assert archive.add({"c": 4}, {"cpi": 1, "energy": 1})
+    assert [c["c"] for c, _ in archive.entries] == [4]
+
+
+def test_search_never_reevaluates_and_skips_failures():
+    space = DesignSpace({"a": list(range(6)), "b": list(range(6))})
+    search = NSGA2(space, ["x", "y"], population=6, seed=1)
+    seen = set()
+    configs = search.initial_population()
+    for _ in range(4):
+        indices = {space.index_of(c) for c in configs}
+        assert not indices & seen
+        seen |= indices
+        results = [None if c["a"] == 0 else {"x": c["a"], "y": 5 - c["b"] + c["a"] % 2}
+                   for c in configs]
+        search.tell(configs, results)
+        assert all(r is not None for _, r in search.population)
+        configs = search.offspring()
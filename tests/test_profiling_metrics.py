@@ -0,0 +1,38 @@
+from multimedia_profiling_simulation import AccurateWorkloadProfiler, metric_value
+
+STATS = """
+---------- Begin Simulation Statistics ----------
+simSeconds                                   0.012000
+system.cpu.cpi                               1.250000
+system.cpu.ipc                               0.800000
+system.cpu.commitStats0.numInsts             1000.000000
+system.cpu.commitStats0.numOps               1200
+system.cpu.commit.committedInstType0IntAlu   600.000000
+system.cpu.commit.committedInstType0MemRead  300
+system.cpu.commit.committedInstType0FloatAdd 50.000000
+system.cpu.commit.committedInstType0SimdAlu  10
+system.cpu.commit.branchMispredicts          12.000000
+system.cpu.dcache.overallMissRate::total     0.050000
+system.cpu.intAluAccesses                    700.000000
+---------- End Simulation Statistics   ----------
+"""
+
+
+def test_metric_value_types():
+    assert metric_value("cpi", 2.0) == 2.0 and isinstance(metric_value("cpi", 2.0), float)
+    assert metric_value("committed_IntAlu", 600.0) == 600
+    assert isinstance(metric_value("committed_IntAlu", 600.0), int)
+    assert metric_value("intAluAccesses", float("nan")) != metric_value("intAluAccesses", float("nan"))
+
+
+def test_count_columns_stay_integers(tmp_path):
+    stats_file = tmp_path / "stats.txt"
+    stats_file.write_text(STATS)
+    metrics = AccurateWorkloadProfiler(use_cache=False).extract_accurate_metrics(str(stats_file))
+
+    for name in ("total_committed_insts", "total_committed_ops", "committed_IntAlu", "committed_MemRead",
+                 "committed_FloatTotal", "committed_SimdTotal", "intAluAccesses"):
+        assert type(metrics[name]) is int, name
+    for name in ("cpi", "ipc", "sim_seconds", "l1d_miss_rate"):
+        assert type(metrics[name]) is float, name
+    assert metrics["integer_alu_pct"] == 50.0
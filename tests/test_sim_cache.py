@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+import sim_cache
+from sim_cache import SimulationCache, mcpat_key, simulation_key
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    paths = {}
+    for name in ("gem5", "script.py", "binary"):
+        paths[name] = tmp_path / name
+        paths[name].write_bytes(name.encode())
+    return paths
+
+
+def key(inputs, params, opts="'-i in -o out'"):
+    return simulation_key(str(inputs["gem5"]), str(inputs["script.py"]), str(inputs["binary"]), opts, params)
+
+
+def test_simulation_key_is_stable(inputs):
+    params = {"l1d_size": "64kB", "rob_entries": 128}
+    assert key(inputs, params) == key(inputs, dict(reversed(list(params.items()))))
+    # Valores iguales como texto y comillas del shell no cambian la clave
+    assert key(inputs, params) == key(inputs, {"l1d_size": "64kB", "rob_entries": "128"}, "-i in -o out")
+
+
+def test_simulation_key_tracks_inputs(inputs):
+    params = {"l1d_size": "64kB"}
+    before = key(inputs, params)
+    assert key(inputs, {"l1d_size": "128kB"}) != before
+    inputs["binary"].write_bytes(b"rebuilt binary")
+    sim_cache._file_digests.clear()
+    assert key(inputs, params) != before
+
+
+def test_mcpat_key_ignores_formatting(tmp_path, inputs):
+    a = tmp_path / "a.xml"
+    b = tmp_path / "b.xml"
+    a.write_text('<component id="x"><param name="p" value="1"/></component>')
+    b.write_text('<component  id="x">\n  <!-- comentario -->\n  <param value="1" name="p" />\n</component>\n')
+    assert mcpat_key(str(a), str(inputs["gem5"])) == mcpat_key(str(b), str(inputs["gem5"]))
+
+
+def test_store_fetch_round_trip(tmp_path):
+    cache = SimulationCache(str(tmp_path / "cache"))
+    src = tmp_path / "stats.txt"
+    src.write_text("simInsts 10\n")
+    cache.store("ab" * 32, {"stats.txt": str(src)})
+
+    dest = tmp_path / "copy.txt"
+    assert cache.fetch("ab" * 32, {"stats.txt": str(dest)})
+    assert dest.read_text() == "simInsts 10\n"
+    assert not cache.fetch("cd" * 32, {"stats.txt": str(dest)})
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_fetch_of_concurrently_evicted_entry_is_a_miss(tmp_path, monkeypatch):
+    cache = SimulationCache(str(tmp_path / "cache"))
+    src = tmp_path / "stats.txt"
+    src.write_text("x")
+    cache.store("ab" * 32, {"stats.txt": str(src)})
+
+    def evicted(*args, **kwargs):
+        raise FileNotFoundError("desalojada")
+    monkeypatch.setattr(sim_cache.shutil, "copyfile", evicted)
+    assert not cache.fetch("ab" * 32, {"stats.txt": str(tmp_path / "copy.txt")})
+    assert cache.misses == 1
+
+
+def test_eviction_keeps_entry_limit_without_scanning_every_store(tmp_path, monkeypatch):
+    cache = SimulationCache(str(tmp_path / "cache"), max_entries=3, scan_interval=100)
+    src = tmp_path / "stats.txt"
+    src.write_text("x")
+    scans = []
+    original = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or original())
+
+    for i in range(6):
+        cache.store(f"{i:02d}" * 32, {"stats.txt": str(src)})
+        os.utime(os.path.join(cache.entry_dir(f"{i:02d}" * 32), ".last_used"), (i, i))
+
+    assert len(original()) <= 3
+    # Un recorrido inicial y luego solo al superar el límite
+    assert len(scans) < 6
+    assert cache.fetch("05" * 32, {"stats.txt": str(tmp_path / "copy.txt")})
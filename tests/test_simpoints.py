@@ -0,0 +1,35 @@
+import pytest
+
+from simpoints import list_checkpoints, reconstruct, relative_errors
+
+
+def test_reconstruct_weights_cpi_rates_and_power():
+    intervals = [
+        {"weight": 0.75, "cpi": 1.0, "runtime_dynamic": 2.0, "total_leakage": 1.0,
+         "l1d_miss_rate": 0.1, "l2_miss_rate": 0.5, "intalu_utilization": 0.4},
+        {"weight": 0.25, "cpi": 3.0, "runtime_dynamic": 4.0, "total_leakage": 1.0,
+         "l1d_miss_rate": 0.3, "l2_miss_rate": None, "intalu_utilization": 0.2},
+    ]
+    metrics = reconstruct(intervals)
+    assert metrics["cpi"] == pytest.approx(1.5)
+    assert metrics["l1d_miss_rate"] == pytest.approx(0.15)
+    # Solo los intervalos con la métrica cuentan
+    assert metrics["l2_miss_rate"] == pytest.approx(0.5)
+    # Potencia y utilización por tiempo (peso × CPI): 0.75 y 0.75
+    assert metrics["runtime_dynamic"] == pytest.approx(3.0)
+    assert metrics["intalu_utilization"] == pytest.approx(0.3)
+
+
+def test_reconstruct_without_valid_intervals():
+    assert reconstruct([{"weight": 1.0, "cpi": None}]) == {}
+
+
+def test_relative_errors():
+    assert relative_errors({"cpi": 1.1}, {"cpi": 1.0}) == {"cpi_error_pct": pytest.approx(10.0)}
+
+
+def test_list_checkpoints_in_restore_order(tmp_path):
+    for name in ("cpt.simpoint_01_inst_20_weight_0.25_interval_10_warmup_1",
+                 "cpt.simpoint_00_inst_10_weight_0.75_interval_10_warmup_1"):
+        (tmp_path / name).mkdir()
+    assert list_checkpoints(str(tmp_path)) == [(1, 0, 0.75), (2, 1, 0.25)]
@@ -0,0 +1,61 @@
+import random
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from stack_distance import cache_geometry, miss_curves, modeled_bytes, stack_histogram
+
+
+def lru_misses(blocks, num_sets, assoc):
+    sets = [OrderedDict() for _ in range(num_sets)]
+    misses = 0
+    for block in blocks:
+        lines = sets[block % num_sets]
+        if block in lines:
+            lines.move_to_end(block)
+            continue
+        misses += 1
+        if len(lines) == assoc:
+            lines.popitem(last=False)
+        lines[block] = True
+    return misses
+
+
+@pytest.fixture
+def blocks():
+    rng = random.Random(7)
+    # Mezcla de reuso cercano y bloques lejanos para cubrir todas las distancias
+    trace = [rng.randrange(64) if rng.random() < 0.7 else rng.randrange(4096) for _ in range(5000)]
+    return np.array(trace, dtype=np.uint64)
+
+
+@pytest.mark.parametrize("num_sets", [1, 4, 16])
+def test_mattson_matches_brute_force_lru(blocks, num_sets):
+    max_assoc = 16
+    hist = stack_histogram(blocks, num_sets, max_assoc)
+    assert sum(hist) == len(blocks)
+    for assoc in (1, 2, 4, 8, 16):
+        assert sum(hist[assoc:]) == lru_misses(blocks.tolist(), num_sets, assoc)
+
+
+def test_demand_mask_excludes_writebacks(blocks):
+    demand = np.arange(len(blocks)) % 3 != 0
+    hist = stack_histogram(blocks, 4, 8, demand)
+    assert sum(hist) == int(demand.sum())
+
+
+def test_miss_curves_from_saved_trace(tmp_path, blocks):
+    path = tmp_path / "trace.npz"
+    np.savez(path, blocks=blocks)
+    curves = miss_curves(str(path), ["4kB", "8kB"], [2, 4])
+    for c in curves:
+        assert c["accesses"] == len(blocks)
+        assert c["misses"] == lru_misses(blocks.tolist(), c["num_sets"], c["assoc"])
+
+
+def test_modeled_capacity_of_non_power_of_two_sets():
+    assert modeled_bytes(cache_geometry("64kB", 8), 8) == 64 * 1024
+    num_sets = cache_geometry("1MB", 24)
+    assert num_sets == 682
+    assert modeled_bytes(num_sets, 24) < 1024 * 1024